@@ -1,38 +1,80 @@
 # ai_reporter.py
-import openai
-import requests
 import json
-from docx import Document
-from fpdf import FPDF
+import threading
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
 import sqlite3
 import os
 from database import db
 from datetime import datetime
 import time
 import logging
-import re
-import html
-import mdformat
+import hashlib
+from http_client import llm_client, LLMRequestError, LLMRateLimitError, LLMTimeoutError
+import metrics
 
 # Setup logging
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
 
+# Parameter generasi yang ikut menentukan key cache laporan
+GENERATION_TEMPERATURE = 0.7
+# Naikkan jika template prompt berubah agar cache lama tidak terpakai
+PROMPT_VERSION = 1
+# Batas total ukuran cache laporan (bytes)
+REPORT_CACHE_MAX_BYTES = int(os.environ.get('REPORT_CACHE_MAX_BYTES', 50 * 1024 * 1024))
+# Naikkan jika tampilan DOCX/PDF berubah agar artefak lama dirender ulang
+DOCUMENT_RENDER_VERSION = 2
+# Lama katalog model OpenRouter disimpan di memori (detik)
+MODELS_CATALOG_TTL = 600
+# Model cadangan jika model utama gagal/rate limit (dipisah koma)
+REPORT_FALLBACK_MODELS = [m.strip() for m in os.environ.get(
+    'REPORT_FALLBACK_MODELS',
+    'mistralai/mistral-7b-instruct:free,google/gemma-2-9b-it:free,microsoft/phi-3-mini-128k-instruct:free'
+).split(',') if m.strip()]
+# Kirim hedged request ke model berikutnya setelah sekian detik tanpa jawaban (0 = nonaktif)
+REPORT_HEDGE_AFTER = float(os.environ.get('REPORT_HEDGE_AFTER', 0))
+
 class AIReporter:
     def __init__(self):
-        self.api_key = db.get_api_key('openrouter')
-        if self.api_key:
-            openai.api_key = self.api_key
-            openai.api_base = "https://openrouter.ai/api/v1"
+        self._api_key = None
+        self._api_key_loaded = False
+        self._models_catalog = None
+        self._models_catalog_time = 0
+        self._models_catalog_lock = threading.Lock()
         logger.info("AIReporter initialized")
     
+    @property
+    def api_key(self):
+        """API key OpenRouter, dibaca dari database saat pertama dipakai"""
+        if not self._api_key_loaded:
+            self._api_key = db.get_api_key('openrouter')
+            self._api_key_loaded = True
+        return self._api_key
+    
+    @api_key.setter
+    def api_key(self, api_key):
+        self._api_key = api_key
+        self._api_key_loaded = True
+    
     def set_api_key(self, api_key):
         """Set API key untuk OpenRouter"""
-        self.api_key = api_key
-        openai.api_key = api_key
-        openai.api_base = "https://openrouter.ai/api/v1"
-        db.save_api_key('openrouter', api_key)
-        logger.info("API key set successfully")
+        if api_key != self.api_key:
+            self.api_key = api_key
+            db.save_api_key('openrouter', api_key)
+            logger.info("API key set successfully")
+    
+    def get_models_catalog(self):
+        """Dapatkan katalog model dari OpenRouter (di-cache selama MODELS_CATALOG_TTL)"""
+        with self._models_catalog_lock:
+            if self._models_catalog is not None and time.time() - self._models_catalog_time < MODELS_CATALOG_TTL:
+                return self._models_catalog
+        
+        data = llm_client.get_json("/models", api_key=self.api_key, timeout=15)
+        models = data.get('data', [])
+        with self._models_catalog_lock:
+            self._models_catalog = models
+            self._models_catalog_time = time.time()
+        return models
     
     def get_available_models(self):
         """Dapatkan daftar model yang tersedia dari OpenRouter"""
@@ -42,23 +84,11 @@ class AIReporter:
                 # Return default free models jika tidak ada API key
                 return self.get_default_free_models()
             
-            headers = {
-                "Authorization": f"Bearer {self.api_key}",
-                "Content-Type": "application/json"
-            }
-            
             logger.info("Fetching available models from OpenRouter API")
-            response = requests.get(
-                "https://openrouter.ai/api/v1/models",
-                headers=headers,
-                timeout=15
-            )
+            models = self.get_models_catalog()
+            logger.info(f"Retrieved {len(models)} models from API")
             
-            if response.status_code == 200:
-                data = response.json()
-                models = data.get('data', [])
-                logger.info(f"Retrieved {len(models)} models from API")
-                
+            if models:
                 # Filter dan format model
                 formatted_models = []
                 for model in models:
@@ -85,13 +115,13 @@ class AIReporter:
                 logger.info("Models sorted successfully")
                 return formatted_models
             else:
-                logger.error(f"API Error: {response.status_code} - {response.text}")
+                logger.error("API mengembalikan daftar model kosong")
                 return self.get_default_free_models()
                 
-        except requests.exceptions.Timeout:
+        except LLMTimeoutError:
             logger.error("Timeout saat mengambil daftar model")
             return self.get_default_free_models()
-        except requests.exceptions.RequestException as e:
+        except LLMRequestError as e:
             logger.error(f"Request error: {e}")
             return self.get_default_free_models()
         except Exception as e:
@@ -151,26 +181,18 @@ class AIReporter:
         try:
             # Coba dapatkan dari API jika ada API key
             if self.api_key:
-                headers = {
-                    "Authorization": f"Bearer {self.api_key}",
-                    "Content-Type": "application/json"
-                }
-                
                 logger.info(f"Fetching context length for model: {model_id}")
-                response = requests.get(
-                    "https://openrouter.ai/api/v1/models",
-                    headers=headers,
-                    timeout=10
-                )
+                try:
+                    models = self.get_models_catalog()
+                except LLMRequestError as e:
+                    logger.warning(f"Gagal mengambil katalog model: {e}")
+                    models = []
                 
-                if response.status_code == 200:
-                    data = response.json()
-                    models = data.get('data', [])
-                    for model in models:
-                        if model.get('id') == model_id:
-                            context_length = model.get('context_length', 4096)
-                            logger.info(f"Context length for {model_id}: {context_length}")
-                            return context_length
+                for model in models:
+                    if model.get('id') == model_id:
+                        context_length = model.get('context_length', 4096)
+                        logger.info(f"Context length for {model_id}: {context_length}")
+                        return context_length
             
             # Jika tidak ada API key atau gagal, gunakan default values
             default_contexts = {
@@ -243,37 +265,28 @@ class AIReporter:
             
             # Jika ada API key, coba dapatkan dari API
             if self.api_key:
-                headers = {
-                    "Authorization": f"Bearer {self.api_key}",
-                    "Content-Type": "application/json"
-                }
-                
-                response = requests.get(
-                    "https://openrouter.ai/api/v1/models",
-                    headers=headers,
-                    timeout=10
-                )
+                try:
+                    models = self.get_models_catalog()
+                except LLMRequestError as e:
+                    logger.warning(f"Gagal mengambil katalog model: {e}")
+                    models = []
                 
-                if response.status_code == 200:
-                    data = response.json()
-                    models = data.get('data', [])
-                    
-                    for model in models:
-                        if model.get('id') == model_id:
-                            # Dapatkan max_completion_tokens dari top_provider
-                            top_provider = model.get('top_provider', {})
-                            max_completion_tokens = top_provider.get('max_completion_tokens')
-                            
-                            if max_completion_tokens:
-                                logger.info(f"Max completion tokens for {model_id}: {max_completion_tokens}")
-                                return max_completion_tokens
-                            else:
-                                # Jika tidak ada info spesifik, gunakan default berdasarkan context_length
-                                context_length = model.get('context_length', 4096)
-                                # Gunakan 1/4 dari context length sebagai estimasi max completion
-                                estimated_max = min(context_length // 4, 4000)  # Maksimal 4000
-                                logger.info(f"No max completion info, using estimated max: {estimated_max}")
-                                return estimated_max
+                for model in models:
+                    if model.get('id') == model_id:
+                        # Dapatkan max_completion_tokens dari top_provider
+                        top_provider = model.get('top_provider', {})
+                        max_completion_tokens = top_provider.get('max_completion_tokens')
+                        
+                        if max_completion_tokens:
+                            logger.info(f"Max completion tokens for {model_id}: {max_completion_tokens}")
+                            return max_completion_tokens
+                        else:
+                            # Jika tidak ada info spesifik, gunakan default berdasarkan context_length
+                            context_length = model.get('context_length', 4096)
+                            # Gunakan 1/4 dari context length sebagai estimasi max completion
+                            estimated_max = min(context_length // 4, 4000)  # Maksimal 4000
+                            logger.info(f"No max completion info, using estimated max: {estimated_max}")
+                            return estimated_max
             
             # Jika tidak ada API key atau gagal, gunakan default values
             default_max_tokens = {
@@ -334,278 +347,215 @@ class AIReporter:
         logger.info(f"Calculated optimal max_tokens for {report_type} with {model_id}: {recommended}")
         return recommended
 
-    def format_report_content_for_document(self, content: str):
+    def build_model_chain(self, model_id, fallback_models=None):
         """
-        Memformat konten laporan untuk dokumen DOCX/PDF dengan menangani bagian <think>.
-        
-        Args:
-            content (str): Konten laporan yang akan diformat
-            
-        Returns:
-            tuple: (plain_content, html_content) - Konten yang telah diformat
-        """
-        logger.info("Formatting report content for document")
-        
-        # Normalisasi line endings
-        content = content.replace('\r\n', '\n').replace('\r', '\n')
-        
-        # Ekstrak dan proses bagian <think>
-        think_sections = []
-        def extract_think_section(match):
-            think_content = match.group(1)
-            think_sections.append(think_content)
-            # Return placeholder yang akan diganti nanti
-            return f"<<<THINK_PLACEHOLDER_{len(think_sections)-1}>>>"
-        
-        # Ekstrak bagian <think>
-        content = re.sub(r'<think>(.*?)</think>', extract_think_section, content, flags=re.DOTALL)
-        
-        # Bersihkan karakter yang tidak diinginkan tapi pertahankan struktur
-        content = re.sub(r'[^\S\n]+$', '', content, flags=re.MULTILINE)  # hapus spasi di akhir baris
-        content = re.sub(r'\n{3,}', '\n\n', content)  # maksimal 2 baris kosong berturut-turut
-        
-        # Konversi heading markdown ke format yang konsisten
-        # H1 sampai H6
-        for i in range(6, 0, -1):
-            pattern = r'^' + ('#' * i) + r'\s+(.+)$'
-            replacement = '#' * i + r' \1'
-            content = re.sub(pattern, replacement, content, flags=re.MULTILINE)
-        
-        # Konversi bold dan italic
-        content = re.sub(r'\*\*(.*?)\*\*', r'**\1**', content)  # bold
-        content = re.sub(r'\*(.*?)\*', r'*\1*', content)        # italic
-        
-        # Konversi list
-        content = re.sub(r'^\s*-\s+(.+)', r'- \1', content, flags=re.MULTILINE)  # unordered list
-        content = re.sub(r'^\s*\d+\.\s+(.+)', r'1. \1', content, flags=re.MULTILINE)  # ordered list
-        
-        # Persiapkan versi HTML untuk dokumen yang mendukung HTML
-        html_content = content
-        
-        # Konversi untuk HTML (jika diperlukan)
-        # Heading
-        for i in range(6, 0, -1):
-            pattern = r'^' + ('#' * i) + r'\s+(.+)$'
-            replacement = f'<h{i}>\\1</h{i}>'
-            html_content = re.sub(pattern, replacement, html_content, flags=re.MULTILINE)
-        
-        # Bold dan italic
-        html_content = re.sub(r'\*\*(.*?)\*\*', r'<strong>\1</strong>', html_content)
-        html_content = re.sub(r'\*(.*?)\*', r'<em>\1</em>', html_content)
-        
-        # List
-        html_content = re.sub(r'^-\s+(.+)', r'<li>\1</li>', html_content, flags=re.MULTILINE)
-        html_content = re.sub(r'(<li>.*?</li>\s*)+', r'<ul>\n\g<0></ul>\n', html_content, flags=re.DOTALL)
-        
-        html_content = re.sub(r'^\d+\.\s+(.+)', r'<li>\1</li>', html_content, flags=re.MULTILINE)
-        html_content = re.sub(r'(<li>.*?</li>\s*)+', r'<ol>\n\g<0></ol>\n', html_content, flags=re.DOTALL)
-        
-        # Masukkan kembali bagian think dengan format yang sesuai
-        for i, think_content in enumerate(think_sections):
-            # Format untuk konten teks biasa
-            think_placeholder = f"<<<THINK_PLACEHOLDER_{i}>>>"
-            formatted_think = f"\n[Proses Berpikir]\n{think_content}\n"
-            content = content.replace(think_placeholder, formatted_think)
-            
-            # Format untuk HTML
-            html_think = f'<div class="think-box"><h3>💭 Proses Berpikir</h3><p>{html.escape(think_content)}</p></div>'
-            html_content = html_content.replace(think_placeholder, html_think)
-        
-        # Pastikan ada baris baru di akhir
-        if not content.endswith('\n'):
-            content += '\n'
-        
-        if not html_content.endswith('\n'):
-            html_content += '\n'
-        
-        return content, html_content
-
-    def clean_for_docx(self, content: str) -> str:
-        """
-        Membersihkan dan memformat konten untuk format DOCX menggunakan mdformat.
+        Susun urutan model: model utama dulu, lalu model cadangan
+        diurutkan berdasarkan latensi yang pernah tercatat.
         """
+        if fallback_models is None:
+            fallback_models = REPORT_FALLBACK_MODELS
+        
+        candidates = [m for m in fallback_models if m and m != model_id]
+        candidates = list(dict.fromkeys(candidates))
+        latencies = db.get_model_latencies()
+        
+        def rank(candidate):
+            avg_latency, samples, failures = latencies.get(candidate, (None, 0, 0))
+            if not samples or avg_latency is None:
+                # Model tanpa data latensi ditaruh setelah model yang sudah terukur
+                return (1, 0)
+            failure_ratio = failures / (samples + failures)
+            return (0, avg_latency * (1 + failure_ratio))
+        
+        candidates.sort(key=rank)
+        chain = [model_id] + candidates
+        logger.info(f"Model chain: {' -> '.join(chain)}")
+        return chain
+    
+    def _call_model(self, model_id, build_request, timeout, cancel_event=None):
+        """Panggil satu model dan catat latensinya di tabel model_latency"""
+        messages, max_tokens = build_request(model_id)
+        logger.info(f"Sending request to OpenRouter API (model: {model_id}, max_tokens: {max_tokens})")
+        start_time = time.time()
         try:
-            # Gunakan mdformat untuk memformat konten Markdown
-            formatted_content = mdformat.text(content)
-            
-            # Lanjutkan dengan pembersihan karakter khusus untuk DOCX
-            replacements = {
-                '\u2013': '-',  # en dash
-                '\u2014': '-',  # em dash
-                '\u2018': "'",  # left single quotation mark
-                '\u2019': "'",  # right single quotation mark
-                '\u201c': '"',  # left double quotation mark
-                '\u201d': '"',  # right double quotation mark
-                '\u2026': '...', # horizontal ellipsis
-            }
-            
-            for unicode_char, replacement in replacements.items():
-                formatted_content = formatted_content.replace(unicode_char, replacement)
-            
-            # Hapus karakter kontrol yang tidak diizinkan di XML/DOCX
-            cleaned_content = ""
-            for char in formatted_content:
-                if ord(char) == 0x09 or ord(char) == 0x0A or ord(char) == 0x0D or \
-                   (0x20 <= ord(char) <= 0xD7FF) or \
-                   (0xE000 <= ord(char) <= 0xFFFD) or \
-                   (0x10000 <= ord(char) <= 0x10FFFF):
-                    cleaned_content += char
-                else:
-                    # Ganti karakter tidak valid dengan spasi
-                    cleaned_content += ' '
-            
-            return cleaned_content.strip()
-        except Exception as e:
-            # Jika mdformat gagal, fallback ke pembersihan dasar
-            logger.warning(f"mdformat failed: {e}. Using basic cleaning.")
-            return self.basic_clean_for_docx(content)
-
-    def clean_for_pdf(self, content: str) -> str:
+            result = llm_client.chat_completion(
+                api_key=self.api_key,
+                model=model_id,
+                messages=messages,
+                max_tokens=max_tokens,
+                temperature=GENERATION_TEMPERATURE,
+                timeout=timeout,
+                cancel_event=cancel_event
+            )
+            if not result:
+                raise LLMRequestError(f"Model {model_id} mengembalikan jawaban kosong")
+        except Exception:
+            if cancel_event is None or not cancel_event.is_set():
+                db.record_model_latency(model_id, None, success=False)
+                metrics.LLM_SECONDS.observe(time.time() - start_time, model=model_id, outcome='error')
+            raise
+        
+        latency_ms = (time.time() - start_time) * 1000
+        db.record_model_latency(model_id, latency_ms, success=True)
+        metrics.LLM_SECONDS.observe(latency_ms / 1000, model=model_id, outcome='success')
+        logger.info(f"Model {model_id} selesai dalam {latency_ms:.0f} ms")
+        return result
+    
+    def complete_with_fallback(self, model_chain, build_request, timeout=120, hedge_after=None):
         """
-        Membersihkan dan memformat konten untuk format PDF menggunakan mdformat.
+        Jalankan prompt melalui rantai model.
+        
+        Model berikutnya dipakai jika model sebelumnya gagal (rate limit, timeout, error server).
+        Jika hedge_after > 0, model berikutnya juga dikirimi prompt yang sama setelah
+        hedge_after detik tanpa jawaban; jawaban pertama yang selesai dipakai dan sisanya dibatalkan.
+        
+        Args:
+            model_chain (list): Urutan model yang dicoba
+            build_request (callable): build_request(model_id) -> (messages, max_tokens)
+            timeout (int): Timeout per request (detik)
+            hedge_after (float): Ambang latensi untuk hedged request (None = REPORT_HEDGE_AFTER)
+        
+        Returns:
+            tuple: (result, model_id yang menjawab)
         """
+        if hedge_after is None:
+            hedge_after = REPORT_HEDGE_AFTER
+        
+        remaining = list(model_chain)
+        errors = []
+        last_error = None
+        cancel_event = threading.Event()
+        executor = ThreadPoolExecutor(max_workers=max(1, len(model_chain)))
+        pending = {}
+        
+        def launch_next():
+            model_id = remaining.pop(0)
+            future = executor.submit(self._call_model, model_id, build_request, timeout, cancel_event)
+            pending[future] = model_id
+        
         try:
-            # Gunakan mdformat untuk memformat konten Markdown
-            formatted_content = mdformat.text(content)
-            
-            # Untuk PDF, kita bisa mempertahankan lebih banyak karakter Unicode
-            # Tapi tetap perlu membersihkan karakter kontrol
-            cleaned_content = ""
-            for char in formatted_content:
-                if ord(char) >= 32 or char in '\n\r\t':
-                    cleaned_content += char
-                else:
-                    # Ganti karakter kontrol dengan spasi
-                    cleaned_content += ' '
-            
-            return cleaned_content.strip()
-        except Exception as e:
-            # Jika mdformat gagal, fallback ke pembersihan dasar
-            logger.warning(f"mdformat failed: {e}. Using basic cleaning.")
-            return self.basic_clean_for_pdf(content)
-
-    # Fungsi pembersihan dasar sebagai fallback (contoh untuk DOCX)
-    def basic_clean_for_docx(self, content: str) -> str:
-        # Normalisasi line ending
-        content = content.replace('\r\n', '\n').replace('\r', '\n')
-        
-        # Tambahkan pembersihan karakter Unicode dan kontrol seperti sebelumnya
-        replacements = {
-            '\u2013': '-',  # en dash
-            '\u2014': '-',  # em dash
-            # ... tambahkan lainnya
-        }
-        for unicode_char, replacement in replacements.items():
-            content = content.replace(unicode_char, replacement)
-        
-        cleaned_content = ""
-        for char in content:
-            if ord(char) == 0x09 or ord(char) == 0x0A or ord(char) == 0x0D or \
-               (0x20 <= ord(char) <= 0xD7FF) or \
-               (0xE000 <= ord(char) <= 0xFFFD) or \
-               (0x10000 <= ord(char) <= 0x10FFFF):
-                cleaned_content += char
-            else:
-                cleaned_content += ' '
-        return cleaned_content.strip()
-
-    # Fungsi pembersihan dasar sebagai fallback (contoh untuk PDF)
-    def basic_clean_for_pdf(self, content: str) -> str:
-        # Normalisasi line ending
-        content = content.replace('\r\n', '\n').replace('\r', '\n')
-        
-        cleaned_content = ""
-        for char in content:
-            if ord(char) >= 32 or char in '\n\r\t':
-                cleaned_content += char
-            else:
-                cleaned_content += ' '
-        return cleaned_content.strip()
+            launch_next()
+            while pending:
+                wait_timeout = hedge_after if hedge_after and remaining else None
+                done, _ = wait(list(pending), timeout=wait_timeout, return_when=FIRST_COMPLETED)
+                
+                if not done:
+                    # Ambang latensi terlewati: kirim prompt yang sama ke model berikutnya
+                    logger.info(f"Hedging: tidak ada jawaban setelah {hedge_after}s, mencoba {remaining[0]}")
+                    launch_next()
+                    continue
+                
+                for future in done:
+                    model_id = pending.pop(future)
+                    try:
+                        result = future.result()
+                    except Exception as e:
+                        errors.append(f"{model_id}: {e}")
+                        last_error = e
+                        logger.warning(f"Model {model_id} gagal: {e}")
+                        if getattr(e, 'status_code', None) in (401, 403):
+                            # Masalah API key, model lain juga akan gagal
+                            raise
+                        continue
+                    
+                    if pending:
+                        logger.info(f"Membatalkan {len(pending)} request yang kalah cepat")
+                    return result, model_id
+                
+                if not pending and remaining:
+                    launch_next()
+            
+            if len(errors) == 1:
+                raise last_error
+            raise LLMRequestError("Semua model gagal: " + "; ".join(errors))
+        finally:
+            cancel_event.set()
+            # cancel_futures baru ada di Python 3.9; batalkan future yang belum jalan satu per satu
+            for future in pending:
+                future.cancel()
+            executor.shutdown(wait=False)
 
-    def generate_summary(self, transcription_text, model_id="mistralai/mistral-7b-instruct:free"):
-        """Generate ringkasan dari transkripsi"""
+    def generate_summary(self, transcription_text, model_id="mistralai/mistral-7b-instruct:free", fallback_models=None):
+        """Generate ringkasan dari transkripsi; return (teks, model yang menjawab)"""
         logger.info(f"Generating summary with model: {model_id}")
         
         if not self.api_key:
             logger.error("API key not found")
             raise Exception("API key tidak ditemukan. Silakan set API key terlebih dahulu.")
         
+        # Validasi model ID
+        if not model_id or model_id == "":
+            model_id = "mistralai/mistral-7b-instruct:free"
+            logger.warning("Using default model due to empty model_id")
+        
         # Simpan model yang digunakan
         self.save_user_model(model_id, model_id)
         
-        # Sesuaikan teks dengan context length model
-        adjusted_text = self.adjust_text_to_context(transcription_text, model_id, 1000)
-        logger.info(f"Adjusted text length: {len(adjusted_text)}")
-        
-        prompt = f"""
-        Buat ringkasan yang komprehensif dari transkripsi berikut dalam bahasa Indonesia:
-        
-        Transkripsi:
-        {adjusted_text}
-        
-        Harap berikan ringkasan yang mencakup:
-        1. Poin-poin utama yang dibahas
-        2. Kesimpulan penting
-        3. Rekomendasi jika ada
-        
-        Ringkasan harus jelas, terstruktur, dan informatif.
-        """
-        
-        logger.info(f"Prompt length: {len(prompt)} characters")
-        
-        try:
-            # Validasi model ID
-            if not model_id or model_id == "":
-                model_id = "mistralai/mistral-7b-instruct:free"
-                logger.warning("Using default model due to empty model_id")
+        def build_request(chain_model_id):
+            # Sesuaikan teks dengan context length model
+            adjusted_text = self.adjust_text_to_context(transcription_text, chain_model_id, 1000)
+            logger.info(f"Adjusted text length: {len(adjusted_text)}")
             
-            # Hitung max_tokens optimal
-            max_tokens = self.calculate_optimal_max_tokens(model_id, "summary")
-            logger.info(f"Using max_tokens: {max_tokens}")
+            prompt = f"""
+            Buat ringkasan yang komprehensif dari transkripsi berikut dalam bahasa Indonesia:
             
-            logger.info("Sending request to OpenAI API")
-            response = openai.ChatCompletion.create(
-                model=model_id,
-                messages=[
-                    {"role": "system", "content": "Anda adalah asisten yang ahli dalam membuat ringkasan dari transkripsi dalam bahasa Indonesia."},
-                    {"role": "user", "content": prompt}
-                ],
-                max_tokens=max_tokens,  # Gunakan nilai yang dihitung
-                temperature=0.7,
+            Transkripsi:
+            {adjusted_text}
+            
+            Harap berikan ringkasan yang mencakup:
+            1. Poin-poin utama yang dibahas
+            2. Kesimpulan penting
+            3. Rekomendasi jika ada
+            
+            Ringkasan harus jelas, terstruktur, dan informatif.
+            """
+            logger.info(f"Prompt length: {len(prompt)} characters")
+            
+            # Hitung max_tokens optimal
+            max_tokens = self.calculate_optimal_max_tokens(chain_model_id, "summary")
+            messages = [
+                {"role": "system", "content": "Anda adalah asisten yang ahli dalam membuat ringkasan dari transkripsi dalam bahasa Indonesia."},
+                {"role": "user", "content": prompt}
+            ]
+            return messages, max_tokens
+        
+        try:
+            result, used_model = self.complete_with_fallback(
+                self.build_model_chain(model_id, fallback_models),
+                build_request,
                 timeout=120  # 2 menit timeout
             )
-            
-            result = response.choices[0].message.content.strip()
-            logger.info(f"Summary generated successfully. Response length: {len(result)} characters")
-            return result
-        except openai.error.Timeout as e:
+            logger.info(f"Summary generated successfully by {used_model}. Response length: {len(result)} characters")
+            return result, used_model
+        except LLMTimeoutError as e:
             logger.error(f"Timeout saat menghasilkan ringkasan: {str(e)}")
             raise Exception(f"Timeout saat menghasilkan ringkasan: {str(e)}")
-        except openai.error.APIError as e:
-            logger.error(f"API Error: {str(e)}")
-            raise Exception(f"API Error: {str(e)}")
-        except openai.error.RateLimitError as e:
+        except LLMRateLimitError as e:
             logger.error(f"Rate limit exceeded: {str(e)}")
             raise Exception(f"Rate limit exceeded: {str(e)}")
+        except LLMRequestError as e:
+            logger.error(f"API Error: {str(e)}")
+            raise Exception(f"API Error: {str(e)}")
         except Exception as e:
             logger.error(f"Gagal menghasilkan ringkasan: {str(e)}")
             raise Exception(f"Gagal menghasilkan ringkasan: {str(e)}")
 
-    def generate_analysis(self, transcription_text, analysis_type="general", model_id="mistralai/mistral-7b-instruct:free"):
-        """Generate analisis dari transkripsi"""
+    def generate_analysis(self, transcription_text, analysis_type="general", model_id="mistralai/mistral-7b-instruct:free", fallback_models=None):
+        """Generate analisis dari transkripsi; return (teks, model yang menjawab)"""
         logger.info(f"Generating analysis with model: {model_id}, type: {analysis_type}")
         
         if not self.api_key:
             logger.error("API key not found")
             raise Exception("API key tidak ditemukan.")
         
+        # Validasi model ID
+        if not model_id or model_id == "":
+            model_id = "mistralai/mistral-7b-instruct:free"
+            logger.warning("Using default model due to empty model_id")
+        
         # Simpan model yang digunakan
         self.save_user_model(model_id, model_id)
         
-        # Sesuaikan teks dengan context length model
-        adjusted_text = self.adjust_text_to_context(transcription_text, model_id, 1500)
-        logger.info(f"Adjusted text length: {len(adjusted_text)}")
-        
         analysis_prompts = {
             "general": """
             Lakukan analisis komprehensif terhadap transkripsi berikut dalam bahasa Indonesia:
@@ -650,46 +600,46 @@ class AIReporter:
         }
         
         prompt_template = analysis_prompts.get(analysis_type, analysis_prompts["general"])
-        prompt = prompt_template.format(text=adjusted_text)
-        logger.info(f"Prompt length: {len(prompt)} characters")
         
-        try:
-            # Validasi model ID
-            if not model_id or model_id == "":
-                model_id = "mistralai/mistral-7b-instruct:free"
-                logger.warning("Using default model due to empty model_id")
+        def build_request(chain_model_id):
+            # Sesuaikan teks dengan context length model
+            adjusted_text = self.adjust_text_to_context(transcription_text, chain_model_id, 1500)
+            logger.info(f"Adjusted text length: {len(adjusted_text)}")
             
-            # Hitung max_tokens optimal
-            max_tokens = self.calculate_optimal_max_tokens(model_id, "analysis")
-            logger.info(f"Using max_tokens: {max_tokens}")
+            prompt = prompt_template.format(text=adjusted_text)
+            logger.info(f"Prompt length: {len(prompt)} characters")
             
-            logger.info("Sending request to OpenAI API")
-            response = openai.ChatCompletion.create(
-                model=model_id,
-                messages=[
-                    {"role": "system", "content": "Anda adalah analis yang ahli dalam menganalisis transkripsi dalam bahasa Indonesia."},
-                    {"role": "user", "content": prompt}
-                ],
-                max_tokens=max_tokens,  # Gunakan nilai yang dihitung
-                temperature=0.7,
+            # Hitung max_tokens optimal
+            max_tokens = self.calculate_optimal_max_tokens(chain_model_id, "analysis")
+            messages = [
+                {"role": "system", "content": "Anda adalah analis yang ahli dalam menganalisis transkripsi dalam bahasa Indonesia."},
+                {"role": "user", "content": prompt}
+            ]
+            return messages, max_tokens
+        
+        try:
+            result, used_model = self.complete_with_fallback(
+                self.build_model_chain(model_id, fallback_models),
+                build_request,
                 timeout=120
             )
-            
-            result = response.choices[0].message.content.strip()
-            logger.info(f"Analysis generated successfully. Response length: {len(result)} characters")
-            return result
-        except openai.error.Timeout as e:
+            logger.info(f"Analysis generated successfully by {used_model}. Response length: {len(result)} characters")
+            return result, used_model
+        except LLMTimeoutError as e:
             logger.error(f"Timeout saat menghasilkan analisis: {str(e)}")
             raise Exception(f"Timeout saat menghasilkan analisis: {str(e)}")
-        except openai.error.APIError as e:
+        except LLMRateLimitError as e:
+            logger.error(f"Rate limit exceeded: {str(e)}")
+            raise Exception(f"Rate limit exceeded: {str(e)}")
+        except LLMRequestError as e:
             logger.error(f"API Error: {str(e)}")
             raise Exception(f"API Error: {str(e)}")
         except Exception as e:
             logger.error(f"Gagal menghasilkan analisis: {str(e)}")
             raise Exception(f"Gagal menghasilkan analisis: {str(e)}")
 
-    def generate_custom_report(self, transcription_text, custom_prompt, model_id="mistralai/mistral-7b-instruct:free"):
-        """Generate laporan kustom berdasarkan prompt user"""
+    def generate_custom_report(self, transcription_text, custom_prompt, model_id="mistralai/mistral-7b-instruct:free", fallback_models=None):
+        """Generate laporan kustom berdasarkan prompt user; return (teks, model yang menjawab)"""
         logger.info(f"Generating custom report with model: {model_id}")
         
         if not self.api_key:
@@ -701,69 +651,156 @@ class AIReporter:
             logger.error("Custom prompt is empty")
             raise Exception("Prompt kustom tidak boleh kosong.")
         
+        # Validasi model ID
+        if not model_id or model_id == "":
+            model_id = "mistralai/mistral-7b-instruct:free"
+            logger.warning("Using default model due to empty model_id")
+        
         # Simpan model yang digunakan
         self.save_user_model(model_id, model_id)
         
-        # Sesuaikan teks dengan context length model
-        adjusted_text = self.adjust_text_to_context(transcription_text, model_id, 2000)
-        logger.info(f"Adjusted text length: {len(adjusted_text)}")
-        
-        full_prompt = f"""
-        Berdasarkan transkripsi berikut dalam bahasa Indonesia:
-        
-        Transkripsi:
-        {adjusted_text}
-        
-        Petunjuk pengguna:
-        {custom_prompt}
-        
-        Harap berikan jawaban yang komprehensif dan terstruktur dalam bahasa Indonesia.
-        Pastikan jawaban Anda relevan dengan transkripsi dan petunjuk yang diberikan.
-        """
-        
-        logger.info(f"Full prompt length: {len(full_prompt)} characters")
-        
-        try:
-            # Validasi model ID
-            if not model_id or model_id == "":
-                model_id = "mistralai/mistral-7b-instruct:free"
-                logger.warning("Using default model due to empty model_id")
+        def build_request(chain_model_id):
+            # Sesuaikan teks dengan context length model
+            adjusted_text = self.adjust_text_to_context(transcription_text, chain_model_id, 2000)
+            logger.info(f"Adjusted text length: {len(adjusted_text)}")
             
-            # Hitung max_tokens optimal
-            max_tokens = self.calculate_optimal_max_tokens(model_id, "custom")
-            logger.info(f"Using max_tokens: {max_tokens}")
+            full_prompt = f"""
+            Berdasarkan transkripsi berikut dalam bahasa Indonesia:
             
-            logger.info("Sending request to OpenAI API")
-            response = openai.ChatCompletion.create(
-                model=model_id,
-                messages=[
-                    {"role": "system", "content": "Anda adalah asisten yang ahli dalam membuat laporan berdasarkan instruksi spesifik dalam bahasa Indonesia."},
-                    {"role": "user", "content": full_prompt}
-                ],
-                max_tokens=max_tokens,  # Gunakan nilai yang dihitung
-                temperature=0.7,
+            Transkripsi:
+            {adjusted_text}
+            
+            Petunjuk pengguna:
+            {custom_prompt}
+            
+            Harap berikan jawaban yang komprehensif dan terstruktur dalam bahasa Indonesia.
+            Pastikan jawaban Anda relevan dengan transkripsi dan petunjuk yang diberikan.
+            """
+            logger.info(f"Full prompt length: {len(full_prompt)} characters")
+            
+            # Hitung max_tokens optimal
+            max_tokens = self.calculate_optimal_max_tokens(chain_model_id, "custom")
+            messages = [
+                {"role": "system", "content": "Anda adalah asisten yang ahli dalam membuat laporan berdasarkan instruksi spesifik dalam bahasa Indonesia."},
+                {"role": "user", "content": full_prompt}
+            ]
+            return messages, max_tokens
+        
+        try:
+            result, used_model = self.complete_with_fallback(
+                self.build_model_chain(model_id, fallback_models),
+                build_request,
                 timeout=180  # 3 menit timeout untuk custom report
             )
-            
-            result = response.choices[0].message.content.strip()
-            logger.info(f"Custom report generated successfully. Response length: {len(result)} characters")
-            return result
-        except openai.error.Timeout as e:
+            logger.info(f"Custom report generated successfully by {used_model}. Response length: {len(result)} characters")
+            return result, used_model
+        except LLMTimeoutError as e:
             logger.error(f"Timeout saat menghasilkan laporan kustom: {str(e)}")
             raise Exception(f"Timeout saat menghasilkan laporan kustom: {str(e)}")
-        except openai.error.APIError as e:
+        except LLMRateLimitError as e:
+            logger.error(f"Rate limit exceeded: {str(e)}")
+            raise Exception(f"Rate limit exceeded: {str(e)}")
+        except LLMRequestError as e:
             logger.error(f"API Error: {str(e)}")
             raise Exception(f"API Error: {str(e)}")
         except Exception as e:
             logger.error(f"Gagal menghasilkan laporan kustom: {str(e)}")
             raise Exception(f"Gagal menghasilkan laporan kustom: {str(e)}")
     
-    def create_docx_report(self, title, content, output_path):
-        """Buat laporan dalam format DOCX"""
+    def build_report_cache_key(self, transcription_text, report_type, model_id,
+                               analysis_type=None, custom_prompt=None):
+        """Buat key cache dari hash transkripsi, tipe/prompt laporan, model dan parameter generasi"""
+        text_hash = hashlib.sha256(transcription_text.encode('utf-8')).hexdigest()
+        key_data = {
+            'text': text_hash,
+            'report_type': report_type,
+            'analysis_type': analysis_type if report_type == 'analysis' else None,
+            'custom_prompt': custom_prompt.strip() if report_type == 'custom' and custom_prompt else None,
+            'model_id': model_id,
+            'temperature': GENERATION_TEMPERATURE,
+            'prompt_version': PROMPT_VERSION
+        }
+        payload = json.dumps(key_data, sort_keys=True, ensure_ascii=False)
+        return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+    
+    def generate_report(self, transcription_text, report_type, model_id,
+                        analysis_type="general", custom_prompt="", regenerate=False,
+                        fallback_models=None):
+        """
+        Generate laporan dengan cache hasil.
+        
+        Args:
+            transcription_text (str): Teks transkripsi
+            report_type (str): "summary", "analysis" atau "custom"
+            model_id (str): ID model yang digunakan
+            analysis_type (str): Tipe analisis (hanya untuk "analysis")
+            custom_prompt (str): Prompt kustom (hanya untuk "custom")
+            regenerate (bool): Abaikan cache dan panggil model lagi
+            fallback_models (list): Model cadangan (None = REPORT_FALLBACK_MODELS)
+        
+        Cache disimpan dengan key model yang benar-benar menjawab, sehingga jawaban model
+        cadangan tidak pernah dikembalikan sebagai jawaban model yang diminta.
+        
+        Returns:
+            tuple: (report_content, from_cache, model_id yang menjawab)
+        """
+        cache_key = self.build_report_cache_key(
+            transcription_text, report_type, model_id, analysis_type, custom_prompt
+        )
+        
+        if not regenerate:
+            cached_content = db.get_cached_report(cache_key)
+            if cached_content:
+                logger.info(f"Report cache hit: {cache_key[:12]} ({report_type}, {model_id})")
+                return cached_content, True, model_id
+        
+        if report_type == 'summary':
+            report_content, used_model = self.generate_summary(transcription_text, model_id, fallback_models)
+        elif report_type == 'analysis':
+            report_content, used_model = self.generate_analysis(transcription_text, analysis_type, model_id,
+                                                               fallback_models)
+        elif report_type == 'custom':
+            report_content, used_model = self.generate_custom_report(transcription_text, custom_prompt, model_id,
+                                                                    fallback_models)
+        else:
+            raise Exception(f"Tipe laporan tidak valid: {report_type}")
+        
+        if used_model != model_id:
+            logger.info(f"Laporan dijawab model cadangan {used_model}, bukan {model_id}")
+            cache_key = self.build_report_cache_key(
+                transcription_text, report_type, used_model, analysis_type, custom_prompt
+            )
+        
+        if report_content and report_content.strip():
+            try:
+                db.save_cached_report(cache_key, report_type, used_model, report_content)
+                evicted = db.evict_report_cache(REPORT_CACHE_MAX_BYTES)
+                if evicted:
+                    logger.info(f"Evicted {evicted} report cache entries")
+            except Exception as e:
+                # Cache gagal tidak boleh menggagalkan laporan
+                logger.warning(f"Gagal menyimpan cache laporan: {e}")
+        
+        return report_content, False, used_model
+    
+    def _add_docx_runs(self, paragraph, runs, italic=False):
+        """Tambahkan Run ke paragraf DOCX dengan format bold/italic/code"""
+        for run in runs:
+            docx_run = paragraph.add_run(run.text)
+            if run.bold:
+                docx_run.bold = True
+            if run.italic or italic:
+                docx_run.italic = True
+            if run.code:
+                docx_run.font.name = 'Courier New'
+    
+    def create_docx_report(self, title, blocks, output_path):
+        """Buat laporan dalam format DOCX dari blok hasil report_formatter.parse_report"""
         logger.info(f"Creating DOCX report: {output_path}")
         try:
-            # Bersihkan konten terlebih dahulu
-            cleaned_content = self.clean_for_docx(content)
+            # python-docx diimport saat dipakai agar startup web tidak ikut menanggungnya
+            from docx import Document
+            from docx.shared import Cm
             
             doc = Document()
             
@@ -774,75 +811,36 @@ class AIReporter:
             doc.add_paragraph(f'Dibuat pada: {datetime.now().strftime("%d %B %Y, %H:%M:%S")}')
             doc.add_paragraph('')
             
-            # Konten - split berdasarkan baris baru dan proses markdown
-            lines = cleaned_content.split('\n')
-            in_list = False
-            list_items = []
-            
-            for line in lines:
-                line = line.strip()
-                
-                # Skip empty lines
-                if not line:
-                    # Jika dalam list, tambahkan list items
-                    if in_list and list_items:
-                        paragraph = doc.add_paragraph()
-                        for item in list_items:
-                            paragraph.add_run('• ').bold = True
-                            paragraph.add_run(item + '\n')
-                        list_items = []
-                        in_list = False
-                    continue
-                
-                # Cek heading
-                if line.startswith('# '):
-                    if in_list and list_items:
-                        paragraph = doc.add_paragraph()
-                        for item in list_items:
-                            paragraph.add_run('• ').bold = True
-                            paragraph.add_run(item + '\n')
-                        list_items = []
-                        in_list = False
-                    doc.add_heading(line[2:], level=1)
-                elif line.startswith('## '):
-                    if in_list and list_items:
-                        paragraph = doc.add_paragraph()
-                        for item in list_items:
-                            paragraph.add_run('• ').bold = True
-                            paragraph.add_run(item + '\n')
-                        list_items = []
-                        in_list = False
-                    doc.add_heading(line[3:], level=2)
-                elif line.startswith('### '):
-                    if in_list and list_items:
-                        paragraph = doc.add_paragraph()
-                        for item in list_items:
-                            paragraph.add_run('• ').bold = True
-                            paragraph.add_run(item + '\n')
-                        list_items = []
-                        in_list = False
-                    doc.add_heading(line[4:], level=3)
-                elif line.startswith('- ') or line.startswith('* '):
-                    # List item
-                    in_list = True
-                    list_items.append(line[2:])
+            # Konten
+            for block in blocks:
+                if block.kind == 'heading':
+                    paragraph = doc.add_heading('', level=min(block.level, 9))
+                    self._add_docx_runs(paragraph, block.runs)
+                elif block.kind == 'bullet':
+                    style = 'List Bullet' if block.level == 0 else f'List Bullet {min(block.level + 1, 3)}'
+                    paragraph = doc.add_paragraph(style=style)
+                    self._add_docx_runs(paragraph, block.runs)
+                elif block.kind == 'numbered':
+                    paragraph = doc.add_paragraph(style='List Paragraph')
+                    paragraph.paragraph_format.left_indent = Cm(0.75 * (block.level + 1))
+                    paragraph.add_run(f'{block.number}. ')
+                    self._add_docx_runs(paragraph, block.runs)
+                elif block.kind == 'quote':
+                    paragraph = doc.add_paragraph(style='Quote')
+                    self._add_docx_runs(paragraph, block.runs)
+                elif block.kind == 'code':
+                    paragraph = doc.add_paragraph(style='No Spacing')
+                    self._add_docx_runs(paragraph, block.runs)
+                elif block.kind == 'think':
+                    doc.add_heading('💭 Proses Berpikir', level=3)
+                    paragraph = doc.add_paragraph(style='Intense Quote')
+                    self._add_docx_runs(paragraph, block.runs, italic=True)
+                elif block.kind == 'rule':
+                    doc.add_paragraph('─' * 40)
                 else:
                     # Paragraf biasa
-                    if in_list and list_items:
-                        paragraph = doc.add_paragraph()
-                        for item in list_items:
-                            paragraph.add_run('• ').bold = True
-                            paragraph.add_run(item + '\n')
-                        list_items = []
-                        in_list = False
-                    doc.add_paragraph(line)
-            
-            # Tambahkan list items yang tersisa
-            if in_list and list_items:
-                paragraph = doc.add_paragraph()
-                for item in list_items:
-                    paragraph.add_run('• ').bold = True
-                    paragraph.add_run(item + '\n')
+                    paragraph = doc.add_paragraph()
+                    self._add_docx_runs(paragraph, block.runs)
             
             doc.save(output_path)
             logger.info(f"DOCX report saved successfully: {output_path}")
@@ -851,59 +849,13 @@ class AIReporter:
             logger.error(f"Gagal membuat file DOCX: {str(e)}")
             raise Exception(f"Gagal membuat file DOCX: {str(e)}")
     
-    def create_pdf_report(self, title, content, output_path):
-        """Buat laporan dalam format PDF"""
+    def create_pdf_report(self, title, blocks, output_path):
+        """Buat laporan dalam format PDF dari blok hasil report_formatter.parse_report"""
         logger.info(f"Creating PDF report: {output_path}")
         try:
-            # Bersihkan konten terlebih dahulu
-            cleaned_content = self.clean_for_pdf(content)
-            
-            pdf = FPDF()
-            pdf.add_page()
-            pdf.set_auto_page_break(auto=True, margin=15)
-            
-            # Title
-            pdf.set_font('Arial', 'B', 16)
-            try:
-                pdf.cell(0, 10, title.encode('latin-1', 'replace').decode('latin-1'), ln=True, align='C')
-            except:
-                pdf.cell(0, 10, title, ln=True, align='C')
-            pdf.ln(10)
-            
-            # Metadata
-            pdf.set_font('Arial', '', 10)
-            try:
-                pdf.cell(0, 10, f'Dibuat pada: {datetime.now().strftime("%d %B %Y, %H:%M:%S")}'.encode('latin-1', 'replace').decode('latin-1'), ln=True)
-            except:
-                pdf.cell(0, 10, f'Dibuat pada: {datetime.now().strftime("%d %B %Y, %H:%M:%S")}', ln=True)
-            pdf.ln(10)
-            
-            # Content
-            pdf.set_font('Arial', '', 12)
-            
-            # Split content and add to PDF
-            lines = cleaned_content.split('\n')
-            for line in lines:
-                # Handle encoding issues
-                try:
-                    clean_line = line.encode('latin-1', 'replace').decode('latin-1')
-                    # Handle long lines
-                    if len(clean_line) > 80:
-                        # Split into multiple lines
-                        while len(clean_line) > 80:
-                            pdf.cell(0, 10, clean_line[:80], ln=True)
-                            clean_line = clean_line[80:]
-                        if clean_line:
-                            pdf.cell(0, 10, clean_line, ln=True)
-                    else:
-                        pdf.cell(0, 10, clean_line, ln=True)
-                except:
-                    try:
-                        pdf.cell(0, 10, "Error encoding line", ln=True)
-                    except:
-                        pass
+            from pdf_layout import render_pdf
             
-            pdf.output(output_path)
+            render_pdf(title, blocks, output_path)
             logger.info(f"PDF report saved successfully: {output_path}")
             return output_path
         except Exception as e:
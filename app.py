@@ -1,4 +1,6 @@
-from flask import Flask, render_template, request, redirect, url_for, send_file, flash, jsonify
+from flask import Flask, Response, render_template, request, redirect, url_for, send_file, send_from_directory, flash, jsonify, abort
+import io
+import math
 import os
 import threading
 import time
@@ -6,12 +8,23 @@ import requests
 from werkzeug.utils import secure_filename
 from transcriber import AudioTranscriber
 from database import db
-from setup import setup_environment
-from ai_reporter import ai_reporter
-import openai
-import re
-import html
-from typing import Tuple
+from ai_reporter import ai_reporter, DOCUMENT_RENDER_VERSION
+from http_client import llm_client
+from batch_reports import create_report_for_transcription, resolve_transcription_ids, start_batch_job, batch_jobs, WEB_MAX_CONCURRENCY, WEB_MAX_REQUESTS_PER_MINUTE
+from report_formatter import parse_report
+from text_sanitizer import sanitize_for_docx, sanitize_for_pdf
+from artifact_store import ArtifactStore, content_hash
+from transcript_export import EXPORT_FORMATS, start_export_job, export_jobs
+from resumable_upload import ResumableUploads, UploadError, UploadOffsetConflict, reserve_unique_path
+from streaming_upload import StreamingDecoder, STREAMABLE_EXTENSIONS
+from scratch import scratch_space
+from storage import StorageManager
+from eta import JobEta, rtf_estimator
+from model_policy import model_policy
+from cpu_resources import cpu_resources
+from transcript_stats import StatsAccumulator
+import metrics
+import profiling
 
 app = Flask(__name__)
 app.secret_key = 'whisper_transcriber_secret_key'
@@ -21,6 +34,18 @@ UPLOAD_FOLDER = 'uploads'
 TRANSCRIPTS_FOLDER = 'transcripts'
 REPORTS_FOLDER = 'reports'
 ALLOWED_EXTENSIONS = {'mp3', 'wav', 'm4a', 'flac', 'mp4', 'mkv', 'mov', 'avi', 'wmv'}
+# Pilihan bahasa di form upload ('auto' = deteksi otomatis sekali per file)
+LANGUAGE_CHOICES = {
+    'auto': 'Deteksi otomatis',
+    'id': 'Indonesia',
+    'en': 'Inggris',
+    'jw': 'Jawa',
+    'su': 'Sunda',
+    'ms': 'Melayu',
+    'ar': 'Arab',
+    'zh': 'Mandarin',
+    'ja': 'Jepang'
+}
 
 app.config['UPLOAD_FOLDER'] = UPLOAD_FOLDER
 app.config['TRANSCRIPTS_FOLDER'] = TRANSCRIPTS_FOLDER
@@ -31,6 +56,60 @@ os.makedirs(UPLOAD_FOLDER, exist_ok=True)
 os.makedirs(TRANSCRIPTS_FOLDER, exist_ok=True)
 os.makedirs(REPORTS_FOLDER, exist_ok=True)
 
+# Artefak DOCX/PDF hasil render, dirender sekali per (laporan, format, isi)
+report_artifacts = ArtifactStore(
+    os.path.join(REPORTS_FOLDER, 'artifacts'),
+    max_bytes=int(os.environ.get('REPORT_ARTIFACTS_MAX_BYTES', 500 * 1024 * 1024))
+)
+
+# Ekspor transkripsi (DOCX/PDF/SRT/VTT), dirender di background dan disimpan di disk
+transcript_artifacts = ArtifactStore(
+    os.path.join(TRANSCRIPTS_FOLDER, 'exports'),
+    max_bytes=int(os.environ.get('TRANSCRIPT_EXPORTS_MAX_BYTES', 1024 * 1024 * 1024))
+)
+
+# Upload bertahap yang bisa dilanjutkan (file sementara di uploads/.partial)
+resumable_uploads = ResumableUploads(UPLOAD_FOLDER, os.path.join(UPLOAD_FOLDER, '.partial'))
+
+# Retensi media upload dan penyimpanan transkripsi (terkompresi di database)
+storage_manager = StorageManager(UPLOAD_FOLDER, TRANSCRIPTS_FOLDER, tiers={
+    'partial_uploads': resumable_uploads.partial_folder,
+    'transcript_exports': transcript_artifacts.root,
+    'report_artifacts': report_artifacts.root,
+    'scratch': scratch_space.root
+})
+
+_services_started = False
+_services_lock = threading.Lock()
+
+def start_background_services():
+    """
+    Jalankan layanan proses server (sekali per proses).
+    
+    Tidak dijalankan saat import, jadi tool dan benchmark yang mengimport app tidak
+    memulai thread retensi atau menghapus file. Dipanggil di __main__ dan sebelum request
+    pertama (untuk server WSGI seperti gunicorn app:app).
+    """
+    global _services_started
+    with _services_lock:
+        if _services_started:
+            return
+        _services_started = True
+        
+        # Batasi thread OpenMP/MKL per job sebelum torch dimuat
+        cpu_resources.configure_process()
+        
+        # Hapus folder scratch yang tertinggal dari proses sebelumnya (crash/kill)
+        scratch_space.sweep_orphans()
+        
+        # Retensi media upload dan penyimpanan transkripsi
+        storage_manager.start_background()
+
+@app.before_request
+def ensure_background_services():
+    if not _services_started:
+        start_background_services()
+
 # Inisialisasi transcriber
 transcriber = AudioTranscriber()
 
@@ -41,14 +120,304 @@ def allowed_file(filename):
     return '.' in filename and \
            filename.rsplit('.', 1)[1].lower() in ALLOWED_EXTENSIONS
 
+def requested_language(value):
+    """Bahasa pilihan user dari form/API; kode bahasa Whisper lain juga diterima"""
+    value = (value or '').strip().lower()
+    if value in LANGUAGE_CHOICES or (value.isalpha() and 2 <= len(value) <= 3):
+        return value
+    return None
+
 @app.route('/')
 def index():
     try:
         transcriptions = db.get_all_transcriptions()
-        return render_template('index.html', transcriptions=transcriptions)
+        stats_summary, _ = db.get_stats_overview(limit=0)
+        return render_template('index.html', transcriptions=transcriptions, languages=LANGUAGE_CHOICES,
+                               stats_summary=stats_summary)
     except Exception as e:
         flash(f'Error loading transcriptions: {str(e)}')
-        return render_template('index.html', transcriptions=[])
+        return render_template('index.html', transcriptions=[], languages=LANGUAGE_CHOICES, stats_summary=None)
+
+def make_progress_callback(job_id):
+    """Callback progress yang memperbarui transcription_progress[job_id]"""
+    def progress_callback(progress, message):
+        if job_id in transcription_progress:
+            transcription_progress[job_id]['message'] = message
+            if progress is not None:
+                transcription_progress[job_id]['progress'] = progress
+            # Update elapsed time
+            elapsed = time.time() - transcription_progress[job_id]['start_time']
+            transcription_progress[job_id]['elapsed_time'] = elapsed
+            print(f"[{time.strftime('%I:%M:%S %p')}] {message}")
+    return progress_callback
+
+def make_chunk_callback(job_id, job_eta):
+    """Callback per chunk: perbarui ETA job dari throughput yang terukur"""
+    def on_chunk(audio_seconds, seconds):
+        job_eta.chunk_done(audio_seconds, seconds)
+        model_policy.job_progress(job_id, job_eta.audio_done)
+        remaining = job_eta.remaining_seconds()
+        if remaining is not None and job_id in transcription_progress:
+            elapsed = time.time() - transcription_progress[job_id]['start_time']
+            transcription_progress[job_id]['eta_seconds'] = remaining
+            transcription_progress[job_id]['estimated_time'] = (elapsed + remaining) / 60
+    return on_chunk
+
+def plan_job(job_id, duration):
+    """
+    Pilih ukuran model untuk job (beban antrean, durasi, deadline) dan buat JobEta
+    dengan RTF ukuran tersebut dari riwayat job di host ini.
+    """
+    # Device efektif engine (whisper-int8 berjalan di CPU walau GPU tersedia)
+    gpu = transcriber.device == 'cuda'
+    chunk_count = max(1, math.ceil(duration / 60)) if duration else None
+    model_size, reason = model_policy.choose(duration, gpu, chunk_count)
+    model_policy.job_started(job_id, model_size, duration, gpu)
+    print(f"🧠 Model Whisper '{model_size}' dipilih ({reason})")
+    
+    rtf, source = rtf_estimator.estimate(model_size, gpu, chunk_count)
+    if source == 'default':
+        rtf = model_policy.rtf(model_size, gpu, chunk_count)
+    job_eta = JobEta(duration, rtf, model_size=model_size)
+    if job_id in transcription_progress:
+        transcription_progress[job_id]['model_size'] = model_size
+    if duration and job_id in transcription_progress:
+        transcription_progress[job_id]['estimated_time'] = duration * rtf / 60  # dalam menit
+        transcription_progress[job_id]['eta_seconds'] = duration * rtf
+        transcription_progress[job_id]['eta_source'] = source
+    return job_eta
+
+def record_job_performance(job_eta, duration):
+    """Simpan RTF job yang selesai untuk estimasi job berikutnya (tanpa waktu antre/upload)"""
+    try:
+        rtf_estimator.record(job_eta.model_size, transcriber.device == 'cuda', job_eta.chunks,
+                             duration, job_eta.processing_seconds(), job_eta.inference_seconds)
+    except Exception as e:
+        print(f"⚠️  Gagal mencatat performa job: {e}")
+
+def record_job_failure():
+    metrics.JOBS.inc(status='failed')
+    metrics.set_job_status('failed')
+
+def record_queue_wait(job_id):
+    """Catat waktu antara job didaftarkan dan mulai diproses (sekali per job)"""
+    queued_at = transcription_progress.get(job_id, {}).pop('queued_at', None)
+    if queued_at is not None:
+        metrics.record_span('queue_wait', max(0.0, time.time() - queued_at))
+
+def mark_transcription_failed(job_id, error):
+    """Tandai job gagal dengan pesan yang mudah dipahami"""
+    record_job_failure()
+    if job_id in transcription_progress:
+        transcription_progress[job_id]['status'] = 'failed'
+        error_message = str(error)
+        if 'moov atom not found' in error_message:
+            transcription_progress[job_id]['message'] = '❌ File video korup. Coba upload ulang file yang utuh.'
+        elif 'timeout' in error_message.lower():
+            transcription_progress[job_id]['message'] = '❌ Proses timeout. File terlalu besar atau sistem sibuk.'
+        else:
+            transcription_progress[job_id]['message'] = f'❌ Error: {error_message[:100]}...'
+    print(f"❌ Error transkripsi: {error}")
+
+def save_transcription_result(job_id, filename, transcription, duration, word_count, segments, start_time,
+                              job_eta=None, language=None, stats=None):
+    """Simpan hasil transkripsi (database, segmen, statistik, performa job) dan tandai job selesai"""
+    progress_callback = make_progress_callback(job_id)
+    
+    if not transcription or len(transcription.strip()) == 0:
+        record_job_failure()
+        if job_id in transcription_progress:
+            transcription_progress[job_id]['status'] = 'failed'
+            transcription_progress[job_id]['message'] = '❌ Gagal transkripsi - hasil kosong'
+        print(f"❌ Gagal transkripsi: {filename}")
+        return None
+    
+    # Update elapsed time
+    elapsed = time.time() - start_time
+    transcription_progress[job_id]['elapsed_time'] = elapsed
+    progress_callback(95, 'Menyimpan hasil...')
+    
+    # Simpan ke database (satu-satunya salinan teks, disimpan terkompresi)
+    transcript_filename = os.path.splitext(filename)[0] + '.txt'
+    with metrics.span('db_write'):
+        transcription_id = db.add_transcription(
+            filename=transcript_filename,
+            original_file=filename,
+            transcription=transcription,
+            duration=duration,
+            word_count=word_count,
+            language=language
+        )
+        if segments:
+            db.add_transcript_segments(transcription_id, segments)
+        if stats is not None:
+            db.add_transcription_stats(transcription_id, stats.summary(duration))
+    
+    # Update final time
+    final_elapsed = time.time() - start_time
+    metrics.JOBS.inc(status='completed')
+    metrics.set_job_status('completed')
+    if duration:
+        metrics.AUDIO_SECONDS.inc(duration)
+        metrics.REALTIME_FACTOR.observe(final_elapsed / duration)
+        if job_eta is not None:
+            record_job_performance(job_eta, duration)
+    transcription_progress[job_id]['eta_seconds'] = 0
+    transcription_progress[job_id]['elapsed_time'] = final_elapsed
+    progress_callback(100, f'✅ Selesai dalam {final_elapsed/60:.1f} menit!')
+    transcription_progress[job_id]['status'] = 'completed'
+    transcription_progress[job_id]['transcription_id'] = transcription_id
+    print(f"✅ Transkripsi selesai: {filename}")
+    return transcription_id
+
+def mark_system_error(job_id, error):
+    """Tandai job gagal karena error sistem (di luar proses transkripsi)"""
+    record_job_failure()
+    if job_id in transcription_progress:
+        transcription_progress[job_id]['status'] = 'failed'
+        error_msg = str(error)
+        if 'timeout' in error_msg.lower():
+            transcription_progress[job_id]['message'] = '❌ Timeout - File terlalu besar'
+        elif 'permission' in error_msg.lower():
+            transcription_progress[job_id]['message'] = '❌ Permission denied - Cek hak akses file'
+        else:
+            transcription_progress[job_id]['message'] = f'❌ Error sistem: {error_msg[:100]}...'
+    print(f"❌ Error transkripsi: {error}")
+
+@metrics.traced_job('transcription')
+@profiling.profiled_job('transcription')
+def process_transcription(job_id, filepath, filename):
+    """Transkripsi file di background dengan progress callback"""
+    try:
+        record_queue_wait(job_id)
+        start_time = time.time()
+        progress_callback = make_progress_callback(job_id)
+        
+        # Update progress awal
+        progress_callback(2, 'Memulai proses...')
+        
+        # Dapatkan durasi file untuk estimasi waktu (RTF dari job sebelumnya di host ini)
+        duration = None
+        try:
+            duration = transcriber.get_audio_duration(filepath)
+            if duration:
+                progress_callback(5, f'Memvalidasi file... (Durasi: {duration/60:.1f} menit)')
+        except Exception as e:
+            progress_callback(5, 'Memvalidasi file...')
+            print(f"Warning: Could not get audio duration: {e}")
+        job_eta = plan_job(job_id, duration)
+        stats = StatsAccumulator()
+        
+        # Transcribe dengan progress tracking (menunggu slot CPU jika semua sedang dipakai)
+        try:
+            with cpu_resources.slot(job_id) as cpu_slot:
+                job_eta.start()
+                transcription_progress[job_id]['cpu_cores'] = len(cpu_slot['cores'])
+                transcription, duration, word_count, segments, language = transcriber.transcribe_with_progress(
+                    filepath, progress_callback, on_chunk=make_chunk_callback(job_id, job_eta),
+                    model_size=job_eta.model_size, language=transcription_progress[job_id].get('language'),
+                    stats=stats
+                )
+                transcription_progress[job_id]['language'] = language
+        except Exception as transcribe_error:
+            mark_transcription_failed(job_id, transcribe_error)
+            return
+        
+        save_transcription_result(job_id, filename, transcription, duration, word_count, segments, start_time,
+                                  job_eta=job_eta, language=language, stats=stats)
+    
+    except Exception as e:
+        mark_system_error(job_id, e)
+    finally:
+        model_policy.job_finished(job_id)
+
+@metrics.traced_job('transcription')
+@profiling.profiled_job('transcription')
+def process_streaming_transcription(job_id, decoder, filepath, filename, upload_done):
+    """
+    Transkripsi window audio dari decoder streaming selagi upload masih berjalan.
+    
+    Jika ffmpeg tidak bisa men-decode dari pipe (misal MP4 dengan moov di akhir file),
+    transkripsi diulang dari file yang tersimpan setelah upload selesai.
+    """
+    try:
+        record_queue_wait(job_id)
+        start_time = time.time()
+        progress_callback = make_progress_callback(job_id)
+        progress_callback(2, 'Men-decode audio selagi upload berjalan...')
+        # Durasi total belum diketahui selama upload: ETA belum bisa dihitung dan model dipilih
+        # dengan durasi asumsi (UNKNOWN_DURATION_MINUTES)
+        job_eta = plan_job(job_id, None)
+        stats = StatsAccumulator()
+        
+        try:
+            with cpu_resources.slot(job_id) as cpu_slot:
+                # Window datang secepat upload, jadi hanya waktu inferensi yang dihitung
+                job_eta.start(wall_clock=False)
+                transcription_progress[job_id]['cpu_cores'] = len(cpu_slot['cores'])
+                transcription, duration, word_count, segments, language = transcriber.transcribe_windows(
+                    transcriber.iter_pcm_windows(decoder.pcm), progress_callback,
+                    on_chunk=make_chunk_callback(job_id, job_eta), model_size=job_eta.model_size,
+                    language=transcription_progress[job_id].get('language'), stats=stats
+                )
+        except Exception as transcribe_error:
+            decoder.abort()
+            mark_transcription_failed(job_id, transcribe_error)
+            return
+        
+        decoded_ok, decode_error = decoder.wait()
+        upload_done.wait()
+        
+        if transcription_progress[job_id].get('upload_failed'):
+            return
+        
+        if not decoded_ok:
+            print(f"⚠️  Decode streaming gagal ({decode_error[:200]}), memproses ulang dari file")
+            progress_callback(5, 'Format tidak bisa di-stream, memproses dari file...')
+            process_transcription(job_id, filepath, filename)
+            return
+        
+        transcription_progress[job_id]['language'] = language
+        save_transcription_result(job_id, filename, transcription, duration, word_count, segments, start_time,
+                                  job_eta=job_eta, language=language, stats=stats)
+    
+    except Exception as e:
+        mark_system_error(job_id, e)
+    finally:
+        model_policy.job_finished(job_id)
+
+def register_transcription_job(filename, profile=False, language=None):
+    """
+    Buat entri progress untuk job transkripsi baru; return job_id.
+    
+    language: kode bahasa pilihan user, atau None/'auto' untuk deteksi otomatis. Setelah
+    deteksi, nilainya diganti dengan bahasa yang terdeteksi.
+    """
+    # Buat job ID untuk tracking progress
+    job_id = str(int(time.time() * 1000))
+    transcription_progress[job_id] = {
+        'status': 'processing',
+        'progress': 0,
+        'message': 'Memulai proses...',
+        'filename': filename,
+        'estimated_time': 0,
+        'elapsed_time': 0,
+        'start_time': time.time(),
+        'queued_at': time.time(),
+        'language': language or 'auto'
+    }
+    if profile:
+        profiling.request_profile(job_id)
+        transcription_progress[job_id]['profile'] = f'transcription-{job_id}'
+    return job_id
+
+def start_transcription_job(filepath, filename, profile=False, language=None):
+    """Daftarkan job transkripsi dan jalankan di thread terpisah; return job_id"""
+    job_id = register_transcription_job(filename, profile, language)
+    
+    thread = threading.Thread(target=process_transcription, args=(job_id, filepath, filename))
+    thread.start()
+    return job_id
 
 @app.route('/upload', methods=['POST'])
 def upload_file():
@@ -66,118 +435,9 @@ def upload_file():
         filepath = os.path.join(app.config['UPLOAD_FOLDER'], filename)
         file.save(filepath)
         
-        # Buat job ID untuk tracking progress
-        job_id = str(int(time.time() * 1000))
-        transcription_progress[job_id] = {
-            'status': 'processing',
-            'progress': 0,
-            'message': 'Memulai proses...',
-            'filename': filename,
-            'estimated_time': 0,
-            'elapsed_time': 0,
-            'start_time': time.time()
-        }
-        
-        # Proses transkripsi di background dengan progress callback
-        def process_transcription(job_id, filepath, filename):
-            try:
-                start_time = time.time()
-                
-                # Progress callback function
-                def progress_callback(progress, message):
-                    if job_id in transcription_progress:
-                        transcription_progress[job_id]['message'] = message
-                        if progress is not None:
-                            transcription_progress[job_id]['progress'] = progress
-                        # Update elapsed time
-                        elapsed = time.time() - transcription_progress[job_id]['start_time']
-                        transcription_progress[job_id]['elapsed_time'] = elapsed
-                        print(f"[{time.strftime('%I:%M:%S %p')}] {message}")
-                
-                # Update progress awal
-                progress_callback(2, 'Memulai proses...')
-                
-                # Dapatkan durasi file untuk estimasi waktu
-                try:
-                    duration = transcriber.get_audio_duration(filepath)
-                    if duration:
-                        # Estimasi: 1 menit audio = 0.7-2.0 menit proses
-                        speed_factor = 0.7 if transcriber.gpu_available else 2.0
-                        estimated_time = duration * speed_factor / 60  # dalam menit
-                        transcription_progress[job_id]['estimated_time'] = estimated_time
-                        progress_callback(5, f'Memvalidasi file... (Durasi: {duration/60:.1f} menit)')
-                except Exception as e:
-                    progress_callback(5, 'Memvalidasi file...')
-                    print(f"Warning: Could not get audio duration: {e}")
-                
-                # Transcribe dengan progress tracking
-                try:
-                    transcription, duration, word_count = transcriber.transcribe_with_progress(
-                        filepath, progress_callback
-                    )
-                except Exception as transcribe_error:
-                    if job_id in transcription_progress:
-                        transcription_progress[job_id]['status'] = 'failed'
-                        error_message = str(transcribe_error)
-                        if 'moov atom not found' in error_message:
-                            transcription_progress[job_id]['message'] = '❌ File video korup. Coba upload ulang file yang utuh.'
-                        elif 'timeout' in error_message.lower():
-                            transcription_progress[job_id]['message'] = '❌ Proses timeout. File terlalu besar atau sistem sibuk.'
-                        else:
-                            transcription_progress[job_id]['message'] = f'❌ Error: {error_message[:100]}...'
-                    print(f"❌ Error transkripsi: {transcribe_error}")
-                    return
-                
-                if transcription and len(transcription.strip()) > 0:
-                    # Update elapsed time
-                    elapsed = time.time() - start_time
-                    transcription_progress[job_id]['elapsed_time'] = elapsed
-                    progress_callback(95, 'Menyimpan hasil...')
-                    
-                    # Simpan transkripsi ke file
-                    transcript_filename = os.path.splitext(filename)[0] + '.txt'
-                    transcript_filepath = os.path.join(app.config['TRANSCRIPTS_FOLDER'], transcript_filename)
-                    
-                    with open(transcript_filepath, 'w', encoding='utf-8') as f:
-                        f.write(transcription)
-                    
-                    # Simpan ke database
-                    transcription_id = db.add_transcription(
-                        filename=transcript_filename,
-                        original_file=filename,
-                        transcription=transcription,
-                        duration=duration,
-                        word_count=word_count
-                    )
-                    
-                    # Update final time
-                    final_elapsed = time.time() - start_time
-                    transcription_progress[job_id]['elapsed_time'] = final_elapsed
-                    progress_callback(100, f'✅ Selesai dalam {final_elapsed/60:.1f} menit!')
-                    transcription_progress[job_id]['status'] = 'completed'
-                    transcription_progress[job_id]['transcription_id'] = transcription_id
-                    print(f"✅ Transkripsi selesai: {filename}")
-                else:
-                    if job_id in transcription_progress:
-                        transcription_progress[job_id]['status'] = 'failed'
-                        transcription_progress[job_id]['message'] = '❌ Gagal transkripsi - hasil kosong'
-                    print(f"❌ Gagal transkripsi: {filename}")
-                    
-            except Exception as e:
-                if job_id in transcription_progress:
-                    transcription_progress[job_id]['status'] = 'failed'
-                    error_msg = str(e)
-                    if 'timeout' in error_msg.lower():
-                        transcription_progress[job_id]['message'] = '❌ Timeout - File terlalu besar'
-                    elif 'permission' in error_msg.lower():
-                        transcription_progress[job_id]['message'] = '❌ Permission denied - Cek hak akses file'
-                    else:
-                        transcription_progress[job_id]['message'] = f'❌ Error sistem: {error_msg[:100]}...'
-                print(f"❌ Error transkripsi: {e}")
-        
-        # Jalankan di thread terpisah
-        thread = threading.Thread(target=process_transcription, args=(job_id, filepath, filename))
-        thread.start()
+        job_id = start_transcription_job(filepath, filename,
+                                         profile=profiling.flag_enabled(request.form.get('profile')),
+                                         language=requested_language(request.form.get('language')))
         
         # Redirect ke halaman progress
         return redirect(url_for('progress', job_id=job_id))
@@ -185,6 +445,141 @@ def upload_file():
     flash('Format file tidak didukung')
     return redirect(url_for('index'))
 
+def upload_response(session, status_code=200):
+    """Response JSON status upload dengan header Upload-Offset/Upload-Length"""
+    body = {
+        'status': 'success',
+        'upload_id': session['upload_id'],
+        'offset': session['offset'],
+        'size': session['size'],
+        'complete': bool(session.get('complete'))
+    }
+    if session.get('job_id'):
+        body['job_id'] = session['job_id']
+        body['progress_url'] = url_for('progress', job_id=session['job_id'])
+    response = jsonify(body)
+    response.status_code = status_code
+    response.headers['Upload-Offset'] = str(session['offset'])
+    response.headers['Upload-Length'] = str(session['size'])
+    response.headers['Cache-Control'] = 'no-store'
+    return response
+
+def upload_error_response(error):
+    response = jsonify({'status': 'error', 'message': str(error)})
+    response.status_code = getattr(error, 'status_code', 500)
+    if isinstance(error, UploadOffsetConflict):
+        response.headers['Upload-Offset'] = str(error.offset)
+    return response
+
+@app.route('/uploads', methods=['POST'])
+def create_upload():
+    """Mulai upload bertahap: JSON {filename, size, sha256 (opsional)} atau header Upload-Length"""
+    try:
+        data = request.get_json(silent=True) or {}
+        filename = secure_filename(data.get('filename') or request.headers.get('Upload-Filename', ''))
+        size = int(data.get('size') or request.headers.get('Upload-Length') or 0)
+        
+        if not filename or not allowed_file(filename):
+            return upload_error_response(UploadError('Format file tidak didukung', status_code=415))
+        
+        session = resumable_uploads.create(filename, size, data.get('sha256'),
+                                           profile=profiling.flag_enabled(data.get('profile')),
+                                           language=requested_language(data.get('language')))
+        response = upload_response(session, status_code=201)
+        response.headers['Location'] = url_for('upload_chunk', upload_id=session['upload_id'])
+        return response
+    except Exception as e:
+        return upload_error_response(e)
+
+@app.route('/uploads/<upload_id>', methods=['GET'])
+def upload_offset(upload_id):
+    """Offset upload saat ini (HEAD untuk header saja, GET untuk JSON)"""
+    try:
+        return upload_response(resumable_uploads.get(upload_id))
+    except Exception as e:
+        return upload_error_response(e)
+
+@app.route('/uploads/<upload_id>', methods=['PATCH', 'PUT'])
+def upload_chunk(upload_id):
+    """Tambahkan potongan file mulai dari header Upload-Offset; body dibaca sebagai stream"""
+    try:
+        offset = request.headers.get('Upload-Offset', request.args.get('offset'))
+        if offset is None:
+            raise UploadError('Header Upload-Offset wajib diisi')
+        
+        session = resumable_uploads.append(upload_id, int(offset), request.stream)
+        
+        # Byte terakhir sudah diterima: langsung antrekan transkripsi
+        if session.get('complete') and not session.get('job_id'):
+            session['job_id'] = start_transcription_job(session['path'], session['filename'],
+                                                        profile=session.get('profile'),
+                                                        language=session.get('language'))
+        return upload_response(session)
+    except Exception as e:
+        return upload_error_response(e)
+
+@app.route('/uploads/<upload_id>', methods=['DELETE'])
+def cancel_upload(upload_id):
+    """Batalkan upload bertahap"""
+    try:
+        resumable_uploads.delete(upload_id)
+        return jsonify({'status': 'success', 'message': 'Upload dibatalkan'})
+    except Exception as e:
+        return upload_error_response(e)
+
+@app.route('/upload-stream', methods=['POST'])
+def upload_stream():
+    """
+    Upload body mentah (?filename=...) sambil langsung men-decode dan mentranskripsi.
+    
+    Body ditulis ke file dan sekaligus diteruskan ke ffmpeg, sehingga Whisper sudah
+    memproses window pertama sebelum upload selesai.
+    """
+    filename = secure_filename(request.args.get('filename') or request.headers.get('X-Filename', ''))
+    if not filename or not allowed_file(filename):
+        return jsonify({'status': 'error', 'message': 'Format file tidak didukung'}), 415
+    if filename.rsplit('.', 1)[1].lower() not in STREAMABLE_EXTENSIONS:
+        return jsonify({'status': 'error', 'message': 'Format ini tidak bisa di-stream, gunakan upload biasa'}), 415
+    
+    # Nama unik agar upload bernama sama (mungkin masih ditranskripsi job lain) tidak tertimpa
+    filepath = reserve_unique_path(app.config['UPLOAD_FOLDER'], filename)
+    filename = os.path.basename(filepath)
+    job_id = register_transcription_job(filename, profile=profiling.flag_enabled(request.args.get('profile')),
+                                        language=requested_language(request.args.get('language')))
+    upload_done = threading.Event()
+    
+    try:
+        decoder = StreamingDecoder(transcriber.decode_command('pipe:0'))
+    except Exception as e:
+        transcription_progress.pop(job_id, None)
+        os.remove(filepath)
+        return jsonify({'status': 'error', 'message': f'Gagal menjalankan ffmpeg: {str(e)}'}), 500
+    
+    thread = threading.Thread(target=process_streaming_transcription,
+                              args=(job_id, decoder, filepath, filename, upload_done))
+    thread.start()
+    
+    try:
+        with open(filepath, 'wb') as f:
+            for data in iter(lambda: request.stream.read(1024 * 1024), b''):
+                f.write(data)
+                decoder.feed(data)
+    except Exception as e:
+        transcription_progress[job_id]['upload_failed'] = True
+        decoder.abort()
+        os.remove(filepath)
+        mark_system_error(job_id, e)
+        return jsonify({'status': 'error', 'message': f'Upload terputus: {str(e)}'}), 400
+    finally:
+        decoder.close_input()
+        upload_done.set()
+    
+    return jsonify({
+        'status': 'success',
+        'job_id': job_id,
+        'progress_url': url_for('progress', job_id=job_id)
+    })
+
 @app.route('/progress/<job_id>')
 def progress(job_id):
     if job_id not in transcription_progress:
@@ -215,32 +610,154 @@ def view_transcript(transcript_id):
         flash(f'Error loading transcript: {str(e)}')
         return redirect(url_for('index'))
 
+@app.route('/transcript/<int:transcript_id>/stats')
+def transcript_stats(transcript_id):
+    """Statistik satu transkripsi (kecepatan bicara, rasio diam, keyakinan per chunk) tanpa teks"""
+    try:
+        stats = db.get_transcription_stats(transcript_id)
+        if stats is None:
+            return jsonify({'status': 'error', 'message': 'Statistik tidak ditemukan'}), 404
+        return jsonify({'status': 'success', 'transcription_id': transcript_id, 'stats': stats})
+    except Exception as e:
+        return jsonify({'status': 'error', 'message': f'Error: {str(e)}'})
+
+@app.route('/stats')
+def stats_overview():
+    """Statistik semua transkripsi untuk dashboard (?date_from=&date_to=YYYY-MM-DD&limit=)"""
+    try:
+        limit = max(0, min(request.args.get('limit', 100, type=int), 1000))
+        summary, transcriptions = db.get_stats_overview(request.args.get('date_from') or None,
+                                                        request.args.get('date_to') or None, limit)
+        return jsonify({'status': 'success', 'summary': summary, 'transcriptions': transcriptions})
+    except Exception as e:
+        return jsonify({'status': 'error', 'message': f'Error: {str(e)}'})
+
 @app.route('/download/<int:transcript_id>')
 def download_transcript(transcript_id):
     try:
         transcription = db.get_transcription(transcript_id)
         if transcription:
-            transcript_filename = transcription[1]  # filename
-            transcript_filepath = os.path.join(app.config['TRANSCRIPTS_FOLDER'], transcript_filename)
-            if os.path.exists(transcript_filepath):
-                return send_file(transcript_filepath, as_attachment=True)
+            return send_file(
+                io.BytesIO((transcription[3] or '').encode('utf-8')),
+                mimetype='text/plain; charset=utf-8',
+                as_attachment=True,
+                download_name=transcription[1]  # filename
+            )
         flash('File tidak ditemukan')
         return redirect(url_for('index'))
     except Exception as e:
         flash(f'Error downloading transcript: {str(e)}')
         return redirect(url_for('index'))
 
+@app.route('/metrics')
+def metrics_endpoint():
+    """Metrik dalam format teks Prometheus"""
+    return Response(metrics.registry.render(), mimetype='text/plain; version=0.0.4')
+
+@app.route('/jobs/cpu')
+def cpu_assignments():
+    """Pembagian slot/core CPU untuk job transkripsi yang sedang berjalan"""
+    return jsonify(cpu_resources.status())
+
+@app.route('/jobs/<job_id>/trace')
+def job_trace(job_id):
+    """Span per tahap untuk satu job transkripsi"""
+    trace = metrics.get_trace(job_id)
+    if not trace:
+        return jsonify({'status': 'not_found', 'message': 'Trace tidak ditemukan'}), 404
+    return jsonify({'status': 'success', 'trace': trace})
+
+@app.route('/admin/profiles')
+def admin_profiles():
+    """Daftar profil job yang tersimpan beserta artefaknya"""
+    return render_template('profiles.html', profiles=profiling.list_profiles())
+
+@app.route('/admin/profiles/<name>/<filename>')
+def download_profile_file(name, filename):
+    """Download satu artefak profil (cprofile.prof, stacks.folded, torch_trace_N.json, ...)"""
+    directory = profiling.profile_path(secure_filename(name))
+    filename = secure_filename(filename)
+    if not directory or not filename or not os.path.isdir(directory):
+        abort(404)
+    return send_from_directory(directory, filename, as_attachment=True)
+
+@app.route('/admin/profiles/<name>/delete', methods=['POST'])
+def delete_profile(name):
+    """Hapus satu profil beserta semua artefaknya"""
+    name = secure_filename(name)
+    if not profiling.profile_path(name):
+        abort(404)
+    if profiling.delete_profile(name):
+        flash('Profil berhasil dihapus!')
+    else:
+        flash('Profil tidak ditemukan!')
+    return redirect(url_for('admin_profiles'))
+
+@app.route('/export-transcript/<int:transcript_id>', methods=['POST'])
+def export_transcript(transcript_id):
+    """Mulai ekspor transkripsi (DOCX/PDF/SRT/VTT) di background"""
+    try:
+        data = request.get_json(silent=True) or request.form.to_dict()
+        export_format = (data.get('format') or '').lower()
+        if export_format not in EXPORT_FORMATS:
+            return jsonify({'status': 'error', 'message': 'Format ekspor tidak didukung'})
+        
+        job_id = start_export_job(
+            transcript_artifacts, transcript_id, export_format,
+            timestamps=str(data.get('timestamps', '1')).lower() in ('1', 'true', 'on'),
+            paragraphs=str(data.get('paragraphs', '1')).lower() in ('1', 'true', 'on')
+        )
+        return jsonify({
+            'status': 'success',
+            'job_id': job_id,
+            'export_status': export_jobs[job_id]['status'],
+            'download_url': url_for('download_export', job_id=job_id)
+        })
+    except Exception as e:
+        return jsonify({'status': 'error', 'message': f'Error: {str(e)}'})
+
+@app.route('/export-transcript/status/<job_id>')
+def export_status(job_id):
+    """Status job ekspor transkripsi"""
+    if job_id in export_jobs:
+        job = export_jobs[job_id]
+        return jsonify({key: value for key, value in job.items() if key != 'path'})
+    return jsonify({'status': 'not_found', 'message': 'Job tidak ditemukan'})
+
+@app.route('/export-transcript/download/<job_id>')
+def download_export(job_id):
+    """Download hasil ekspor (mendukung Range dan If-None-Match)"""
+    job = export_jobs.get(job_id)
+    if not job or job['status'] != 'completed' or not os.path.exists(job['path']):
+        flash('Ekspor belum siap atau tidak ditemukan')
+        return redirect(url_for('index'))
+    
+    return send_file(
+        job['path'],
+        as_attachment=True,
+        download_name=job['download_name'],
+        etag=job['etag'],
+        conditional=True,
+        max_age=0
+    )
+
 @app.route('/delete/<int:transcript_id>')
 def delete_transcript(transcript_id):
     try:
         transcription = db.get_transcription(transcript_id)
         if transcription:
-            # Hapus file
+            # Hapus file .txt lama (sebelum transkripsi disimpan di database)
             transcript_filename = transcription[1]
             transcript_filepath = os.path.join(app.config['TRANSCRIPTS_FOLDER'], transcript_filename)
             if os.path.exists(transcript_filepath):
                 os.remove(transcript_filepath)
             
+            # Hapus media sumber di uploads/
+            storage_manager.delete_media(transcription)
+            
+            # Hapus ekspor yang sudah dirender
+            transcript_artifacts.invalidate('transcripts', transcript_id)
+            
             # Hapus dari database
             db.delete_transcription(transcript_id)
             flash('Transkripsi berhasil dihapus')
@@ -252,6 +769,29 @@ def delete_transcript(transcript_id):
         flash(f'Error deleting transcript: {str(e)}')
         return redirect(url_for('index'))
 
+@app.route('/storage/usage')
+def storage_usage():
+    """Pemakaian disk per tier (media, transkripsi, ekspor, scratch, ...)"""
+    try:
+        return jsonify({
+            'status': 'success',
+            'usage': storage_manager.usage(),
+            'retention': {
+                'days': storage_manager.retention_days,
+                'action': storage_manager.retention_action
+            }
+        })
+    except Exception as e:
+        return jsonify({'status': 'error', 'message': f'Error: {str(e)}'})
+
+@app.route('/storage/retention', methods=['POST'])
+def run_storage_retention():
+    """Jalankan kebijakan retensi media sekarang"""
+    try:
+        return jsonify({'status': 'success', 'summary': storage_manager.apply_retention()})
+    except Exception as e:
+        return jsonify({'status': 'error', 'message': f'Error: {str(e)}'})
+
 @app.route('/setup')
 def setup_page():
     """Halaman setup"""
@@ -261,6 +801,7 @@ def setup_page():
 def run_setup():
     """Jalankan setup"""
     try:
+        from setup import setup_environment
         gpu_available = setup_environment()
         return jsonify({
             'status': 'success',
@@ -326,6 +867,10 @@ def create_report():
         custom_prompt = request.form.get('custom_prompt', '').strip()
         model_id = request.form.get('model_id', '').strip()
         analysis_type = request.form.get('analysis_type', 'general')
+        regenerate = request.form.get('regenerate', '').lower() in ('1', 'true', 'on')
+        profile = profiling.flag_enabled(request.form.get('profile'))
+        fallback_input = request.form.get('fallback_models', '').strip()
+        fallback_models = [m.strip() for m in fallback_input.split(',') if m.strip()] if fallback_input else None
         
         # Validasi input
         if transcript_id <= 0:
@@ -343,8 +888,6 @@ def create_report():
         if not transcription:
             return jsonify({'status': 'error', 'message': 'Transkripsi tidak ditemukan'})
         
-        transcription_text = transcription[3]  # Kolom transcription
-        
         # Cek API key
         api_key = db.get_api_key('openrouter')
         if not api_key:
@@ -352,40 +895,114 @@ def create_report():
         
         ai_reporter.set_api_key(api_key)
         
-        # Generate laporan berdasarkan tipe
-        if report_type == 'summary':
-            report_content = ai_reporter.generate_summary(transcription_text, model_id)
-            report_title = f"Ringkasan - {transcription[2]}"
-            report_db_type = 'summary'
-        elif report_type == 'analysis':
-            report_content = ai_reporter.generate_analysis(transcription_text, analysis_type, model_id)
-            report_title = f"Analisis - {transcription[2]}"
-            report_db_type = 'analysis'
-        elif report_type == 'custom':
-            if not custom_prompt:
-                return jsonify({'status': 'error', 'message': 'Prompt kustom tidak boleh kosong!'})
-            report_content = ai_reporter.generate_custom_report(transcription_text, custom_prompt, model_id)
-            report_title = f"Laporan Kustom - {transcription[2]}"
-            report_db_type = 'custom'
-        else:
+        if report_type not in ('summary', 'analysis', 'custom'):
             return jsonify({'status': 'error', 'message': 'Tipe laporan tidak valid'})
         
-        # Validasi hasil
-        if not report_content or len(report_content.strip()) == 0:
-            return jsonify({'status': 'error', 'message': 'Gagal menghasilkan laporan - hasil kosong'})
+        if report_type == 'custom' and not custom_prompt:
+            return jsonify({'status': 'error', 'message': 'Prompt kustom tidak boleh kosong!'})
         
-        # Simpan laporan ke database
-        report_id = db.save_ai_report(transcript_id, report_title, report_content, report_db_type)
+        # Generate dan simpan laporan (hasil di-cache kecuali diminta generate ulang)
+        profile_job_id = f"{transcript_id}-{int(time.time() * 1000)}"
+        with profiling.job_profile('report', profile_job_id, enabled=profile) as profile_session:
+            outcome = create_report_for_transcription(
+                transcript_id, report_type, model_id,
+                analysis_type=analysis_type,
+                custom_prompt=custom_prompt,
+                regenerate=regenerate,
+                fallback_models=fallback_models
+            )
+        report_id = outcome['report_id']
+        from_cache = outcome['cached']
+        message = 'Laporan berhasil dibuat!' + (' (dari cache)' if from_cache else '')
+        if outcome['model_id'] != model_id:
+            message += f" (dijawab model cadangan {outcome['model_id']})"
         
-        return jsonify({
+        response = {
             'status': 'success', 
-            'message': 'Laporan berhasil dibuat!',
-            'report_id': report_id
-        })
+            'message': message,
+            'report_id': report_id,
+            'cached': from_cache,
+            'model_id': outcome['model_id']
+        }
+        if profile_session:
+            response['profile'] = profile_session.name
+            response['profile_url'] = url_for('admin_profiles')
+        return jsonify(response)
+        
+    except Exception as e:
+        return jsonify({'status': 'error', 'message': f'Error: {str(e)}'})
+
+@app.route('/batch-reports', methods=['POST'])
+def create_batch_reports():
+    """Generate laporan untuk banyak transkripsi (ID atau rentang tanggal)"""
+    try:
+        data = request.get_json(silent=True) or request.form.to_dict()
+        
+        transcription_ids = data.get('transcription_ids') or []
+        if isinstance(transcription_ids, str):
+            transcription_ids = [i for i in transcription_ids.split(',') if i.strip()]
+        
+        ids = resolve_transcription_ids(transcription_ids, data.get('date_from'), data.get('date_to'))
+        if not ids:
+            return jsonify({'status': 'error', 'message': 'Tidak ada transkripsi yang dipilih'})
+        
+        report_type = (data.get('report_type') or '').strip()
+        if report_type not in ('summary', 'analysis', 'custom'):
+            return jsonify({'status': 'error', 'message': 'Tipe laporan tidak valid'})
+        
+        custom_prompt = (data.get('custom_prompt') or '').strip()
+        if report_type == 'custom' and not custom_prompt:
+            return jsonify({'status': 'error', 'message': 'Prompt kustom tidak boleh kosong!'})
+        
+        api_key = db.get_api_key('openrouter')
+        if not api_key:
+            return jsonify({'status': 'error', 'message': 'API key belum diatur. Silakan atur di halaman AI Settings.'})
+        ai_reporter.set_api_key(api_key)
+        
+        fallback_models = data.get('fallback_models')
+        if isinstance(fallback_models, str):
+            fallback_models = [m.strip() for m in fallback_models.split(',') if m.strip()] or None
+        
+        report_spec = {
+            'report_type': report_type,
+            'model_id': (data.get('model_id') or '').strip() or 'mistralai/mistral-7b-instruct:free',
+            'analysis_type': data.get('analysis_type', 'general'),
+            'custom_prompt': custom_prompt,
+            'regenerate': str(data.get('regenerate', '')).lower() in ('1', 'true', 'on'),
+            'fallback_models': fallback_models
+        }
+        
+        try:
+            concurrency = int(data.get('concurrency', 2))
+            requests_per_minute = int(data.get('requests_per_minute', 20))
+        except (TypeError, ValueError):
+            return jsonify({'status': 'error', 'message': 'Concurrency dan request per menit harus berupa angka!'})
+        if concurrency < 1 or requests_per_minute < 1:
+            return jsonify({'status': 'error', 'message': 'Concurrency dan request per menit minimal 1!'})
+        
+        job_id = start_batch_job(
+            ids, report_spec,
+            concurrency=min(concurrency, WEB_MAX_CONCURRENCY),
+            requests_per_minute=min(requests_per_minute, WEB_MAX_REQUESTS_PER_MINUTE),
+            profile=profiling.flag_enabled(data.get('profile'))
+        )
         
+        return jsonify({
+            'status': 'success',
+            'message': f'Batch laporan dimulai untuk {len(ids)} transkripsi',
+            'job_id': job_id,
+            'total': len(ids)
+        })
     except Exception as e:
         return jsonify({'status': 'error', 'message': f'Error: {str(e)}'})
 
+@app.route('/batch-reports/<job_id>')
+def batch_report_status(job_id):
+    """Status dan ringkasan batch laporan"""
+    if job_id in batch_jobs:
+        return jsonify(batch_jobs[job_id])
+    return jsonify({'status': 'not_found', 'message': 'Job tidak ditemukan'})
+
 @app.route('/reports')
 def view_reports():
     """Lihat semua laporan"""
@@ -411,170 +1028,6 @@ def view_report(report_id):
 
 
 
-def format_report_content_for_document(content: str) -> Tuple[str, str]:
-    """
-    Memformat konten laporan untuk dokumen DOCX/PDF dengan menangani markdown dan komponen khusus.
-    
-    Args:
-        content (str): Konten laporan mentah
-        
-    Returns:
-        Tuple[str, str]: Tuple berisi (formatted_content, html_content) untuk keperluan berbeda
-    """
-    
-    # Normalisasi line endings
-    content = content.replace('\r\n', '\n').replace('\r', '\n')
-    
-    # Simpan bagian think terlebih dahulu
-    think_sections = []
-    
-    def extract_think_section(match):
-        think_content = match.group(1).strip()
-        think_sections.append(think_content)
-        return f"<<<THINK_PLACEHOLDER_{len(think_sections)-1}>>>"
-    
-    # Ekstrak semua bagian <think>
-    content = re.sub(r'<think>(.*?)</think>', extract_think_section, content, flags=re.DOTALL)
-    
-    # Bersihkan karakter yang tidak diinginkan tapi pertahankan struktur
-    content = re.sub(r'[^\S\n]+$', '', content, flags=re.MULTILINE)  # hapus spasi di akhir baris
-    content = re.sub(r'\n{3,}', '\n\n', content)  # maksimal 2 baris kosong berturut-turut
-    
-    # Konversi heading markdown ke format yang konsisten
-    # H1
-    content = re.sub(r'^#\s+(.+)', r'# \1', content, flags=re.MULTILINE)
-    # H2
-    content = re.sub(r'^##\s+(.+)', r'## \1', content, flags=re.MULTILINE)
-    # H3
-    content = re.sub(r'^###\s+(.+)', r'### \1', content, flags=re.MULTILINE)
-    # H4
-    content = re.sub(r'^####\s+(.+)', r'#### \1', content, flags=re.MULTILINE)
-    # H5
-    content = re.sub(r'^#####\s+(.+)', r'##### \1', content, flags=re.MULTILINE)
-    # H6
-    content = re.sub(r'^######\s+(.+)', r'###### \1', content, flags=re.MULTILINE)
-    
-    # Konversi bold dan italic
-    content = re.sub(r'\*\*(.*?)\*\*', r'**\1**', content)  # bold
-    content = re.sub(r'\*(.*?)\*', r'*\1*', content)        # italic
-    
-    # Konversi list
-    content = re.sub(r'^\s*-\s+(.+)', r'- \1', content, flags=re.MULTILINE)  # unordered list
-    content = re.sub(r'^\s*\d+\.\s+(.+)', r'1. \1', content, flags=re.MULTILINE)  # ordered list
-    
-    # Persiapkan versi HTML untuk dokumen yang mendukung HTML
-    html_content = content
-    
-    # Konversi untuk HTML (jika diperlukan)
-    # Heading
-    html_content = re.sub(r'^######\s+(.+)', r'<h6>\1</h6>', html_content, flags=re.MULTILINE)
-    html_content = re.sub(r'^#####\s+(.+)', r'<h5>\1</h5>', html_content, flags=re.MULTILINE)
-    html_content = re.sub(r'^####\s+(.+)', r'<h4>\1</h4>', html_content, flags=re.MULTILINE)
-    html_content = re.sub(r'^###\s+(.+)', r'<h3>\1</h3>', html_content, flags=re.MULTILINE)
-    html_content = re.sub(r'^##\s+(.+)', r'<h2>\1</h2>', html_content, flags=re.MULTILINE)
-    html_content = re.sub(r'^#\s+(.+)', r'<h1>\1</h1>', html_content, flags=re.MULTILINE)
-    
-    # Bold dan italic
-    html_content = re.sub(r'\*\*(.*?)\*\*', r'<strong>\1</strong>', html_content)
-    html_content = re.sub(r'\*(.*?)\*', r'<em>\1</em>', html_content)
-    
-    # List
-    html_content = re.sub(r'^-\s+(.+)', r'<li>\1</li>', html_content, flags=re.MULTILINE)
-    html_content = re.sub(r'(<li>.*?</li>\s*)+', r'<ul>\n\g<0></ul>\n', html_content, flags=re.DOTALL)
-    
-    html_content = re.sub(r'^\d+\.\s+(.+)', r'<li>\1</li>', html_content, flags=re.MULTILINE)
-    html_content = re.sub(r'(<li>.*?</li>\s*)+', r'<ol>\n\g<0></ol>\n', html_content, flags=re.DOTALL)
-    
-    # Masukkan kembali bagian think dengan format yang sesuai
-    for i, think_content in enumerate(think_sections):
-        # Format untuk konten teks biasa
-        think_placeholder = f"<<<THINK_PLACEHOLDER_{i}>>>"
-        formatted_think = f"\n[Proses Berpikir]\n{think_content}\n"
-        content = content.replace(think_placeholder, formatted_think)
-        
-        # Format untuk HTML
-        html_think = f'<div class="think-box"><h3>💭 Proses Berpikir</h3><p>{html.escape(think_content)}</p></div>'
-        html_content = html_content.replace(think_placeholder, html_think)
-    
-    # Pastikan ada baris baru di akhir
-    if not content.endswith('\n'):
-        content += '\n'
-    
-    if not html_content.endswith('\n'):
-        html_content += '\n'
-    
-    return content, html_content
-
-def clean_for_docx(content: str) -> str:
-    """
-    Membersihkan konten untuk format DOCX.
-    
-    Args:
-        content (str): Konten yang akan dibersihkan
-        
-    Returns:
-        str: Konten yang telah dibersihkan untuk DOCX
-    """
-    # Gunakan fungsi format utama
-    plain_content, _ = format_report_content_for_document(content)
-    
-    # Tambahkan pembersihan khusus untuk DOCX
-    # Ganti karakter yang bermasalah di DOCX
-    replacements = {
-        '\u2013': '-',  # en dash
-        '\u2014': '-',  # em dash
-        '\u2018': "'",  # left single quotation mark
-        '\u2019': "'",  # right single quotation mark
-        '\u201c': '"',  # left double quotation mark
-        '\u201d': '"',  # right double quotation mark
-        '\u2026': '...', # horizontal ellipsis
-    }
-    
-    for unicode_char, replacement in replacements.items():
-        plain_content = plain_content.replace(unicode_char, replacement)
-    
-    # Hapus karakter kontrol yang tidak diizinkan di XML/DOCX
-    # Izinkan hanya karakter yang valid dalam XML
-    cleaned_content = ""
-    for char in plain_content:
-        if ord(char) == 0x09 or ord(char) == 0x0A or ord(char) == 0x0D or \
-           (0x20 <= ord(char) <= 0xD7FF) or \
-           (0xE000 <= ord(char) <= 0xFFFD) or \
-           (0x10000 <= ord(char) <= 0x10FFFF):
-            cleaned_content += char
-        else:
-            # Ganti karakter tidak valid dengan spasi
-            cleaned_content += ' '
-    
-    return cleaned_content.strip()
-
-def clean_for_pdf(content: str) -> str:
-    """
-    Membersihkan konten untuk format PDF.
-    
-    Args:
-        content (str): Konten yang akan dibersihkan
-        
-    Returns:
-        str: Konten yang telah dibersihkan untuk PDF
-    """
-    # Gunakan fungsi format utama
-    plain_content, _ = format_report_content_for_document(content)
-    
-    # Untuk PDF, kita bisa mempertahankan lebih banyak karakter Unicode
-    # Tapi tetap perlu membersihkan karakter kontrol
-    cleaned_content = ""
-    for char in plain_content:
-        if ord(char) >= 32 or char in '\n\r\t':
-            cleaned_content += char
-        else:
-            # Ganti karakter kontrol dengan spasi
-            cleaned_content += ' '
-    
-    return cleaned_content.strip()
-
-# Contoh penggunaan dalam fungsi download_report
-# app.py (fungsi download_report yang dimodifikasi)
 @app.route('/download-report/<int:report_id>/<format>')
 def download_report(report_id, format):
     """Download laporan dalam format DOCX atau PDF"""
@@ -588,22 +1041,32 @@ def download_report(report_id, format):
         report_content = report[3]  # report_content original
         
         if format == 'docx':
-            filename = f"{report_title.replace(' ', '_')}.docx"
-            filepath = os.path.join(app.config['REPORTS_FOLDER'], filename)
-            # Bersihkan dan format konten untuk DOCX menggunakan mdformat
-            cleaned_content = clean_for_docx(report_content)
-            ai_reporter.create_docx_report(report_title, cleaned_content, filepath)
+            def render(output_path):
+                # Bersihkan karakter lalu parse markdown sekali menjadi blok dokumen
+                blocks = parse_report(sanitize_for_docx(report_content))
+                ai_reporter.create_docx_report(report_title, blocks, output_path)
         elif format == 'pdf':
-            filename = f"{report_title.replace(' ', '_')}.pdf"
-            filepath = os.path.join(app.config['REPORTS_FOLDER'], filename)
-            # Bersihkan dan format konten untuk PDF menggunakan mdformat
-            cleaned_content = clean_for_pdf(report_content)
-            ai_reporter.create_pdf_report(report_title, cleaned_content, filepath)
+            def render(output_path):
+                # Bersihkan karakter lalu parse markdown sekali menjadi blok dokumen
+                blocks = parse_report(sanitize_for_pdf(report_content))
+                ai_reporter.create_pdf_report(report_title, blocks, output_path)
         else:
             flash('Format tidak didukung')
             return redirect(url_for('view_report', report_id=report_id))
         
-        return send_file(filepath, as_attachment=True)
+        # Render hanya jika (laporan, format, isi) belum pernah dirender
+        digest = content_hash(report_title, report_content, DOCUMENT_RENDER_VERSION)
+        filepath = report_artifacts.get_or_render('reports', report_id, format, digest, render)
+        
+        download_name = f"{secure_filename(report_title) or f'laporan_{report_id}'}.{format}"
+        return send_file(
+            filepath,
+            as_attachment=True,
+            download_name=download_name,
+            etag=f"{digest}-{format}",
+            conditional=True,
+            max_age=0
+        )
         
     except Exception as e:
         flash(f'Error download: {str(e)}')
@@ -652,7 +1115,8 @@ def test_model():
         start_time = time.time()
         
         # Test dengan prompt sederhana
-        response = openai.ChatCompletion.create(
+        result = llm_client.chat_completion(
+            api_key=api_key,
             model=model_id,
             messages=[
                 {"role": "user", "content": test_prompt}
@@ -664,8 +1128,6 @@ def test_model():
         end_time = time.time()
         response_time = int((end_time - start_time) * 1000)  # in milliseconds
         
-        result = response.choices[0].message.content.strip()
-        
         return jsonify({
             'status': 'success',
             'message': 'Model berhasil diuji!',
@@ -701,4 +1163,5 @@ def get_models():
         })
 
 if __name__ == '__main__':
+    start_background_services()
     app.run(debug=True, host='0.0.0.0', port=5000)
\ No newline at end of file
@@ -0,0 +1,157 @@
+# artifact_store.py
+import hashlib
+import logging
+import os
+import threading
+import time
+import uuid
+
+logger = logging.getLogger(__name__)
+
+
+def content_hash(*parts):
+    """Hash SHA-256 (16 karakter hex) dari beberapa bagian teks"""
+    digest = hashlib.sha256()
+    for part in parts:
+        digest.update(str(part).encode('utf-8'))
+        digest.update(b'\0')
+    return digest.hexdigest()[:16]
+
+
+class ArtifactStore:
+    """
+    Penyimpanan file hasil render (DOCX/PDF/...) berbasis isi.
+
+    File disimpan di <root>/<namespace>/<item_id>/<hash>.<format> sehingga render yang sama
+    cukup dikerjakan sekali. Versi lama dengan hash berbeda dihapus saat isi berubah, dan
+    file yang paling lama tidak dipakai dihapus jika total ukuran melebihi max_bytes.
+    """
+
+    def __init__(self, root, max_bytes=500 * 1024 * 1024):
+        self.root = root
+        self.max_bytes = max_bytes
+        self._locks = {}
+        self._locks_lock = threading.Lock()
+        os.makedirs(self.root, exist_ok=True)
+
+    def _lock_for(self, key):
+        with self._locks_lock:
+            if key not in self._locks:
+                self._locks[key] = threading.Lock()
+            return self._locks[key]
+
+    def _item_dir(self, namespace, item_id):
+        return os.path.join(self.root, namespace, str(item_id))
+
+    def artifact_path(self, namespace, item_id, fmt, digest):
+        return os.path.join(self._item_dir(namespace, item_id), f"{digest}.{fmt}")
+
+    def get_or_render(self, namespace, item_id, fmt, digest, render):
+        """
+        Return path artefak; panggil render(output_path) hanya jika belum ada.
+
+        Args:
+            namespace (str): Kelompok artefak, misal "reports"
+            item_id: ID item (laporan/transkripsi)
+            fmt (str): Ekstensi format, misal "docx"
+            digest (str): Hash isi + parameter render
+            render (callable): render(output_path) yang menulis file
+        """
+        path = self.artifact_path(namespace, item_id, fmt, digest)
+        if os.path.exists(path):
+            self._touch(path)
+            return path
+
+        with self._lock_for((namespace, str(item_id), fmt)):
+            # Cek lagi: request lain mungkin sudah selesai render
+            if os.path.exists(path):
+                self._touch(path)
+                return path
+
+            item_dir = self._item_dir(namespace, item_id)
+            os.makedirs(item_dir, exist_ok=True)
+            self._remove_stale(item_dir, fmt, keep=os.path.basename(path))
+
+            tmp_path = f"{path}.tmp-{uuid.uuid4().hex}"
+            try:
+                render(tmp_path)
+                os.replace(tmp_path, path)
+            finally:
+                if os.path.exists(tmp_path):
+                    os.remove(tmp_path)
+            logger.info(f"Artefak dirender: {namespace}/{item_id}/{os.path.basename(path)}")
+
+        self.evict()
+        return path
+
+    def _touch(self, path):
+        """Tandai artefak baru dipakai lewat atime (urutan LRU); mtime tetap untuk Last-Modified"""
+        try:
+            os.utime(path, (time.time(), os.stat(path).st_mtime))
+        except OSError:
+            pass
+
+    def _remove_stale(self, item_dir, fmt, keep):
+        """Hapus versi lama format yang sama (isi item sudah berubah)"""
+        for name in os.listdir(item_dir):
+            if name != keep and name.endswith(f".{fmt}"):
+                try:
+                    os.remove(os.path.join(item_dir, name))
+                except OSError:
+                    pass
+
+    def invalidate(self, namespace, item_id):
+        """Hapus semua artefak sebuah item (termasuk sub-varian di bawahnya)"""
+        item_dir = self._item_dir(namespace, item_id)
+        if not os.path.isdir(item_dir):
+            return 0
+        removed = 0
+        for dirpath, dirnames, filenames in os.walk(item_dir, topdown=False):
+            for name in filenames:
+                try:
+                    os.remove(os.path.join(dirpath, name))
+                    removed += 1
+                except OSError:
+                    pass
+            try:
+                os.rmdir(dirpath)
+            except OSError:
+                pass
+        return removed
+
+    def _list_artifacts(self):
+        artifacts = []
+        for dirpath, _, filenames in os.walk(self.root):
+            for name in filenames:
+                if '.tmp-' in name:
+                    continue
+                path = os.path.join(dirpath, name)
+                try:
+                    stat = os.stat(path)
+                except OSError:
+                    continue
+                artifacts.append((stat.st_atime, stat.st_size, path))
+        return artifacts
+
+    def total_size(self):
+        return sum(size for _, size, _ in self._list_artifacts())
+
+    def evict(self):
+        """Hapus artefak yang paling lama tidak dipakai hingga total <= max_bytes"""
+        artifacts = self._list_artifacts()
+        total = sum(size for _, size, _ in artifacts)
+        if total <= self.max_bytes:
+            return 0
+
+        evicted = 0
+        for _, size, path in sorted(artifacts):
+            if total <= self.max_bytes:
+                break
+            try:
+                os.remove(path)
+                total -= size
+                evicted += 1
+            except OSError:
+                pass
+        logger.info(f"Evicted {evicted} artefak dari {self.root}")
+        return evicted
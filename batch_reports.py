@@ -0,0 +1,267 @@
+# batch_reports.py
+import argparse
+import json
+import logging
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from database import db
+from ai_reporter import ai_reporter
+import metrics
+import profiling
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_MODEL_ID = 'mistralai/mistral-7b-instruct:free'
+
+REPORT_TITLE_PREFIXES = {
+    'summary': 'Ringkasan',
+    'analysis': 'Analisis',
+    'custom': 'Laporan Kustom'
+}
+
+# Status job batch yang dijalankan dari web
+batch_jobs = {}
+# Batas parameter batch dari web (CLI tidak dibatasi): jumlah worker dan request LLM per menit
+WEB_MAX_CONCURRENCY = 8
+WEB_MAX_REQUESTS_PER_MINUTE = 120
+
+
+class RateLimiter:
+    """Batasi jumlah request per menit (jarak minimum antar request, thread-safe)"""
+
+    def __init__(self, requests_per_minute):
+        self.interval = 60.0 / requests_per_minute if requests_per_minute > 0 else 0
+        self.next_slot = 0
+        self.lock = threading.Lock()
+
+    def acquire(self):
+        if not self.interval:
+            return
+        with self.lock:
+            now = time.time()
+            wait_time = max(0, self.next_slot - now)
+            self.next_slot = max(now, self.next_slot) + self.interval
+        if wait_time > 0:
+            time.sleep(wait_time)
+
+
+def build_report_title(report_type, original_file):
+    """Judul laporan sesuai tipe, misal 'Ringkasan - rapat.mp3'"""
+    return f"{REPORT_TITLE_PREFIXES[report_type]} - {original_file}"
+
+
+def create_report_for_transcription(transcription_id, report_type, model_id=DEFAULT_MODEL_ID,
+                                    analysis_type='general', custom_prompt='', regenerate=False,
+                                    fallback_models=None):
+    """
+    Generate dan simpan laporan AI untuk satu transkripsi.
+
+    Returns:
+        dict: report_id, report_title, cached (True jika diambil dari cache) dan model_id
+              (model yang benar-benar menjawab, bisa model cadangan)
+    """
+    if report_type not in REPORT_TITLE_PREFIXES:
+        raise Exception('Tipe laporan tidak valid')
+    if report_type == 'custom' and not custom_prompt:
+        raise Exception('Prompt kustom tidak boleh kosong!')
+
+    transcription = db.get_transcription(transcription_id)
+    if not transcription:
+        raise Exception('Transkripsi tidak ditemukan')
+
+    with metrics.span('report_generation', report_type=report_type):
+        report_content, from_cache, used_model = ai_reporter.generate_report(
+            transcription[3], report_type, model_id or DEFAULT_MODEL_ID,
+            analysis_type=analysis_type,
+            custom_prompt=custom_prompt,
+            regenerate=regenerate,
+            fallback_models=fallback_models
+        )
+
+    if not report_content or len(report_content.strip()) == 0:
+        raise Exception('Gagal menghasilkan laporan - hasil kosong')
+
+    report_title = build_report_title(report_type, transcription[2])
+    report_id = db.save_ai_report(transcription_id, report_title, report_content, report_type)
+    return {'report_id': report_id, 'report_title': report_title, 'cached': from_cache, 'model_id': used_model}
+
+
+def resolve_transcription_ids(transcription_ids=None, date_from=None, date_to=None):
+    """Gabungkan daftar ID eksplisit dan ID dari rentang tanggal (YYYY-MM-DD)"""
+    ids = [int(i) for i in (transcription_ids or [])]
+    # Field tanggal kosong dari form berarti tanpa batas, bukan tanggal ''
+    date_from = (date_from or '').strip() or None
+    date_to = (date_to or '').strip() or None
+    if date_from or date_to:
+        ids.extend(db.get_transcription_ids_between(date_from, date_to))
+    # Hapus duplikat, pertahankan urutan
+    return list(dict.fromkeys(ids))
+
+
+def summarize_latencies(latencies):
+    """Statistik latensi (detik): min, rata-rata, p50, p95, maks"""
+    if not latencies:
+        return {}
+    ordered = sorted(latencies)
+
+    def percentile(p):
+        return ordered[min(len(ordered) - 1, int(round(p * (len(ordered) - 1))))]
+
+    return {
+        'min': round(ordered[0], 2),
+        'avg': round(sum(ordered) / len(ordered), 2),
+        'p50': round(percentile(0.5), 2),
+        'p95': round(percentile(0.95), 2),
+        'max': round(ordered[-1], 2)
+    }
+
+
+def run_batch(transcription_ids, report_spec, concurrency=2, requests_per_minute=20, progress_callback=None):
+    """
+    Jalankan generate laporan untuk banyak transkripsi secara paralel dengan rate limit.
+
+    Args:
+        transcription_ids (list): ID transkripsi
+        report_spec (dict): report_type, model_id, analysis_type, custom_prompt, regenerate, fallback_models
+        concurrency (int): Jumlah generate yang berjalan bersamaan
+        requests_per_minute (int): Batas request ke LLM per menit (0 = tanpa batas)
+        progress_callback (callable): progress_callback(completed, total, result)
+
+    Returns:
+        dict: Ringkasan sukses, gagal dan latensi
+    """
+    limiter = RateLimiter(requests_per_minute)
+    total = len(transcription_ids)
+    results = []
+    batch_start = time.time()
+    # Worker pool ikut di-sample jika batch dijalankan dengan profiler
+    profile_session = profiling.current_session()
+
+    def process(transcription_id):
+        limiter.acquire()
+        start_time = time.time()
+        try:
+            with profiling.attached(profile_session):
+                outcome = create_report_for_transcription(transcription_id, **report_spec)
+            return {
+                'transcription_id': transcription_id,
+                'status': 'success',
+                'report_id': outcome['report_id'],
+                'cached': outcome['cached'],
+                'latency': time.time() - start_time
+            }
+        except Exception as e:
+            logger.error(f"Batch report gagal untuk transkripsi {transcription_id}: {e}")
+            return {
+                'transcription_id': transcription_id,
+                'status': 'failed',
+                'error': str(e),
+                'latency': time.time() - start_time
+            }
+
+    with ThreadPoolExecutor(max_workers=max(1, concurrency)) as executor:
+        futures = [executor.submit(process, transcription_id) for transcription_id in transcription_ids]
+        for future in as_completed(futures):
+            result = future.result()
+            results.append(result)
+            if progress_callback:
+                progress_callback(len(results), total, result)
+
+    succeeded = [r for r in results if r['status'] == 'success']
+    failed = [r for r in results if r['status'] == 'failed']
+    results.sort(key=lambda r: transcription_ids.index(r['transcription_id']))
+
+    return {
+        'total': total,
+        'succeeded': len(succeeded),
+        'failed': len(failed),
+        'cached': sum(1 for r in succeeded if r.get('cached')),
+        'total_time': round(time.time() - batch_start, 2),
+        'latency': summarize_latencies([r['latency'] for r in succeeded if not r.get('cached')]),
+        'results': results
+    }
+
+
+def start_batch_job(transcription_ids, report_spec, concurrency=2, requests_per_minute=20, profile=False):
+    """Jalankan batch di background thread (opsional dengan profiler); return job_id untuk cek status"""
+    job_id = str(int(time.time() * 1000))
+    batch_jobs[job_id] = {
+        'status': 'processing',
+        'completed': 0,
+        'total': len(transcription_ids),
+        'summary': None
+    }
+
+    def progress_callback(completed, total, result):
+        batch_jobs[job_id]['completed'] = completed
+
+    def worker():
+        try:
+            with profiling.job_profile('batch', job_id, enabled=profile):
+                summary = run_batch(transcription_ids, report_spec, concurrency,
+                                    requests_per_minute, progress_callback)
+            batch_jobs[job_id]['summary'] = summary
+            batch_jobs[job_id]['status'] = 'completed'
+        except Exception as e:
+            batch_jobs[job_id]['status'] = 'failed'
+            batch_jobs[job_id]['message'] = str(e)
+
+    thread = threading.Thread(target=worker, daemon=True)
+    thread.start()
+    return job_id
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Generate laporan AI untuk banyak transkripsi')
+    parser.add_argument('--ids', help='ID transkripsi, dipisah koma (misal 1,2,3)')
+    parser.add_argument('--from', dest='date_from', help='Tanggal awal (YYYY-MM-DD)')
+    parser.add_argument('--to', dest='date_to', help='Tanggal akhir (YYYY-MM-DD)')
+    parser.add_argument('--type', dest='report_type', choices=sorted(REPORT_TITLE_PREFIXES), default='summary')
+    parser.add_argument('--model', dest='model_id', default=DEFAULT_MODEL_ID)
+    parser.add_argument('--analysis-type', default='general', choices=['general', 'sentiment', 'keypoints'])
+    parser.add_argument('--prompt', dest='custom_prompt', default='', help='Prompt untuk tipe custom')
+    parser.add_argument('--fallback', help='Model cadangan, dipisah koma')
+    parser.add_argument('--regenerate', action='store_true', help='Abaikan cache laporan')
+    parser.add_argument('--concurrency', type=int, default=2)
+    parser.add_argument('--rpm', type=int, default=20, help='Batas request per menit (0 = tanpa batas)')
+    parser.add_argument('--json', action='store_true', help='Cetak ringkasan sebagai JSON')
+    args = parser.parse_args()
+
+    ids = resolve_transcription_ids(
+        args.ids.split(',') if args.ids else None, args.date_from, args.date_to
+    )
+    if not ids:
+        parser.error('Tidak ada transkripsi yang cocok (gunakan --ids atau --from/--to)')
+
+    report_spec = {
+        'report_type': args.report_type,
+        'model_id': args.model_id,
+        'analysis_type': args.analysis_type,
+        'custom_prompt': args.custom_prompt,
+        'regenerate': args.regenerate,
+        'fallback_models': [m.strip() for m in args.fallback.split(',') if m.strip()] if args.fallback else None
+    }
+
+    def progress_callback(completed, total, result):
+        icon = '✅' if result['status'] == 'success' else '❌'
+        detail = f"laporan #{result['report_id']}" if result['status'] == 'success' else result['error']
+        print(f"{icon} [{completed}/{total}] Transkripsi #{result['transcription_id']}: "
+              f"{detail} ({result['latency']:.1f}s)")
+
+    print(f"🚀 Memulai batch {args.report_type} untuk {len(ids)} transkripsi...")
+    summary = run_batch(ids, report_spec, args.concurrency, args.rpm, progress_callback)
+
+    if args.json:
+        print(json.dumps(summary, indent=2))
+    else:
+        print(f"\n📊 Selesai dalam {summary['total_time']}s: {summary['succeeded']} sukses "
+              f"({summary['cached']} dari cache), {summary['failed']} gagal")
+        if summary['latency']:
+            latency = summary['latency']
+            print(f"⏱️  Latensi: min {latency['min']}s | rata-rata {latency['avg']}s | "
+                  f"p95 {latency['p95']}s | maks {latency['max']}s")
+
+
+if __name__ == '__main__':
+    main()
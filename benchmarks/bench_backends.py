@@ -0,0 +1,147 @@
+# benchmarks/bench_backends.py
+# Bandingkan engine inferensi (whisper fp32/fp16, whisper-int8, faster-whisper) pada audio
+# yang sama: waktu load model, RTF inferensi dan word error rate terhadap teks referensi.
+#
+#   python benchmarks/bench_backends.py [--backends whisper,whisper-int8,faster-whisper]
+#       [--model base] [--audio rekaman.wav --reference rekaman.txt] [--json hasil.json]
+#
+# Tanpa --audio dipakai fixture TTS dari bench_transcriber (espeak-ng/espeak) dengan
+# TTS_TEXT sebagai referensi.
+import argparse
+import json
+import os
+import re
+import subprocess
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from transcriber import AudioTranscriber, SAMPLE_RATE
+from inference_backends import BACKENDS, get_backend
+from bench_transcriber import FIXTURES_DIR, TTS_TEXT, TTS_WORDS_PER_MINUTE, find_tts
+
+
+def normalize_words(text):
+    """Huruf kecil tanpa tanda baca, dipisah per kata"""
+    return re.sub(r"[^\w\s]", ' ', text.lower()).split()
+
+
+def word_error_rate(reference, hypothesis):
+    """WER = (substitusi + hapus + sisip) / jumlah kata referensi (jarak Levenshtein per kata)"""
+    ref = normalize_words(reference)
+    hyp = normalize_words(hypothesis)
+    if not ref:
+        return 0.0 if not hyp else 1.0
+    previous = list(range(len(hyp) + 1))
+    for i, ref_word in enumerate(ref, 1):
+        current = [i] + [0] * len(hyp)
+        for j, hyp_word in enumerate(hyp, 1):
+            current[j] = min(previous[j] + 1, current[j - 1] + 1,
+                             previous[j - 1] + (ref_word != hyp_word))
+        previous = current
+    return previous[-1] / len(ref)
+
+
+def make_reference_fixture():
+    """Satu kali TTS_TEXT lewat TTS (tanpa dipotong), sehingga referensinya persis TTS_TEXT"""
+    program = find_tts()
+    if not program:
+        raise Exception("espeak-ng/espeak tidak tersedia; gunakan --audio dan --reference")
+    os.makedirs(FIXTURES_DIR, exist_ok=True)
+    path = os.path.join(FIXTURES_DIR, 'reference_tts.wav')
+    if not os.path.exists(path):
+        raw_path = path + '.raw.wav'
+        subprocess.run([program, '-v', 'id', '-s', str(TTS_WORDS_PER_MINUTE), '-w', raw_path, TTS_TEXT],
+                       check=True, capture_output=True)
+        try:
+            subprocess.run(['ffmpeg', '-nostdin', '-loglevel', 'error', '-y', '-i', raw_path,
+                            '-ar', str(SAMPLE_RATE), '-ac', '1', path], check=True, capture_output=True)
+        finally:
+            os.remove(raw_path)
+    return path, TTS_TEXT
+
+
+def bench_backend(name, model_size, audio_path, reference, duration, repeat):
+    transcriber = AudioTranscriber()
+    transcriber.backend = get_backend(name)
+    if model_size:
+        transcriber._model_size = model_size
+
+    start = time.perf_counter()
+    model = transcriber.load_model()
+    load_seconds = time.perf_counter() - start
+
+    # Inferensi pertama sering lebih lambat (alokasi, JIT); ambil yang terbaik
+    best = None
+    text = ''
+    for _ in range(repeat):
+        start = time.perf_counter()
+        text, _ = transcriber.transcribe_audio(model, audio_path)
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+
+    return {
+        'backend': name,
+        'model_size': transcriber.model_size,
+        'load_seconds': round(load_seconds, 3),
+        'inference_seconds': round(best, 3),
+        'rtf': round(best / duration, 4) if duration else None,
+        'wer': round(word_error_rate(reference, text), 4),
+        'text': text.strip()
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark kecepatan dan WER engine inferensi')
+    parser.add_argument('--backends', default=','.join(BACKENDS), help=f"Daftar engine: {', '.join(BACKENDS)}")
+    parser.add_argument('--model', help='Ukuran model Whisper (default: sama seperti aplikasi)')
+    parser.add_argument('--audio', help='File audio uji (default: fixture TTS)')
+    parser.add_argument('--reference', help='File teks referensi untuk --audio')
+    parser.add_argument('--repeat', type=int, default=2)
+    parser.add_argument('--json', help='Simpan hasil ke file JSON')
+    args = parser.parse_args()
+
+    if args.audio:
+        if not args.reference:
+            parser.error('--reference wajib diisi bersama --audio')
+        audio_path = args.audio
+        with open(args.reference, encoding='utf-8') as f:
+            reference = f.read()
+    else:
+        audio_path, reference = make_reference_fixture()
+
+    duration = AudioTranscriber().get_audio_duration(audio_path)
+    print(f"🎧 {os.path.basename(audio_path)} ({duration or 0:.1f} detik, {len(normalize_words(reference))} kata referensi)")
+
+    results = []
+    for name in [name.strip() for name in args.backends.split(',') if name.strip()]:
+        backend = get_backend(name)
+        if not backend.available():
+            print(f"⚠️  {name}: library tidak terpasang, dilewati")
+            continue
+        try:
+            result = bench_backend(name, args.model, audio_path, reference, duration, args.repeat)
+        except Exception as e:
+            print(f"❌ {name}: {e}")
+            continue
+        results.append(result)
+        print(f"⏱️  {name:15} load {result['load_seconds']:7.2f} s | inferensi {result['inference_seconds']:7.2f} s "
+              f"| RTF {result['rtf']} | WER {result['wer']:.1%}")
+
+    if results:
+        baseline = results[0]
+        print(f"\n📊 Dibandingkan dengan {baseline['backend']}:")
+        for result in results[1:]:
+            speedup = baseline['inference_seconds'] / result['inference_seconds'] if result['inference_seconds'] else 0
+            print(f"   {result['backend']:15} {speedup:5.2f}x lebih cepat, WER {result['wer'] - baseline['wer']:+.1%}")
+
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump({'audio': audio_path, 'audio_seconds': duration, 'results': results}, f, indent=2)
+        print(f"💾 Hasil disimpan ke {args.json}")
+
+
+if __name__ == '__main__':
+    main()
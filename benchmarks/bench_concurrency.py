@@ -0,0 +1,122 @@
+# benchmarks/bench_concurrency.py
+# Throughput transkripsi pada 1, 2, 4 dan 8 job bersamaan, dengan pembagian core
+# (cpu_resources: slot + torch/OpenMP threads per job) dan tanpa (semua job memakai
+# semua core, perilaku lama).
+#
+#   python benchmarks/bench_concurrency.py [--jobs 1,2,4,8] [--mode both|managed|unmanaged]
+#       [--model base] [--duration 60] [--affinity] [--json hasil.json]
+#
+# Model diambil lewat AudioTranscriber.load_model seperti di aplikasi: dengan pembagian
+# core setiap slot CPU punya instance model sendiri; tanpa pembagian semua job berbagi satu
+# instance yang inferensinya diserialkan (hook kv-cache Whisper tidak aman dipakai bersamaan).
+import argparse
+import json
+import os
+import sys
+import threading
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from transcriber import AudioTranscriber
+from cpu_resources import CpuResources, available_cores
+from bench_transcriber import make_fixture
+
+
+def run_jobs(transcriber, audio_path, jobs, resources=None):
+    """Jalankan `jobs` transkripsi bersamaan; return detik wall-clock dan detik per job"""
+    durations = [None] * jobs
+    errors = []
+    barrier = threading.Barrier(jobs)
+
+    def worker(index):
+        try:
+            barrier.wait()
+            start = time.perf_counter()
+            if resources is not None:
+                with resources.slot(f"bench-{index}"):
+                    transcriber.transcribe_audio(transcriber.load_model(), audio_path)
+            else:
+                transcriber.transcribe_audio(transcriber.load_model(), audio_path)
+            durations[index] = time.perf_counter() - start
+        except Exception as e:
+            errors.append(e)
+
+    threads = [threading.Thread(target=worker, args=(index,)) for index in range(jobs)]
+    start = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    wall = time.perf_counter() - start
+    if errors:
+        raise errors[0]
+    return wall, durations
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark throughput job transkripsi bersamaan')
+    parser.add_argument('--jobs', default='1,2,4,8', help='Jumlah job bersamaan yang diuji')
+    parser.add_argument('--mode', default='both', choices=('both', 'managed', 'unmanaged'))
+    parser.add_argument('--model', help='Ukuran model Whisper (default: sama seperti aplikasi)')
+    parser.add_argument('--fixture', default='speechlike', help='Fixture dari bench_transcriber')
+    parser.add_argument('--duration', type=float, default=60, help='Durasi fixture (detik)')
+    parser.add_argument('--affinity', action='store_true', help='Kunci thread job ke core slotnya')
+    parser.add_argument('--json', help='Simpan hasil ke file JSON')
+    args = parser.parse_args()
+
+    counts = [int(count) for count in args.jobs.split(',') if count.strip()]
+    modes = ('unmanaged', 'managed') if args.mode == 'both' else (args.mode,)
+    cores = available_cores()
+
+    audio_path = make_fixture(args.fixture, args.duration)
+    if not audio_path:
+        raise Exception(f"Fixture {args.fixture} tidak bisa dibuat")
+
+    import torch
+
+    transcriber = AudioTranscriber()
+    if args.model:
+        transcriber._model_size = args.model
+    device = transcriber.device
+    print(f"🖥️  {len(cores)} core, model {transcriber.model_size} ({transcriber.backend.name}, {device})")
+
+    # Pemanasan agar load model dan alokasi awal tidak ikut terukur
+    transcriber.transcribe_audio(transcriber.load_model(), audio_path)
+
+    results = []
+    for mode in modes:
+        for jobs in counts:
+            resources = None
+            if mode == 'managed':
+                resources = CpuResources(concurrency=jobs, affinity=args.affinity, cores=cores)
+                transcriber.cpu_resources = resources
+                print(f"📥 Memuat instance model untuk {len(resources.slots)} slot...")
+                for index in range(len(resources.slots)):
+                    transcriber.load_model(instance=index)
+            else:
+                torch.set_num_threads(len(cores))
+            wall, durations = run_jobs(transcriber, audio_path, jobs, resources)
+            result = {
+                'mode': mode,
+                'jobs': jobs,
+                'threads_per_job': resources.cores_per_job if resources else len(cores),
+                'wall_seconds': round(wall, 3),
+                'mean_job_seconds': round(sum(durations) / jobs, 3),
+                # Detik audio yang selesai per detik wall-clock
+                'throughput': round(jobs * args.duration / wall, 3)
+            }
+            results.append(result)
+            print(f"⏱️  {mode:9} {jobs} job x {result['threads_per_job']:2} thread | wall {wall:7.2f} s "
+                  f"| rata-rata job {result['mean_job_seconds']:7.2f} s | {result['throughput']:.2f} detik audio/detik")
+
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump({'cores': len(cores), 'model_size': transcriber.model_size,
+                       'audio_seconds': args.duration, 'results': results}, f, indent=2)
+        print(f"💾 Hasil disimpan ke {args.json}")
+
+
+if __name__ == '__main__':
+    main()
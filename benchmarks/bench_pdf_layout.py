@@ -0,0 +1,132 @@
+# benchmarks/bench_pdf_layout.py
+# Bandingkan renderer PDF lama (potong per 80 karakter, satu cell per potongan,
+# font inti latin-1) dengan pdf_layout (wrap per kata dari lebar glyph TTF).
+# Jumlah halaman turun sekitar 40%; waktu render dengan TTF ter-embed sedikit lebih lama
+# (parsing dan subsetting font), hanya lebih cepat jika jatuh ke font inti.
+#
+#   python benchmarks/bench_pdf_layout.py [--sections 60] [--repeat 3]
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from fpdf import FPDF
+from report_formatter import parse_report, plain_text
+from pdf_layout import PDFLayout, find_fonts
+
+
+def legacy_write_text(pdf, text):
+    """Salinan AIReporter._pdf_write_text lama"""
+    for line in text.split('\n'):
+        clean_line = line.encode('latin-1', 'replace').decode('latin-1')
+        while len(clean_line) > 80:
+            pdf.cell(0, 10, clean_line[:80], ln=True)
+            clean_line = clean_line[80:]
+        pdf.cell(0, 10, clean_line, ln=True)
+
+
+def legacy_render(title, blocks, output_path):
+    """Salinan AIReporter.create_pdf_report lama"""
+    pdf = FPDF()
+    pdf.add_page()
+    pdf.set_auto_page_break(auto=True, margin=15)
+    pdf.set_font('Helvetica', 'B', 16)
+    pdf.cell(0, 10, title.encode('latin-1', 'replace').decode('latin-1'), ln=True, align='C')
+    pdf.ln(10)
+    pdf.set_font('Helvetica', '', 10)
+    pdf.cell(0, 10, 'Dibuat pada: -', ln=True)
+    pdf.ln(10)
+    for block in blocks:
+        text = plain_text(block.runs)
+        if block.kind == 'heading':
+            pdf.set_font('Helvetica', 'B', max(12, 18 - 2 * block.level))
+        elif block.kind == 'code':
+            pdf.set_font('Courier', '', 10)
+        else:
+            pdf.set_font('Helvetica', '', 12)
+        if block.kind == 'bullet':
+            text = '  ' * block.level + '- ' + text
+        elif block.kind == 'numbered':
+            text = '  ' * block.level + f'{block.number}. ' + text
+        elif block.kind == 'quote':
+            text = '| ' + text
+        elif block.kind == 'rule':
+            text = '-' * 40
+        legacy_write_text(pdf, text)
+    pdf.output(output_path)
+    return pdf.pages_count
+
+
+def layout_render(title, blocks, output_path):
+    layout = PDFLayout()
+    layout.render(title, blocks)
+    layout.output(output_path)
+    return layout.pdf.pages_count
+
+
+def build_report(sections, seed=11):
+    """Laporan markdown sintetis: heading, paragraf panjang, list dan kutipan"""
+    rng = random.Random(seed)
+    words = ['rapat', 'anggaran', 'keputusan', 'tindak', 'lanjut', 'peserta', 'membahas',
+             'evaluasi', 'program', 'café', '“kutipan”', 'target', 'kuartal', 'pelaksanaan',
+             'dokumentasi', 'koordinasi', 'tim', 'dan', 'yang']
+    # Penekanan inline sesekali, seperti keluaran LLM pada umumnya
+    emphasis = ['**penting**', '*catatan*', '`kode`']
+
+    def word():
+        return rng.choice(emphasis) if rng.random() < 0.03 else rng.choice(words)
+
+    def sentence(count):
+        return ' '.join(word() for _ in range(count)).capitalize() + '.'
+
+    lines = []
+    for section in range(1, sections + 1):
+        lines.append(f"## {section}. {sentence(4)}")
+        for _ in range(3):
+            lines.append(' '.join(sentence(rng.randint(12, 25)) for _ in range(4)))
+            lines.append('')
+        for item in range(1, 5):
+            lines.append(f"- **{sentence(2)[:-1]}:** {sentence(rng.randint(8, 30))}")
+            lines.append(f"  - {sentence(rng.randint(5, 15))}")
+        for item in range(1, 4):
+            lines.append(f"{item}. {sentence(rng.randint(10, 20))}")
+        lines.append(f"> {sentence(20)}")
+        lines.append('---')
+    return '\n'.join(lines)
+
+
+def timed(render, title, blocks, repeat):
+    best = float('inf')
+    pages = 0
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'report.pdf')
+        for _ in range(repeat):
+            start = time.perf_counter()
+            pages = render(title, blocks, path)
+            best = min(best, time.perf_counter() - start)
+        size = os.path.getsize(path)
+    return best, pages, size
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark layout PDF laporan')
+    parser.add_argument('--sections', type=int, default=60)
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args()
+
+    blocks = parse_report(build_report(args.sections))
+    fonts = find_fonts()
+    print(f"📄 {len(blocks)} blok | font TTF: {fonts.get(('sans', ''), 'tidak ada (font inti)')}")
+
+    title = 'Laporan Benchmark'
+    for name, render in (('lama', legacy_render), ('pdf_layout', layout_render)):
+        elapsed, pages, size = timed(render, title, blocks, args.repeat)
+        print(f"⏱️  {name:10}: {elapsed * 1000:8.1f} ms | {pages:4d} halaman | {size / 1024:7.1f} KB")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,108 @@
+# benchmarks/bench_report_formatter.py
+# Bandingkan parser markdown satu-pass (report_formatter.parse_report) dengan
+# rangkaian re.sub lama pada laporan sintetis ~100 KB.
+#
+#   python benchmarks/bench_report_formatter.py [--size-kb 100] [--repeat 20]
+import argparse
+import os
+import random
+import re
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from report_formatter import parse_report
+
+
+def legacy_format(content):
+    """Salinan format_report_content_for_document lama (tanpa bagian HTML yang tidak dipakai)"""
+    content = content.replace('\r\n', '\n').replace('\r', '\n')
+    think_sections = []
+
+    def extract_think_section(match):
+        think_sections.append(match.group(1).strip())
+        return f"<<<THINK_PLACEHOLDER_{len(think_sections)-1}>>>"
+
+    content = re.sub(r'<think>(.*?)</think>', extract_think_section, content, flags=re.DOTALL)
+    content = re.sub(r'[^\S\n]+$', '', content, flags=re.MULTILINE)
+    content = re.sub(r'\n{3,}', '\n\n', content)
+    for i in range(1, 7):
+        content = re.sub(r'^' + '#' * i + r'\s+(.+)', '#' * i + r' \1', content, flags=re.MULTILINE)
+    content = re.sub(r'\*\*(.*?)\*\*', r'**\1**', content)
+    content = re.sub(r'\*(.*?)\*', r'*\1*', content)
+    content = re.sub(r'^\s*-\s+(.+)', r'- \1', content, flags=re.MULTILINE)
+    content = re.sub(r'^\s*\d+\.\s+(.+)', r'1. \1', content, flags=re.MULTILINE)
+
+    html_content = content
+    for i in range(6, 0, -1):
+        html_content = re.sub(r'^' + '#' * i + r'\s+(.+)', f'<h{i}>\\1</h{i}>', html_content, flags=re.MULTILINE)
+    html_content = re.sub(r'\*\*(.*?)\*\*', r'<strong>\1</strong>', html_content)
+    html_content = re.sub(r'\*(.*?)\*', r'<em>\1</em>', html_content)
+    html_content = re.sub(r'^-\s+(.+)', r'<li>\1</li>', html_content, flags=re.MULTILINE)
+    html_content = re.sub(r'(<li>.*?</li>\s*)+', r'<ul>\n\g<0></ul>\n', html_content, flags=re.DOTALL)
+    html_content = re.sub(r'^\d+\.\s+(.+)', r'<li>\1</li>', html_content, flags=re.MULTILINE)
+    html_content = re.sub(r'(<li>.*?</li>\s*)+', r'<ol>\n\g<0></ol>\n', html_content, flags=re.DOTALL)
+
+    for i, think_content in enumerate(think_sections):
+        content = content.replace(f"<<<THINK_PLACEHOLDER_{i}>>>", f"\n[Proses Berpikir]\n{think_content}\n")
+    return content, html_content
+
+
+def build_report(size_kb, seed=42):
+    """Buat laporan markdown sintetis yang mirip keluaran LLM"""
+    rng = random.Random(seed)
+    words = ('rapat anggaran keputusan tindak lanjut proyek tim jadwal risiko '
+             'pelanggan laporan evaluasi target kuartal strategi').split()
+
+    def sentence(n):
+        picked = [rng.choice(words) for _ in range(n)]
+        if rng.random() < 0.3:
+            picked[0] = f"**{picked[0]}**"
+        if rng.random() < 0.2:
+            picked[-1] = f"*{picked[-1]}*"
+        return ' '.join(picked).capitalize() + '.'
+
+    parts = ['<think>\n' + sentence(30) + '\n</think>\n']
+    section = 1
+    while sum(len(p) for p in parts) < size_kb * 1024:
+        parts.append(f"## {section}. {sentence(4)}\n")
+        parts.append(sentence(40) + '\n')
+        for i in range(rng.randint(2, 6)):
+            parts.append(f"- {sentence(10)}\n")
+        for i in range(rng.randint(1, 4)):
+            parts.append(f"{i + 1}. {sentence(8)}\n")
+        parts.append('\n')
+        section += 1
+    return ''.join(parts)
+
+
+def timed(func, content, repeat):
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func(content)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark parser laporan markdown')
+    parser.add_argument('--size-kb', type=int, default=100)
+    parser.add_argument('--repeat', type=int, default=20)
+    args = parser.parse_args()
+
+    content = build_report(args.size_kb)
+    print(f"📄 Laporan sintetis: {len(content) / 1024:.1f} KB, {content.count(chr(10))} baris")
+
+    legacy = timed(legacy_format, content, args.repeat)
+    # Alur lama: download_report dan create_docx_report masing-masing memformat ulang
+    print(f"⏱️  re.sub lama      : {legacy * 1000:8.2f} ms per format (x2 per download = {legacy * 2000:.2f} ms)")
+
+    single = timed(parse_report, content, args.repeat)
+    print(f"⏱️  parse_report     : {single * 1000:8.2f} ms per download")
+    print(f"🚀 Speedup per download: {legacy * 2 / single:.1f}x ({len(parse_report(content))} blok)")
+
+
+if __name__ == '__main__':
+    main()
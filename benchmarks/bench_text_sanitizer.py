@@ -0,0 +1,92 @@
+# benchmarks/bench_text_sanitizer.py
+# Bandingkan text_sanitizer (regex terkompilasi, satu kali jalan) dengan loop
+# per karakter lama (cleaned_content += char) pada input beberapa MB.
+#
+#   python benchmarks/bench_text_sanitizer.py [--size-mb 4] [--repeat 3]
+import argparse
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from text_sanitizer import DOCX_REPLACEMENTS, sanitize_for_docx, sanitize_for_pdf
+
+
+def legacy_clean_for_docx(content):
+    """Salinan clean_for_docx lama dari app.py"""
+    content = content.replace('\r\n', '\n').replace('\r', '\n')
+    for unicode_char, replacement in DOCX_REPLACEMENTS.items():
+        content = content.replace(unicode_char, replacement)
+    cleaned_content = ""
+    for char in content:
+        if ord(char) == 0x09 or ord(char) == 0x0A or ord(char) == 0x0D or \
+           (0x20 <= ord(char) <= 0xD7FF) or \
+           (0xE000 <= ord(char) <= 0xFFFD) or \
+           (0x10000 <= ord(char) <= 0x10FFFF):
+            cleaned_content += char
+        else:
+            cleaned_content += ' '
+    return cleaned_content.strip()
+
+
+def legacy_clean_for_pdf(content):
+    """Salinan clean_for_pdf lama dari app.py"""
+    content = content.replace('\r\n', '\n').replace('\r', '\n')
+    cleaned_content = ""
+    for char in content:
+        if ord(char) >= 32 or char in '\n\r\t':
+            cleaned_content += char
+        else:
+            cleaned_content += ' '
+    return cleaned_content.strip()
+
+
+def build_input(size_mb, seed=7):
+    """Teks campuran: kata biasa, tanda kutip tipografi, emoji dan karakter kontrol"""
+    rng = random.Random(seed)
+    pieces = ['laporan', 'rapat', 'anggaran', '“kutipan”', 'dia’s', '–', '…',
+              'café', '🎙️', '\x0b', '\x00', '\t', '\n', 'keputusan', 'tindak lanjut']
+    target = size_mb * 1024 * 1024
+    parts = []
+    length = 0
+    while length < target:
+        piece = rng.choice(pieces)
+        parts.append(piece)
+        parts.append(' ')
+        length += len(piece) + 1
+    return ''.join(parts)
+
+
+def timed(func, text, repeat):
+    best = float('inf')
+    result = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func(text)
+        best = min(best, time.perf_counter() - start)
+    return best, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark sanitasi karakter DOCX/PDF')
+    parser.add_argument('--size-mb', type=int, default=4)
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args()
+
+    text = build_input(args.size_mb)
+    print(f"📄 Input: {len(text) / 1024 / 1024:.1f} juta karakter")
+
+    for name, legacy, current in (('DOCX', legacy_clean_for_docx, sanitize_for_docx),
+                                  ('PDF', legacy_clean_for_pdf, sanitize_for_pdf)):
+        legacy_time, legacy_result = timed(legacy, text, args.repeat)
+        current_time, current_result = timed(current, text, args.repeat)
+        status = '✅ identik' if legacy_result == current_result else '❌ hasil berbeda'
+        print(f"⏱️  {name:4}: loop lama {legacy_time * 1000:9.1f} ms | "
+              f"regex {current_time * 1000:7.1f} ms | "
+              f"{legacy_time / current_time:6.1f}x | {status}")
+
+
+if __name__ == '__main__':
+    main()
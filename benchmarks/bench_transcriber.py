@@ -0,0 +1,300 @@
+# benchmarks/bench_transcriber.py
+# Benchmark pipeline AudioTranscriber per tahap (probe, extract, split, load model,
+# inferensi per chunk, cleanup) dengan fixture audio/video sintetis dari ffmpeg.
+# Hasil disimpan sebagai JSON dan bisa dibandingkan dengan baseline.
+#
+#   python benchmarks/bench_transcriber.py [--fixtures tone,noise,speech,video] [--duration 120]
+#       [--model base] [--no-model] [--baseline benchmarks/baseline.json] [--save-baseline]
+import argparse
+import hashlib
+import json
+import os
+import platform
+import shutil
+import statistics
+import subprocess
+import sys
+import time
+from datetime import datetime
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from transcriber import AudioTranscriber, SAMPLE_RATE
+from scratch import scratch_space
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+FIXTURES_DIR = os.path.join(BENCH_DIR, 'fixtures')
+RESULTS_DIR = os.path.join(BENCH_DIR, 'results')
+DEFAULT_BASELINE = os.path.join(BENCH_DIR, 'baseline.json')
+
+# Kalimat untuk TTS offline (espeak-ng/espeak) jika tersedia
+TTS_TEXT = ("Selamat pagi, rapat hari ini membahas anggaran kuartal ketiga dan rencana "
+            "pelaksanaan program. Setiap tim diminta menyiapkan laporan evaluasi sebelum hari Jumat. ")
+TTS_WORDS_PER_MINUTE = 150
+
+# Semua fixture deterministik: parameter tetap dan seed noise tetap
+FIXTURES = {
+    'tone': {
+        'ext': 'wav',
+        'args': ['-f', 'lavfi', '-i', 'sine=frequency=440:sample_rate={rate}:duration={duration}']
+    },
+    'noise': {
+        'ext': 'wav',
+        'args': ['-f', 'lavfi', '-i', 'anoisesrc=color=pink:seed=42:amplitude=0.3:sample_rate={rate}:duration={duration}']
+    },
+    'silence': {
+        'ext': 'wav',
+        'args': ['-f', 'lavfi', '-i', 'anullsrc=r={rate}:cl=mono', '-t', '{duration}']
+    },
+    # Nada dengan vibrato dan modulasi amplitudo ~4 Hz (kira-kira laju suku kata)
+    'speechlike': {
+        'ext': 'mp3',
+        'args': ['-f', 'lavfi', '-i',
+                 "aevalsrc='0.4*sin(2*PI*(180+40*sin(2*PI*3*t))*t)*(0.5+0.5*sin(2*PI*4*t))':s={rate}:d={duration}"]
+    },
+    'video': {
+        'ext': 'mp4',
+        'args': ['-f', 'lavfi', '-i', 'testsrc=size=320x240:rate=15:duration={duration}',
+                 '-f', 'lavfi', '-i', 'sine=frequency=300:sample_rate=44100:duration={duration}',
+                 '-c:v', 'mpeg4', '-c:a', 'aac', '-shortest']
+    },
+    'speech': {'ext': 'wav', 'tts': True}
+}
+DEFAULT_FIXTURES = 'tone,noise,silence,speechlike,speech,video'
+
+
+def find_tts():
+    """Program TTS offline yang tersedia (espeak-ng atau espeak), atau None"""
+    for program in ('espeak-ng', 'espeak'):
+        if shutil.which(program):
+            return program
+    return None
+
+
+def fixture_path(name, duration):
+    spec = FIXTURES[name]
+    key = hashlib.sha256(json.dumps([name, duration, spec], sort_keys=True).encode()).hexdigest()[:10]
+    return os.path.join(FIXTURES_DIR, f"{name}_{int(duration)}s_{key}.{spec['ext']}")
+
+
+def make_fixture(name, duration):
+    """Buat fixture (sekali, lalu dipakai ulang dari benchmarks/fixtures); return path atau None"""
+    os.makedirs(FIXTURES_DIR, exist_ok=True)
+    path = fixture_path(name, duration)
+    if os.path.exists(path):
+        return path
+
+    spec = FIXTURES[name]
+    if spec.get('tts'):
+        program = find_tts()
+        if not program:
+            print(f"⚠️  Fixture '{name}' dilewati: espeak-ng/espeak tidak tersedia")
+            return None
+        repeats = max(1, int(duration * TTS_WORDS_PER_MINUTE / 60 / len(TTS_TEXT.split())) + 1)
+        raw_path = path + '.raw.wav'
+        subprocess.run([program, '-v', 'id', '-s', str(TTS_WORDS_PER_MINUTE), '-w', raw_path, TTS_TEXT * repeats],
+                       check=True, capture_output=True)
+        command = ['ffmpeg', '-nostdin', '-loglevel', 'error', '-y', '-i', raw_path,
+                   '-t', str(duration), '-ar', str(SAMPLE_RATE), '-ac', '1', path]
+        try:
+            subprocess.run(command, check=True, capture_output=True)
+        finally:
+            os.remove(raw_path)
+        return path
+
+    args = [arg.format(rate=SAMPLE_RATE, duration=duration) for arg in spec['args']]
+    subprocess.run(['ffmpeg', '-nostdin', '-loglevel', 'error', '-y', *args, path], check=True, capture_output=True)
+    return path
+
+
+class StageTimer:
+    """Catat durasi per tahap (detik); tahap berulang (inferensi per chunk) disimpan sebagai list"""
+
+    def __init__(self):
+        self.stages = {}
+        self.per_chunk = []
+
+    def time(self, stage, func, *args, **kwargs):
+        start = time.perf_counter()
+        result = func(*args, **kwargs)
+        self.stages[stage] = self.stages.get(stage, 0.0) + time.perf_counter() - start
+        return result
+
+
+def run_inference(transcriber, timer, model, chunks):
+    """Inferensi per chunk; chunks berisi (path atau array, waktu mulai)"""
+    words = 0
+    for audio, chunk_start in chunks:
+        start = time.perf_counter()
+        text, _ = transcriber.transcribe_audio(model, audio, chunk_start)
+        timer.per_chunk.append(time.perf_counter() - start)
+        words += len(text.split())
+    timer.stages['inference'] = sum(timer.per_chunk)
+    return words
+
+
+def bench_audio(transcriber, path, chunk_seconds, use_model):
+    """Jalur file audio: probe -> split ke scratch -> model -> inferensi per chunk -> cleanup"""
+    timer = StageTimer()
+    duration = timer.time('probe', transcriber.get_audio_duration, path)
+
+    job = scratch_space.job('benchmark')
+    scratch_dir = job.__enter__()
+    try:
+        chunks = timer.time('split', transcriber.split_audio_to_chunks, path, scratch_dir, chunk_seconds)
+        words = 0
+        if use_model:
+            model = timer.time('model_load', transcriber.load_model)
+            words = run_inference(transcriber, timer, model, chunks)
+    finally:
+        timer.time('cleanup', job.__exit__, None, None, None)
+    return timer, duration, len(chunks), words
+
+
+def bench_video(transcriber, path, chunk_seconds, use_model):
+    """Jalur video: probe stream -> decode PCM lewat pipe (extract) -> model -> inferensi per window"""
+    timer = StageTimer()
+    streams, duration = timer.time('probe', transcriber.probe_audio_streams, path)
+    stream = transcriber.select_audio_stream(streams)
+    if stream is None:
+        raise Exception(f"Fixture video tanpa stream audio: {path}")
+
+    def extract():
+        process = subprocess.Popen(transcriber.decode_command(path, audio_stream=stream['index']),
+                                   stdout=subprocess.PIPE, stderr=subprocess.DEVNULL)
+        try:
+            return [(audio, start) for start, audio in transcriber.iter_pcm_windows(process.stdout, chunk_seconds)]
+        finally:
+            process.stdout.close()
+            process.wait()
+
+    windows = timer.time('extract', extract)
+    words = 0
+    if use_model:
+        model = timer.time('model_load', transcriber.load_model)
+        words = run_inference(transcriber, timer, model, windows)
+    return timer, duration, len(windows), words
+
+
+def bench_fixture(transcriber, name, path, chunk_seconds, use_model, nominal_duration):
+    bench = bench_video if FIXTURES[name]['ext'] == 'mp4' else bench_audio
+    timer, duration, chunks, words = bench(transcriber, path, chunk_seconds, use_model)
+    duration = duration or nominal_duration
+
+    # RTF = waktu proses / durasi audio (< 1 berarti lebih cepat dari real-time);
+    # load model dilaporkan terpisah karena hanya terjadi sekali per proses
+    processing = sum(seconds for stage, seconds in timer.stages.items() if stage != 'model_load')
+    result = {
+        'fixture': name,
+        'audio_seconds': duration,
+        'chunks': chunks,
+        'words': words,
+        'stages': {stage: round(seconds, 4) for stage, seconds in timer.stages.items()},
+        'rtf': round(processing / duration, 4) if duration else None,
+        'rtf_with_load': round((processing + timer.stages.get('model_load', 0.0)) / duration, 4) if duration else None
+    }
+    if timer.per_chunk:
+        result['chunk_seconds'] = {
+            'mean': round(statistics.mean(timer.per_chunk), 4),
+            'max': round(max(timer.per_chunk), 4),
+            'min': round(min(timer.per_chunk), 4)
+        }
+    return result
+
+
+def compare(baseline, current, threshold):
+    """
+    Bandingkan hasil dengan baseline per fixture dan tahap.
+
+    Returns:
+        list: (fixture, tahap, nilai baseline, nilai sekarang) yang lebih lambat dari threshold
+    """
+    previous = {result['fixture']: result for result in baseline.get('results', [])}
+    regressions = []
+    print(f"\n📈 Dibandingkan dengan baseline {baseline.get('created_at', '-')}:")
+    for result in current['results']:
+        old = previous.get(result['fixture'])
+        if not old:
+            continue
+        metrics = dict(result['stages'], rtf=result['rtf'])
+        old_metrics = dict(old['stages'], rtf=old['rtf'])
+        for metric, value in metrics.items():
+            old_value = old_metrics.get(metric)
+            if not old_value or value is None:
+                continue
+            change = (value - old_value) / old_value
+            marker = '🔴' if change > threshold else ('🟢' if change < -threshold else '  ')
+            print(f"   {marker} {result['fixture']:10} {metric:12} {old_value:9.3f} -> {value:9.3f} ({change:+.0%})")
+            if change > threshold:
+                regressions.append((result['fixture'], metric, old_value, value))
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark pipeline transkripsi')
+    parser.add_argument('--fixtures', default=DEFAULT_FIXTURES, help=f"Daftar fixture: {', '.join(FIXTURES)}")
+    parser.add_argument('--duration', type=float, default=120, help='Durasi fixture (detik)')
+    parser.add_argument('--chunk-seconds', type=int, default=60)
+    parser.add_argument('--model', help="Ukuran model Whisper (default: sama seperti aplikasi)")
+    parser.add_argument('--no-model', action='store_true', help='Lewati load model dan inferensi (hanya tahap I/O)')
+    parser.add_argument('--output', help='File JSON hasil (default: benchmarks/results/<waktu>.json)')
+    parser.add_argument('--baseline', help='File JSON baseline untuk dibandingkan')
+    parser.add_argument('--save-baseline', action='store_true', help=f'Simpan hasil sebagai {DEFAULT_BASELINE}')
+    parser.add_argument('--threshold', type=float, default=0.10, help='Batas regresi relatif (0.10 = 10%%)')
+    args = parser.parse_args()
+
+    names = [name.strip() for name in args.fixtures.split(',') if name.strip()]
+    unknown = [name for name in names if name not in FIXTURES]
+    if unknown:
+        parser.error(f"Fixture tidak dikenal: {', '.join(unknown)}")
+
+    transcriber = AudioTranscriber()
+    if args.model:
+        transcriber._model_size = args.model
+    use_model = not args.no_model
+
+    run = {
+        'created_at': datetime.now().isoformat(timespec='seconds'),
+        'host': {'platform': platform.platform(), 'python': platform.python_version(),
+                 'cpu_count': os.cpu_count()},
+        'model_size': transcriber.model_size if use_model else None,
+        'gpu': transcriber.device == 'cuda' if use_model else None,
+        'fixture_seconds': args.duration,
+        'chunk_seconds': args.chunk_seconds,
+        'results': []
+    }
+
+    for name in names:
+        path = make_fixture(name, args.duration)
+        if not path:
+            continue
+        print(f"\n🎧 {name}: {os.path.basename(path)}")
+        result = bench_fixture(transcriber, name, path, args.chunk_seconds, use_model, args.duration)
+        run['results'].append(result)
+        stages = ' | '.join(f"{stage} {seconds * 1000:.0f} ms" for stage, seconds in result['stages'].items())
+        print(f"⏱️  {stages}")
+        print(f"📊 {result['chunks']} chunk, RTF {result['rtf']} (dengan load model {result['rtf_with_load']})")
+
+    output = args.output or os.path.join(RESULTS_DIR, f"{datetime.now().strftime('%Y%m%d_%H%M%S')}.json")
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, 'w', encoding='utf-8') as f:
+        json.dump(run, f, indent=2)
+    print(f"\n💾 Hasil disimpan ke {output}")
+
+    if args.save_baseline:
+        shutil.copyfile(output, DEFAULT_BASELINE)
+        print(f"📌 Baseline diperbarui: {DEFAULT_BASELINE}")
+
+    baseline_path = args.baseline or (DEFAULT_BASELINE if not args.save_baseline and os.path.exists(DEFAULT_BASELINE) else None)
+    if baseline_path:
+        with open(baseline_path, encoding='utf-8') as f:
+            regressions = compare(json.load(f), run, args.threshold)
+        if regressions:
+            print(f"\n❌ {len(regressions)} metrik lebih lambat dari baseline (> {args.threshold:.0%})")
+            sys.exit(1)
+        print("\n✅ Tidak ada regresi terhadap baseline")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,118 @@
+# benchmarks/startup_profile.py
+# Laporan waktu startup: berapa lama `import app` dan modul mana yang paling mahal.
+# Import dijalankan di proses baru dengan folder kerja sementara agar uploads/,
+# transcripts/ dan database tidak dibuat di repo.
+#
+#   python benchmarks/startup_profile.py [--module app] [--top 15] [--repeat 3] [--json hasil.json]
+import argparse
+import json
+import os
+import re
+import subprocess
+import sys
+import tempfile
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Subsistem berat yang seharusnya tidak ikut dimuat oleh worker web
+HEAVY_MODULES = ('torch', 'whisper', 'numpy', 'docx', 'fpdf', 'fontTools', 'lxml', 'setup')
+
+IMPORTTIME_RE = re.compile(r'^import time:\s+(\d+)\s+\|\s+(\d+)\s+\|(\s*)(\S+)')
+
+
+def run_python(code, cwd, extra_args=()):
+    env = dict(os.environ, PYTHONPATH=ROOT + os.pathsep + os.environ.get('PYTHONPATH', ''))
+    return subprocess.run([sys.executable, *extra_args, '-c', code], cwd=cwd, env=env,
+                          capture_output=True, text=True)
+
+
+def wall_time(module, cwd, repeat):
+    """Waktu import terbaik (detik) dari beberapa proses baru"""
+    code = (f"import time; start = time.perf_counter(); import {module}; "
+            f"print(time.perf_counter() - start)")
+    best = None
+    for _ in range(repeat):
+        result = run_python(code, cwd)
+        if result.returncode != 0:
+            raise Exception(f"Gagal import {module}: {result.stderr.strip()[-500:]}")
+        elapsed = float(result.stdout.strip().splitlines()[-1])
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+
+def import_times(module, cwd):
+    """
+    Jalankan `python -X importtime` dan parse hasilnya.
+
+    Returns:
+        list: dict name, self_us, cumulative_us, depth per modul yang diimport
+    """
+    result = run_python(f"import {module}", cwd, extra_args=('-X', 'importtime'))
+    if result.returncode != 0:
+        raise Exception(f"Gagal import {module}: {result.stderr.strip()[-500:]}")
+    entries = []
+    for line in result.stderr.splitlines():
+        match = IMPORTTIME_RE.match(line)
+        if match:
+            entries.append({
+                'name': match.group(4),
+                'self_us': int(match.group(1)),
+                'cumulative_us': int(match.group(2)),
+                'depth': len(match.group(3)) // 2
+            })
+    return entries
+
+
+def summarize(entries, module, top):
+    """Kelompokkan waktu self per package teratas dan cari import langsung termahal dari modul"""
+    packages = {}
+    for entry in entries:
+        package = entry['name'].split('.')[0]
+        packages[package] = packages.get(package, 0) + entry['self_us']
+
+    # Import langsung dari modul yang diprofil berada satu tingkat di bawahnya
+    root = next((entry for entry in entries if entry['name'] == module), None)
+    direct_depth = root['depth'] + 1 if root else 1
+    direct = [entry for entry in entries if entry['depth'] == direct_depth]
+
+    loaded = {entry['name'].split('.')[0] for entry in entries}
+    return {
+        'total_us': root['cumulative_us'] if root else sum(packages.values()),
+        'packages': sorted(packages.items(), key=lambda item: item[1], reverse=True)[:top],
+        'direct_imports': sorted(((entry['name'], entry['cumulative_us']) for entry in direct),
+                                 key=lambda item: item[1], reverse=True)[:top],
+        'heavy_loaded': [name for name in HEAVY_MODULES if name in loaded]
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Profil waktu startup aplikasi')
+    parser.add_argument('--module', default='app')
+    parser.add_argument('--top', type=int, default=15)
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--json', help='Simpan hasil ke file JSON')
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as cwd:
+        elapsed = wall_time(args.module, cwd, args.repeat)
+        summary = summarize(import_times(args.module, cwd), args.module, args.top)
+
+    print(f"🚀 import {args.module}: {elapsed * 1000:.0f} ms (terbaik dari {args.repeat}), "
+          f"importtime {summary['total_us'] / 1000:.0f} ms")
+    print("\n📦 Waktu per package (self):")
+    for name, micros in summary['packages']:
+        print(f"   {name:28} {micros / 1000:8.1f} ms")
+    print(f"\n🔗 Import langsung dari {args.module} (kumulatif):")
+    for name, micros in summary['direct_imports']:
+        print(f"   {name:28} {micros / 1000:8.1f} ms")
+    heavy = ', '.join(summary['heavy_loaded']) or 'tidak ada'
+    print(f"\n🏋️  Subsistem berat yang ikut dimuat: {heavy}")
+
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump({'module': args.module, 'wall_seconds': elapsed, **summary}, f, indent=2)
+        print(f"💾 Hasil disimpan ke {args.json}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,138 @@
+# cpu_resources.py
+import logging
+import os
+import threading
+import time
+from contextlib import contextmanager
+import metrics
+
+logger = logging.getLogger(__name__)
+
+# Jumlah job transkripsi yang boleh berjalan bersamaan (job lain menunggu slot CPU)
+TRANSCRIPTION_CONCURRENCY = int(os.environ.get('TRANSCRIPTION_CONCURRENCY', 2))
+# Core per job; kosong = core yang tersedia dibagi rata ke TRANSCRIPTION_CONCURRENCY slot
+CPU_CORES_PER_JOB = os.environ.get('CPU_CORES_PER_JOB')
+# '1' = kunci thread job ke core slotnya (sched_setaffinity, hanya Linux)
+CPU_AFFINITY = os.environ.get('CPU_AFFINITY', '0') == '1'
+
+
+def available_cores():
+    """Core yang boleh dipakai proses ini (menghormati taskset/cgroup cpuset)"""
+    if hasattr(os, 'sched_getaffinity'):
+        return sorted(os.sched_getaffinity(0))
+    return list(range(os.cpu_count() or 1))
+
+
+class CpuResources:
+    """
+    Pembagian core CPU untuk job transkripsi.
+
+    Core dibagi menjadi slot dengan jumlah core tetap. Job mengambil satu slot sebelum
+    inferensi (menunggu jika semua slot terpakai), lalu thread torch/OpenMP job tersebut
+    dibatasi ke jumlah core slotnya, sehingga beberapa job tidak saling berebut core.
+    """
+
+    def __init__(self, concurrency=TRANSCRIPTION_CONCURRENCY, cores_per_job=CPU_CORES_PER_JOB,
+                 affinity=CPU_AFFINITY, cores=None):
+        cores = cores or available_cores()
+        concurrency = max(1, concurrency)
+        if cores_per_job:
+            cores_per_job = max(1, min(int(cores_per_job), len(cores)))
+        else:
+            cores_per_job = max(1, len(cores) // concurrency)
+        # Jumlah slot dibatasi core yang ada agar tiap slot punya core sendiri
+        slot_count = max(1, min(concurrency, len(cores) // cores_per_job))
+
+        self.cores_per_job = cores_per_job
+        self.affinity = affinity and hasattr(os, 'sched_setaffinity')
+        self.slots = [cores[i * cores_per_job:(i + 1) * cores_per_job] for i in range(slot_count)]
+        self.assignments = {}
+        self._free = list(range(slot_count))
+        self._condition = threading.Condition()
+        self._local = threading.local()
+
+        metrics.CPU_THREADS_PER_JOB.set(cores_per_job)
+        metrics.CPU_SLOTS.set(slot_count)
+
+    def configure_process(self):
+        """
+        Batasi thread pool OpenMP/MKL dan torch sebelum torch dimuat.
+
+        torch diimport lazy, jadi env ini masih berlaku saat dipanggil di awal aplikasi.
+        """
+        for name in ('OMP_NUM_THREADS', 'MKL_NUM_THREADS', 'OPENBLAS_NUM_THREADS'):
+            os.environ.setdefault(name, str(self.cores_per_job))
+        logger.info(f"🧮 {len(self.slots)} slot CPU x {self.cores_per_job} core per job")
+
+    def _configure_thread(self, cores):
+        """Terapkan budget core ke thread job ini (affinity dan thread intra-op torch)"""
+        if self.affinity:
+            try:
+                os.sched_setaffinity(0, cores)
+            except OSError as e:
+                logger.warning(f"Gagal mengatur CPU affinity: {e}")
+        try:
+            import torch
+        except ImportError:
+            return
+        torch.set_num_threads(len(cores))
+        try:
+            # Hanya bisa diatur sekali sebelum ada kerja paralel; inferensi per job cukup 1 thread inter-op
+            torch.set_num_interop_threads(1)
+        except RuntimeError:
+            pass
+
+    def _restore_thread(self):
+        if self.affinity:
+            try:
+                os.sched_setaffinity(0, available_cores())
+            except OSError:
+                pass
+
+    def current(self):
+        """Slot yang sedang dipegang thread ini: dict slot, cores, atau None"""
+        return getattr(self._local, 'assignment', None)
+
+    @contextmanager
+    def slot(self, job_id):
+        """Pegang satu slot CPU selama blok berjalan; reentrant untuk thread yang sama"""
+        if self.current() is not None:
+            yield self.current()
+            return
+
+        wait_start = time.perf_counter()
+        with self._condition:
+            while not self._free:
+                self._condition.wait()
+            index = self._free.pop(0)
+        metrics.record_span('cpu_wait', time.perf_counter() - wait_start, wait_start)
+
+        assignment = {'slot': index, 'cores': self.slots[index]}
+        self.assignments[job_id] = assignment
+        self._local.assignment = assignment
+        metrics.CPU_SLOT_JOBS.set(1, slot=index)
+        try:
+            self._configure_thread(assignment['cores'])
+            yield assignment
+        finally:
+            self._local.assignment = None
+            self.assignments.pop(job_id, None)
+            self._restore_thread()
+            metrics.CPU_SLOT_JOBS.set(0, slot=index)
+            with self._condition:
+                self._free.append(index)
+                self._free.sort()
+                self._condition.notify()
+
+    def status(self):
+        """Ringkasan pembagian core untuk endpoint status"""
+        in_use = {assignment['slot']: job_id for job_id, assignment in list(self.assignments.items())}
+        return {
+            'cores_per_job': self.cores_per_job,
+            'affinity': self.affinity,
+            'slots': [{'slot': index, 'cores': cores, 'job_id': in_use.get(index)}
+                      for index, cores in enumerate(self.slots)]
+        }
+
+
+cpu_resources = CpuResources()
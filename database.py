@@ -1,11 +1,32 @@
 import sqlite3
+import threading
+import json
 from datetime import datetime
 import os
+from text_compression import compress_text, decompress_text
+
+# Kolom transkripsi yang dikembalikan getter; teks selalu di posisi 3 (sudah didekompres)
+TRANSCRIPTION_COLUMNS = '''id, filename, original_file, transcription, duration, word_count, created_at, status,
+                           transcription_blob, compression, media_file, media_status, language'''
+# Kolom skalar tabel transcription_stats (urutan sama dengan INSERT dan dict hasil getter)
+STATS_COLUMNS = ('duration', 'word_count', 'segment_count', 'speech_seconds', 'speaking_rate', 'silence_ratio',
+                 'avg_logprob', 'no_speech_prob', 'confidence')
 
 class TranscriptionDB:
     def __init__(self, db_path="transcriptions.db"):
         self.db_path = db_path
-        self.init_db()
+        # Schema dibuat saat koneksi pertama, bukan saat modul diimport
+        self._schema_ready = False
+        self._schema_lock = threading.Lock()
+    
+    def _connect(self):
+        """Buka koneksi; jalankan init_db sekali sebelum koneksi pertama"""
+        if not self._schema_ready:
+            with self._schema_lock:
+                if not self._schema_ready:
+                    self.init_db()
+                    self._schema_ready = True
+        return sqlite3.connect(self.db_path)
     
     def init_db(self):
         """Inisialisasi database"""
@@ -26,6 +47,15 @@ class TranscriptionDB:
             )
         ''')
         
+        # Penyimpanan transkripsi terkompresi dan status file media sumber
+        self._ensure_columns(cursor, 'transcriptions', {
+            'transcription_blob': 'BLOB',
+            'compression': 'TEXT',
+            'media_file': 'TEXT',
+            'media_status': "TEXT DEFAULT 'kept'",
+            'language': 'TEXT'
+        })
+        
         # Tabel API keys
         cursor.execute('''
             CREATE TABLE IF NOT EXISTS api_keys (
@@ -59,19 +89,126 @@ class TranscriptionDB:
             )
         ''')
         
+        # Statistik latensi per model (untuk ranking fallback chain); terpisah dari user_models
+        # agar model cadangan yang dipanggil otomatis tidak muncul di daftar model user
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS model_latency (
+                model_id TEXT PRIMARY KEY,
+                avg_latency_ms REAL,
+                latency_samples INTEGER DEFAULT 0,
+                failure_count INTEGER DEFAULT 0
+            )
+        ''')
+        
+        # Tabel cache hasil laporan AI (key = hash transkripsi + prompt + model + parameter)
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS report_cache (
+                cache_key TEXT PRIMARY KEY,
+                report_type TEXT,
+                model_id TEXT,
+                report_content TEXT NOT NULL,
+                content_size INTEGER NOT NULL,
+                hit_count INTEGER DEFAULT 0,
+                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                last_used TIMESTAMP DEFAULT (strftime('%Y-%m-%d %H:%M:%f', 'now'))
+            )
+        ''')
+        
+        # Tabel segmen transkripsi (timestamp per kalimat dari Whisper)
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS transcript_segments (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                transcription_id INTEGER NOT NULL,
+                segment_index INTEGER NOT NULL,
+                start_time REAL NOT NULL,
+                end_time REAL NOT NULL,
+                text TEXT NOT NULL,
+                FOREIGN KEY (transcription_id) REFERENCES transcriptions (id)
+            )
+        ''')
+        cursor.execute('''
+            CREATE INDEX IF NOT EXISTS idx_transcript_segments_transcription
+            ON transcript_segments (transcription_id, segment_index)
+        ''')
+        
+        # Tabel performa job transkripsi (sumber estimasi ETA per model dan host)
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS job_performance (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                model_size TEXT NOT NULL,
+                host TEXT NOT NULL,
+                device TEXT,
+                chunk_count INTEGER,
+                audio_seconds REAL NOT NULL,
+                processing_seconds REAL NOT NULL,
+                inference_seconds REAL,
+                rtf REAL NOT NULL,
+                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+            )
+        ''')
+        self._ensure_columns(cursor, 'job_performance', {
+            'backend': "TEXT DEFAULT 'whisper'"
+        })
+        cursor.execute('''
+            CREATE INDEX IF NOT EXISTS idx_job_performance_model_host
+            ON job_performance (model_size, host, id)
+        ''')
+        
+        # Tabel statistik transkripsi (satu baris per transkripsi, tanpa teks; chunks berisi
+        # JSON [mulai, selesai, kata, detik bicara, avg_logprob, no_speech_prob] per chunk)
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS transcription_stats (
+                transcription_id INTEGER PRIMARY KEY,
+                duration REAL,
+                word_count INTEGER NOT NULL,
+                segment_count INTEGER,
+                speech_seconds REAL,
+                speaking_rate REAL,
+                silence_ratio REAL,
+                avg_logprob REAL,
+                no_speech_prob REAL,
+                confidence REAL,
+                chunks TEXT,
+                FOREIGN KEY (transcription_id) REFERENCES transcriptions (id)
+            )
+        ''')
+        
         conn.commit()
         conn.close()
     
-    def add_transcription(self, filename, original_file, transcription, duration=None, word_count=None):
-        """Tambah transkripsi ke database"""
-        conn = sqlite3.connect(self.db_path)
+    def _ensure_columns(self, cursor, table, columns):
+        """Tambahkan kolom yang belum ada pada tabel lama (migrasi ringan)"""
+        cursor.execute(f'PRAGMA table_info({table})')
+        existing = {row[1] for row in cursor.fetchall()}
+        for column, column_type in columns.items():
+            if column not in existing:
+                cursor.execute(f'ALTER TABLE {table} ADD COLUMN {column} {column_type}')
+    
+    def _row_with_text(self, row):
+        """
+        Ubah baris TRANSCRIPTION_COLUMNS menjadi tuple transkripsi dengan teks terdekompresi.
+        
+        Urutan: id, filename, original_file, transcription, duration, word_count, created_at,
+        status, media_file, media_status, language
+        """
+        if row is None:
+            return None
+        text = row[3] if row[8] is None else decompress_text(row[8], row[9])
+        return row[:3] + (text,) + row[4:8] + row[10:13]
+    
+    def add_transcription(self, filename, original_file, transcription, duration=None, word_count=None,
+                          language=None):
+        """Tambah transkripsi ke database (teks disimpan terkompresi)"""
+        conn = self._connect()
         cursor = conn.cursor()
         
+        blob, codec = compress_text(transcription)
         cursor.execute('''
             INSERT INTO transcriptions 
-            (filename, original_file, transcription, duration, word_count, status)
-            VALUES (?, ?, ?, ?, ?, ?)
-        ''', (filename, original_file, transcription, duration, word_count, 'completed'))
+            (filename, original_file, transcription, duration, word_count, status,
+             transcription_blob, compression, media_file, language)
+            VALUES (?, ?, NULL, ?, ?, ?, ?, ?, ?, ?)
+        ''', (filename, original_file, duration, word_count, 'completed', blob, codec, original_file, language))
         
         transcription_id = cursor.lastrowid
         conn.commit()
@@ -80,13 +217,15 @@ class TranscriptionDB:
     
     def get_all_transcriptions(self):
         """Dapatkan semua transkripsi"""
-        conn = sqlite3.connect(self.db_path)
+        conn = self._connect()
         cursor = conn.cursor()
         
         cursor.execute('''
-            SELECT id, filename, original_file, duration, word_count, created_at, status
-            FROM transcriptions 
-            ORDER BY created_at DESC
+            SELECT t.id, t.filename, t.original_file, t.duration, t.word_count, t.created_at, t.status,
+                   s.speaking_rate
+            FROM transcriptions t
+            LEFT JOIN transcription_stats s ON s.transcription_id = t.id
+            ORDER BY t.created_at DESC
         ''')
         
         results = cursor.fetchall()
@@ -95,32 +234,329 @@ class TranscriptionDB:
     
     def get_transcription(self, transcription_id):
         """Dapatkan transkripsi berdasarkan ID"""
-        conn = sqlite3.connect(self.db_path)
+        conn = self._connect()
         cursor = conn.cursor()
         
-        cursor.execute('''
-            SELECT * FROM transcriptions WHERE id = ?
+        cursor.execute(f'''
+            SELECT {TRANSCRIPTION_COLUMNS} FROM transcriptions WHERE id = ?
         ''', (transcription_id,))
         
         result = cursor.fetchone()
         conn.close()
-        return result
+        return self._row_with_text(result)
+    
+    def get_transcription_ids_between(self, date_from=None, date_to=None):
+        """Dapatkan ID transkripsi dalam rentang tanggal (YYYY-MM-DD, inklusif; kosong = tanpa batas)"""
+        # date('') bernilai NULL sehingga filter tidak akan cocok dengan baris mana pun
+        date_from = date_from or None
+        date_to = date_to or None
+        conn = self._connect()
+        cursor = conn.cursor()
+        
+        cursor.execute('''
+            SELECT id FROM transcriptions
+            WHERE (? IS NULL OR date(created_at) >= date(?))
+              AND (? IS NULL OR date(created_at) <= date(?))
+            ORDER BY created_at ASC
+        ''', (date_from, date_from, date_to, date_to))
+        
+        results = [row[0] for row in cursor.fetchall()]
+        conn.close()
+        return results
     
     def delete_transcription(self, transcription_id):
         """Hapus transkripsi"""
-        conn = sqlite3.connect(self.db_path)
+        conn = self._connect()
         cursor = conn.cursor()
         
+        cursor.execute('DELETE FROM transcript_segments WHERE transcription_id = ?', (transcription_id,))
+        cursor.execute('DELETE FROM transcription_stats WHERE transcription_id = ?', (transcription_id,))
         cursor.execute('DELETE FROM transcriptions WHERE id = ?', (transcription_id,))
         
         conn.commit()
         conn.close()
         return cursor.rowcount > 0
     
+    # Storage Management
+    def compress_stored_transcriptions(self, batch_size=200):
+        """Kompres transkripsi lama yang masih disimpan sebagai teks biasa; return jumlah baris"""
+        conn = self._connect()
+        cursor = conn.cursor()
+        
+        total = 0
+        while True:
+            cursor.execute('''
+                SELECT id, transcription FROM transcriptions
+                WHERE transcription IS NOT NULL AND transcription_blob IS NULL
+                LIMIT ?
+            ''', (batch_size,))
+            rows = cursor.fetchall()
+            if not rows:
+                break
+            updates = []
+            for transcription_id, text in rows:
+                blob, codec = compress_text(text)
+                updates.append((blob, codec, transcription_id))
+            cursor.executemany('''
+                UPDATE transcriptions
+                SET transcription_blob = ?, compression = ?, transcription = NULL
+                WHERE id = ?
+            ''', updates)
+            conn.commit()
+            total += len(rows)
+        
+        conn.close()
+        return total
+    
+    def get_transcription_files(self):
+        """Dapatkan (id, filename) semua transkripsi, untuk migrasi file .txt lama"""
+        conn = self._connect()
+        cursor = conn.cursor()
+        
+        cursor.execute('''
+            SELECT id, filename FROM transcriptions
+            WHERE transcription IS NOT NULL OR transcription_blob IS NOT NULL
+        ''')
+        
+        results = cursor.fetchall()
+        conn.close()
+        return results
+    
+    def get_media_due(self, days):
+        """Dapatkan (media_file, media_status) yang semua transkripsinya lebih tua dari N hari"""
+        conn = self._connect()
+        cursor = conn.cursor()
+        
+        cursor.execute('''
+            SELECT COALESCE(media_file, original_file) AS media, MAX(COALESCE(media_status, 'kept'))
+            FROM transcriptions
+            WHERE status = 'completed'
+              AND COALESCE(media_status, 'kept') != 'deleted'
+            GROUP BY media
+            HAVING MAX(created_at) <= datetime('now', ?)
+            ORDER BY MAX(created_at) ASC
+        ''', (f'-{int(days)} days',))
+        
+        results = cursor.fetchall()
+        conn.close()
+        return results
+    
+    def get_media_references(self):
+        """Dapatkan nama file media yang masih dipakai transkripsi"""
+        conn = self._connect()
+        cursor = conn.cursor()
+        
+        cursor.execute('''
+            SELECT COALESCE(media_file, original_file) FROM transcriptions
+            WHERE COALESCE(media_status, 'kept') != 'deleted'
+        ''')
+        
+        results = {row[0] for row in cursor.fetchall()}
+        conn.close()
+        return results
+    
+    def count_media_references(self, media_file, exclude_id=None):
+        """Jumlah transkripsi (selain exclude_id) yang masih memakai file media ini"""
+        conn = self._connect()
+        cursor = conn.cursor()
+        
+        cursor.execute('''
+            SELECT COUNT(*) FROM transcriptions
+            WHERE COALESCE(media_file, original_file) = ?
+              AND COALESCE(media_status, 'kept') != 'deleted'
+              AND (? IS NULL OR id != ?)
+        ''', (media_file, exclude_id, exclude_id))
+        
+        result = cursor.fetchone()[0]
+        conn.close()
+        return result
+    
+    def set_media_state(self, media_file, new_media_file, media_status):
+        """Catat file media terbaru (misal hasil kompres) dan statusnya (kept/compressed/deleted)
+        untuk semua transkripsi yang memakai media_file"""
+        conn = self._connect()
+        cursor = conn.cursor()
+        
+        cursor.execute('''
+            UPDATE transcriptions SET media_file = ?, media_status = ?
+            WHERE COALESCE(media_file, original_file) = ?
+        ''', (new_media_file, media_status, media_file))
+        
+        conn.commit()
+        conn.close()
+    
+    def get_transcript_storage(self):
+        """Ukuran teks transkripsi di database: (byte terkompresi, byte teks biasa, jumlah baris)"""
+        conn = self._connect()
+        cursor = conn.cursor()
+        
+        cursor.execute('''
+            SELECT COALESCE(SUM(LENGTH(transcription_blob)), 0),
+                   COALESCE(SUM(LENGTH(CAST(transcription AS BLOB))), 0),
+                   COUNT(*)
+            FROM transcriptions
+        ''')
+        
+        result = cursor.fetchone()
+        conn.close()
+        return result
+    
+    # Transcript Segment Management
+    def add_transcript_segments(self, transcription_id, segments):
+        """Simpan segmen transkripsi (list dict start, end, text)"""
+        conn = self._connect()
+        cursor = conn.cursor()
+        
+        cursor.executemany('''
+            INSERT INTO transcript_segments
+            (transcription_id, segment_index, start_time, end_time, text)
+            VALUES (?, ?, ?, ?, ?)
+        ''', [(transcription_id, index, segment['start'], segment['end'], segment['text'])
+              for index, segment in enumerate(segments)])
+        
+        conn.commit()
+        conn.close()
+    
+    def get_transcript_segments(self, transcription_id):
+        """Dapatkan segmen transkripsi berurutan: list (start_time, end_time, text)"""
+        conn = self._connect()
+        cursor = conn.cursor()
+        
+        cursor.execute('''
+            SELECT start_time, end_time, text FROM transcript_segments
+            WHERE transcription_id = ?
+            ORDER BY segment_index ASC
+        ''', (transcription_id,))
+        
+        results = cursor.fetchall()
+        conn.close()
+        return results
+    
+    # Transcript Statistics
+    def add_transcription_stats(self, transcription_id, stats):
+        """Simpan statistik transkripsi (dict dari StatsAccumulator.summary)"""
+        conn = self._connect()
+        cursor = conn.cursor()
+        
+        cursor.execute(f'''
+            INSERT OR REPLACE INTO transcription_stats
+            (transcription_id, {', '.join(STATS_COLUMNS)}, chunks)
+            VALUES (?, {', '.join('?' for _ in STATS_COLUMNS)}, ?)
+        ''', (transcription_id, *[stats.get(column) for column in STATS_COLUMNS],
+              json.dumps(stats.get('chunks') or [], separators=(',', ':'))))
+        
+        conn.commit()
+        conn.close()
+    
+    def get_transcription_stats(self, transcription_id):
+        """Statistik satu transkripsi termasuk per chunk, atau None jika belum ada"""
+        conn = self._connect()
+        cursor = conn.cursor()
+        
+        cursor.execute(f'''
+            SELECT {', '.join(STATS_COLUMNS)}, chunks FROM transcription_stats
+            WHERE transcription_id = ?
+        ''', (transcription_id,))
+        
+        row = cursor.fetchone()
+        conn.close()
+        if row is None:
+            return None
+        stats = dict(zip(STATS_COLUMNS, row))
+        stats['chunks'] = [dict(zip(('start', 'end', 'words', 'speech_seconds', 'avg_logprob', 'no_speech_prob'), chunk))
+                           for chunk in json.loads(row[-1] or '[]')]
+        return stats
+    
+    def get_stats_overview(self, date_from=None, date_to=None, limit=100):
+        """
+        Statistik per transkripsi untuk dashboard (tanpa teks dan tanpa data per chunk).
+        
+        Returns:
+            tuple: (ringkasan dict, list dict per transkripsi terbaru dulu)
+        """
+        date_from = date_from or None
+        date_to = date_to or None
+        conn = self._connect()
+        cursor = conn.cursor()
+        
+        where = '''
+            WHERE (? IS NULL OR date(t.created_at) >= date(?))
+              AND (? IS NULL OR date(t.created_at) <= date(?))
+        '''
+        params = (date_from, date_from, date_to, date_to)
+        # Transkripsi lama tanpa baris statistik tetap dihitung dari kolom word_count/duration
+        cursor.execute(f'''
+            SELECT COUNT(*), COALESCE(SUM(t.word_count), 0), COALESCE(SUM(t.duration), 0),
+                   COUNT(s.transcription_id), AVG(s.speaking_rate), AVG(s.silence_ratio), AVG(s.confidence)
+            FROM transcriptions t
+            LEFT JOIN transcription_stats s ON s.transcription_id = t.id
+            {where}
+        ''', params)
+        row = cursor.fetchone()
+        summary = dict(zip(('transcriptions', 'word_count', 'duration', 'with_stats', 'speaking_rate',
+                            'silence_ratio', 'confidence'), row))
+        
+        columns = ('id', 'original_file', 'created_at', 'language') + STATS_COLUMNS
+        cursor.execute(f'''
+            SELECT t.id, t.original_file, t.created_at, t.language,
+                   {', '.join('s.' + column for column in STATS_COLUMNS)}
+            FROM transcriptions t
+            JOIN transcription_stats s ON s.transcription_id = t.id
+            {where}
+            ORDER BY t.created_at DESC
+            LIMIT ?
+        ''', params + (limit,))
+        rows = [dict(zip(columns, row)) for row in cursor.fetchall()]
+        
+        conn.close()
+        return summary, rows
+    
+    # Job Performance
+    def add_job_performance(self, model_size, host, device, chunk_count, audio_seconds,
+                            processing_seconds, inference_seconds, rtf, backend='whisper'):
+        """Catat waktu proses satu job transkripsi yang selesai"""
+        conn = self._connect()
+        cursor = conn.cursor()
+        
+        cursor.execute('''
+            INSERT INTO job_performance
+            (model_size, host, device, chunk_count, audio_seconds, processing_seconds, inference_seconds, rtf, backend)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+        ''', (model_size, host, device, chunk_count, audio_seconds, processing_seconds, inference_seconds, rtf,
+              backend))
+        
+        conn.commit()
+        conn.close()
+    
+    def get_job_performance(self, model_size, host=None, limit=20, backend='whisper', device=None):
+        """
+        Job terbaru untuk model dan engine (dan host/device 'cuda' atau 'cpu' jika diisi):
+        list (rtf, chunk_count), terbaru dulu
+        """
+        conn = self._connect()
+        cursor = conn.cursor()
+        
+        conditions = ['model_size = ?', 'backend = ?']
+        params = [model_size, backend]
+        if host is not None:
+            conditions.append('host = ?')
+            params.append(host)
+        if device is not None:
+            conditions.append('device = ?')
+            params.append(device)
+        cursor.execute(f'''
+            SELECT rtf, chunk_count FROM job_performance
+            WHERE {' AND '.join(conditions)} ORDER BY id DESC LIMIT ?
+        ''', params + [limit])
+        
+        rows = cursor.fetchall()
+        conn.close()
+        return rows
+    
     # API Key Management
     def save_api_key(self, service, api_key):
         """Simpan API key"""
-        conn = sqlite3.connect(self.db_path)
+        conn = self._connect()
         cursor = conn.cursor()
         
         # Hapus key lama untuk service yang sama
@@ -137,7 +573,7 @@ class TranscriptionDB:
     
     def get_api_key(self, service):
         """Dapatkan API key"""
-        conn = sqlite3.connect(self.db_path)
+        conn = self._connect()
         cursor = conn.cursor()
         
         cursor.execute('''
@@ -152,7 +588,7 @@ class TranscriptionDB:
     # AI Report Management
     def save_ai_report(self, transcription_id, report_title, report_content, report_type):
         """Simpan laporan AI"""
-        conn = sqlite3.connect(self.db_path)
+        conn = self._connect()
         cursor = conn.cursor()
         
         cursor.execute('''
@@ -168,7 +604,7 @@ class TranscriptionDB:
     
     def get_ai_reports(self, transcription_id=None):
         """Dapatkan laporan AI"""
-        conn = sqlite3.connect(self.db_path)
+        conn = self._connect()
         cursor = conn.cursor()
         
         if transcription_id:
@@ -193,11 +629,12 @@ class TranscriptionDB:
     
     def get_ai_report(self, report_id):
         """Dapatkan laporan AI berdasarkan ID"""
-        conn = sqlite3.connect(self.db_path)
+        conn = self._connect()
         cursor = conn.cursor()
         
         cursor.execute('''
-            SELECT ar.*, t.filename as transcription_filename, t.transcription
+            SELECT ar.*, t.filename as transcription_filename, t.transcription,
+                   t.transcription_blob, t.compression
             FROM ai_reports ar
             JOIN transcriptions t ON ar.transcription_id = t.id
             WHERE ar.id = ?
@@ -205,13 +642,85 @@ class TranscriptionDB:
         
         result = cursor.fetchone()
         conn.close()
-        return result
+        if result is None or result[-2] is None:
+            return result[:-2] if result else None
+        return result[:-3] + (decompress_text(result[-2], result[-1]),)
+    
+    # Report Cache Management
+    def get_cached_report(self, cache_key):
+        """Dapatkan laporan dari cache dan perbarui waktu pemakaian terakhir"""
+        conn = self._connect()
+        cursor = conn.cursor()
+        
+        cursor.execute('SELECT report_content FROM report_cache WHERE cache_key = ?', (cache_key,))
+        result = cursor.fetchone()
+        
+        if result:
+            cursor.execute('''
+                UPDATE report_cache
+                SET hit_count = hit_count + 1, last_used = strftime('%Y-%m-%d %H:%M:%f', 'now')
+                WHERE cache_key = ?
+            ''', (cache_key,))
+            conn.commit()
+        
+        conn.close()
+        return result[0] if result else None
+    
+    def save_cached_report(self, cache_key, report_type, model_id, report_content):
+        """Simpan laporan ke cache (menimpa entri lama dengan key yang sama)"""
+        conn = self._connect()
+        cursor = conn.cursor()
+        
+        cursor.execute('''
+            INSERT OR REPLACE INTO report_cache
+            (cache_key, report_type, model_id, report_content, content_size)
+            VALUES (?, ?, ?, ?, ?)
+        ''', (cache_key, report_type, model_id, report_content, len(report_content.encode('utf-8'))))
+        
+        conn.commit()
+        conn.close()
+    
+    def evict_report_cache(self, max_bytes):
+        """Hapus entri cache yang paling lama tidak dipakai hingga total ukuran <= max_bytes"""
+        conn = self._connect()
+        cursor = conn.cursor()
+        
+        cursor.execute('SELECT COALESCE(SUM(content_size), 0) FROM report_cache')
+        total_size = cursor.fetchone()[0]
+        
+        evicted = 0
+        if total_size > max_bytes:
+            cursor.execute('''
+                SELECT cache_key, content_size FROM report_cache
+                ORDER BY last_used ASC, rowid ASC
+            ''')
+            for cache_key, content_size in cursor.fetchall():
+                if total_size <= max_bytes:
+                    break
+                conn.execute('DELETE FROM report_cache WHERE cache_key = ?', (cache_key,))
+                total_size -= content_size
+                evicted += 1
+            conn.commit()
+        
+        conn.close()
+        return evicted
+    
+    def clear_report_cache(self):
+        """Kosongkan seluruh cache laporan"""
+        conn = self._connect()
+        cursor = conn.cursor()
+        
+        cursor.execute('DELETE FROM report_cache')
+        
+        conn.commit()
+        conn.close()
+        return cursor.rowcount
     
     # User Model Management
     def save_user_model(self, model_id, model_name=None):
         """Simpan model yang digunakan user"""
         try:
-            conn = sqlite3.connect(self.db_path)
+            conn = self._connect()
             cursor = conn.cursor()
             
             # Hapus entri lama untuk model yang sama
@@ -231,7 +740,7 @@ class TranscriptionDB:
     def get_user_models(self):
         """Dapatkan model yang pernah digunakan user"""
         try:
-            conn = sqlite3.connect(self.db_path)
+            conn = self._connect()
             cursor = conn.cursor()
             
             cursor.execute('''
@@ -247,6 +756,63 @@ class TranscriptionDB:
             return [{'id': model[0], 'name': model[1] or model[0]} for model in user_models]
         except:
             return []
+    
+    def record_model_latency(self, model_id, latency_ms, success=True, smoothing=0.3):
+        """Catat latensi panggilan model (rata-rata bergerak eksponensial) atau kegagalan"""
+        try:
+            conn = self._connect()
+            cursor = conn.cursor()
+            
+            cursor.execute('''
+                SELECT avg_latency_ms, latency_samples FROM model_latency WHERE model_id = ?
+            ''', (model_id,))
+            row = cursor.fetchone()
+            
+            if row is None:
+                cursor.execute('''
+                    INSERT INTO model_latency (model_id, avg_latency_ms, latency_samples, failure_count)
+                    VALUES (?, ?, ?, ?)
+                ''', (model_id, latency_ms if success else None, 1 if success else 0, 0 if success else 1))
+            elif success:
+                avg_latency, samples = row[0], row[1] or 0
+                if avg_latency is None or samples == 0:
+                    new_avg = latency_ms
+                else:
+                    new_avg = avg_latency * (1 - smoothing) + latency_ms * smoothing
+                cursor.execute('''
+                    UPDATE model_latency
+                    SET avg_latency_ms = ?, latency_samples = ?
+                    WHERE model_id = ?
+                ''', (new_avg, samples + 1, model_id))
+            else:
+                cursor.execute('''
+                    UPDATE model_latency
+                    SET failure_count = COALESCE(failure_count, 0) + 1
+                    WHERE model_id = ?
+                ''', (model_id,))
+            
+            conn.commit()
+            conn.close()
+        except:
+            pass
+    
+    def get_model_latencies(self):
+        """Dapatkan statistik latensi semua model: {model_id: (avg_latency_ms, samples, failures)}"""
+        try:
+            conn = self._connect()
+            cursor = conn.cursor()
+            
+            cursor.execute('''
+                SELECT model_id, avg_latency_ms, latency_samples, failure_count
+                FROM model_latency
+            ''')
+            
+            rows = cursor.fetchall()
+            conn.close()
+            
+            return {row[0]: (row[1], row[2] or 0, row[3] or 0) for row in rows}
+        except:
+            return {}
 
 # Inisialisasi database saat import
 db = TranscriptionDB()
\ No newline at end of file
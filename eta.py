@@ -0,0 +1,156 @@
+# eta.py
+import logging
+import socket
+import statistics
+import threading
+import time
+from collections import deque
+from database import db
+from inference_backends import WHISPER_BACKEND
+
+logger = logging.getLogger(__name__)
+
+# RTF awal (waktu proses / durasi audio) sebelum ada job yang tercatat di host ini
+DEFAULT_RTF = {'gpu': 0.7, 'cpu': 2.0}
+# Jumlah job terakhir per (model, host) yang dipakai estimator
+ROLLING_WINDOW = 20
+# Minimal sampel sebelum data host/kelompok chunk yang lebih spesifik dipakai
+MIN_SAMPLES = 3
+# Bobot estimasi awal selama job berjalan, dalam detik audio: setelah sekian detik audio
+# diproses, throughput terukur dan estimasi awal berbobot sama
+PRIOR_WEIGHT_SECONDS = 120
+
+HOST = socket.gethostname()
+
+
+def chunk_bucket(chunk_count):
+    """Kelompok jumlah chunk; job pendek punya overhead (load model, probe) yang relatif besar"""
+    if not chunk_count or chunk_count <= 1:
+        return 1
+    if chunk_count <= 5:
+        return 5
+    if chunk_count <= 20:
+        return 20
+    return 0
+
+
+class RtfEstimator:
+    """
+    Estimator RTF bergulir dari job yang sudah selesai.
+
+    Sampel disimpan di tabel job_performance; di memori hanya ROLLING_WINDOW job terakhir
+    per (model, host, device). Hanya job dengan engine inferensi dan device (CPU/CUDA) yang
+    sama yang dipakai. Estimasi = median RTF (tahan terhadap job yang sesekali lambat),
+    diutamakan dari job dengan jumlah chunk sejenis.
+    """
+
+    def __init__(self, host=HOST, window=ROLLING_WINDOW, backend=WHISPER_BACKEND):
+        self.host = host
+        self.window = window
+        self.backend = backend
+        self._samples = {}
+        self._lock = threading.Lock()
+
+    def _recent(self, model_size, host, device):
+        key = (model_size, host, device)
+        with self._lock:
+            if key not in self._samples:
+                rows = db.get_job_performance(model_size, host, limit=self.window, backend=self.backend,
+                                              device=device)
+                self._samples[key] = deque(reversed(rows), maxlen=self.window)
+            return list(self._samples[key])
+
+    def estimate(self, model_size, gpu, chunk_count=None):
+        """
+        Returns:
+            tuple: (rtf, sumber estimasi) - sumber 'host', 'model' atau 'default'
+        """
+        device = 'cuda' if gpu else 'cpu'
+        samples = self._recent(model_size, self.host, device)
+        source = 'host'
+        if len(samples) < MIN_SAMPLES:
+            samples = db.get_job_performance(model_size, limit=self.window, backend=self.backend, device=device)
+            source = 'model'
+        if not samples:
+            return DEFAULT_RTF['gpu' if gpu else 'cpu'], 'default'
+
+        bucket = chunk_bucket(chunk_count)
+        similar = [rtf for rtf, chunks in samples if chunk_bucket(chunks) == bucket]
+        values = similar if len(similar) >= MIN_SAMPLES else [rtf for rtf, _ in samples]
+        return statistics.median(values), source
+
+    def record(self, model_size, gpu, chunk_count, audio_seconds, processing_seconds, inference_seconds=None):
+        """Catat satu job yang selesai (di database dan jendela di memori)"""
+        if not audio_seconds or audio_seconds <= 0:
+            return None
+        rtf = processing_seconds / audio_seconds
+        device = 'cuda' if gpu else 'cpu'
+        db.add_job_performance(model_size, self.host, device, chunk_count,
+                               audio_seconds, processing_seconds, inference_seconds, rtf, backend=self.backend)
+        with self._lock:
+            samples = self._samples.get((model_size, self.host, device))
+            if samples is not None:
+                samples.append((rtf, chunk_count))
+        return rtf
+
+
+class JobEta:
+    """
+    ETA satu job dari throughput per chunk yang terukur.
+
+    Sebelum chunk pertama selesai dipakai RTF dari estimator; setelahnya RTF inferensi
+    terukur makin dominan seiring bertambahnya audio yang sudah diproses.
+    """
+
+    def __init__(self, total_seconds, prior_rtf, model_size=None):
+        self.total_seconds = total_seconds
+        self.prior_rtf = prior_rtf
+        self.model_size = model_size
+        # Mulai proses (setelah slot CPU didapat); None = belum mulai
+        self.started = None
+        self.wall_clock = True
+        self.audio_done = 0.0
+        self.inference_seconds = 0.0
+        self.chunks = 0
+
+    def start(self, wall_clock=True):
+        """
+        Tandai job mulai diproses (setelah slot CPU didapat, jadi waktu antre tidak terhitung).
+
+        wall_clock=False untuk job yang ikut menunggu data masuk (transkripsi streaming selama
+        upload): waktu prosesnya dihitung dari waktu inferensi per chunk saja.
+        """
+        self.started = time.time()
+        self.wall_clock = wall_clock
+
+    def processing_seconds(self):
+        """Waktu proses job untuk RTF yang dicatat (tanpa antre slot CPU dan tanpa upload)"""
+        if self.started is None or not self.wall_clock:
+            return self.inference_seconds
+        return time.time() - self.started
+
+    def chunk_done(self, audio_seconds, seconds):
+        self.audio_done += audio_seconds
+        self.inference_seconds += seconds
+        self.chunks += 1
+
+    def rtf(self):
+        if self.audio_done <= 0:
+            return self.prior_rtf
+        measured = self.inference_seconds / self.audio_done
+        weight = self.audio_done / (self.audio_done + PRIOR_WEIGHT_SECONDS)
+        return measured * weight + self.prior_rtf * (1 - weight)
+
+    def fraction(self):
+        if not self.total_seconds:
+            return None
+        return min(1.0, self.audio_done / self.total_seconds)
+
+    def remaining_seconds(self):
+        """Perkiraan sisa waktu (detik), None jika durasi total belum diketahui"""
+        if not self.total_seconds:
+            return None
+        return max(0.0, self.total_seconds - self.audio_done) * self.rtf()
+
+
+rtf_estimator = RtfEstimator()
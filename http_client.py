@@ -0,0 +1,161 @@
+# http_client.py
+import os
+import random
+import threading
+import time
+import logging
+import requests
+from requests.adapters import HTTPAdapter
+
+logger = logging.getLogger(__name__)
+
+OPENROUTER_BASE_URL = os.environ.get('OPENROUTER_BASE_URL', 'https://openrouter.ai/api/v1')
+
+# Status HTTP yang layak dicoba ulang (rate limit dan error sisi server)
+RETRY_STATUS_CODES = {429, 500, 502, 503, 504}
+# Method yang aman diulang setelah request mungkin sudah diproses server
+IDEMPOTENT_METHODS = {'GET', 'HEAD', 'OPTIONS', 'PUT', 'DELETE'}
+
+
+class LLMRequestError(Exception):
+    """Error umum saat memanggil API LLM"""
+    def __init__(self, message, status_code=None):
+        super().__init__(message)
+        self.status_code = status_code
+
+
+class LLMRateLimitError(LLMRequestError):
+    """Rate limit tetap terjadi setelah semua percobaan ulang"""
+
+
+class LLMTimeoutError(LLMRequestError):
+    """Request timeout setelah semua percobaan ulang"""
+
+
+class LLMHttpClient:
+    """
+    Client HTTP bersama untuk semua panggilan LLM dan katalog model.
+
+    - Satu Session dengan connection pool (keep-alive) untuk semua thread
+    - Kredensial dikirim per request, tidak ada state global yang diubah
+    - Retry dengan exponential backoff + jitter untuk 429/5xx dan timeout koneksi; read timeout
+      dan error koneksi lain hanya diulang untuk method idempoten (POST chat completion yang
+      mungkin sudah diproses tidak dikirim ulang)
+    - Pembatas concurrency per provider
+    """
+
+    def __init__(self, base_url=OPENROUTER_BASE_URL, pool_size=10, max_retries=4,
+                 backoff_base=1.0, backoff_max=30.0, max_concurrency=4):
+        self.base_url = base_url.rstrip('/')
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.max_concurrency = max_concurrency
+
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size, max_retries=0)
+        self.session.mount('https://', adapter)
+        self.session.mount('http://', adapter)
+
+        self._limiters = {}
+        self._limiters_lock = threading.Lock()
+
+    def _get_limiter(self, provider):
+        """Dapatkan semaphore concurrency untuk provider"""
+        with self._limiters_lock:
+            if provider not in self._limiters:
+                self._limiters[provider] = threading.BoundedSemaphore(self.max_concurrency)
+            return self._limiters[provider]
+
+    def _backoff_delay(self, attempt, retry_after=None):
+        """Hitung jeda retry: exponential backoff dengan full jitter"""
+        delay = random.uniform(0, min(self.backoff_max, self.backoff_base * (2 ** attempt)))
+        if retry_after:
+            try:
+                delay = max(delay, min(float(retry_after), self.backoff_max))
+            except ValueError:
+                pass
+        return delay
+
+    def request(self, method, path, api_key=None, json_body=None, timeout=60, provider='openrouter',
+                cancel_event=None):
+        """Kirim request dengan retry; return objek Response terakhir"""
+        url = path if path.startswith('http') else f"{self.base_url}/{path.lstrip('/')}"
+        headers = {"Content-Type": "application/json"}
+        if api_key:
+            headers["Authorization"] = f"Bearer {api_key}"
+
+        limiter = self._get_limiter(provider)
+        idempotent = method.upper() in IDEMPOTENT_METHODS
+
+        for attempt in range(self.max_retries + 1):
+            if cancel_event is not None and cancel_event.is_set():
+                raise LLMRequestError("Request dibatalkan")
+            retry_after = None
+            try:
+                with limiter:
+                    response = self.session.request(method, url, headers=headers,
+                                                    json=json_body, timeout=timeout)
+            except requests.exceptions.ConnectTimeout as e:
+                # Koneksi belum terbentuk, request belum terkirim
+                if attempt >= self.max_retries:
+                    raise LLMTimeoutError(f"Timeout koneksi setelah {attempt + 1} percobaan: {e}")
+                logger.warning(f"Timeout koneksi {method} {url} (percobaan {attempt + 1})")
+            except requests.exceptions.Timeout as e:
+                if not idempotent or attempt >= self.max_retries:
+                    raise LLMTimeoutError(f"Timeout setelah {attempt + 1} percobaan: {e}")
+                logger.warning(f"Timeout {method} {url} (percobaan {attempt + 1})")
+            except requests.exceptions.RequestException as e:
+                if not idempotent or attempt >= self.max_retries:
+                    raise LLMRequestError(f"Request error: {e}")
+                logger.warning(f"Request error {method} {url} (percobaan {attempt + 1}): {e}")
+            else:
+                if response.status_code not in RETRY_STATUS_CODES or attempt >= self.max_retries:
+                    return response
+                retry_after = response.headers.get('Retry-After')
+                logger.warning(f"HTTP {response.status_code} dari {url} (percobaan {attempt + 1})")
+
+            delay = self._backoff_delay(attempt, retry_after)
+            if cancel_event is not None:
+                # Bangun lebih awal jika request dibatalkan saat menunggu
+                cancel_event.wait(delay)
+            else:
+                time.sleep(delay)
+
+    def get_json(self, path, api_key=None, timeout=15, provider='openrouter'):
+        """GET dan parse JSON; raise LLMRequestError jika status bukan 200"""
+        response = self.request('GET', path, api_key=api_key, timeout=timeout, provider=provider)
+        if response.status_code != 200:
+            raise LLMRequestError(f"API Error: {response.status_code} - {response.text[:200]}",
+                                  status_code=response.status_code)
+        return response.json()
+
+    def chat_completion(self, api_key, model, messages, max_tokens=1000, temperature=0.7,
+                        timeout=120, provider='openrouter', cancel_event=None):
+        """Panggil endpoint chat completions dan return isi pesan jawaban"""
+        payload = {
+            "model": model,
+            "messages": messages,
+            "max_tokens": max_tokens,
+            "temperature": temperature
+        }
+        response = self.request('POST', '/chat/completions', api_key=api_key, json_body=payload,
+                                timeout=timeout, provider=provider, cancel_event=cancel_event)
+
+        if response.status_code == 429:
+            raise LLMRateLimitError(f"Rate limit exceeded: {response.text[:200]}", status_code=429)
+        if response.status_code != 200:
+            raise LLMRequestError(f"{response.status_code} - {response.text[:200]}",
+                                  status_code=response.status_code)
+
+        data = response.json()
+        if 'error' in data:
+            raise LLMRequestError(str(data['error']), status_code=response.status_code)
+        choices = data.get('choices') or []
+        if not choices:
+            raise LLMRequestError("Respons tidak berisi pilihan jawaban", status_code=response.status_code)
+        return (choices[0].get('message', {}).get('content') or '').strip()
+
+
+# Client bersama untuk seluruh aplikasi
+llm_client = LLMHttpClient(max_concurrency=int(os.environ.get('LLM_MAX_CONCURRENCY', 4)))
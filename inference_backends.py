@@ -0,0 +1,139 @@
+# inference_backends.py
+import logging
+import os
+
+logger = logging.getLogger(__name__)
+
+# Engine inferensi per deployment: whisper (PyTorch fp32/fp16), whisper-int8 (kuantisasi
+# dinamis Linear ke int8, CPU) atau faster-whisper (CTranslate2, jika terpasang)
+WHISPER_BACKEND = os.environ.get('WHISPER_BACKEND', 'whisper')
+# compute_type CTranslate2 (default: int8 di CPU, float16 di GPU)
+CT2_COMPUTE_TYPE = os.environ.get('CT2_COMPUTE_TYPE')
+
+
+class InferenceBackend:
+    """
+    Antarmuka engine inferensi Whisper.
+
+    load() mengembalikan objek model milik engine; transcribe() selalu mengembalikan dict
+    {'text': ..., 'segments': [{'start', 'end', 'text', 'avg_logprob', 'no_speech_prob'}, ...]}
+    seperti whisper.transcribe, sehingga AudioTranscriber tidak perlu tahu engine mana yang
+    dipakai. language=None berarti engine mendeteksi bahasa sendiri. initial_prompt berisi
+    teks sebelum audio ini (konteks antar chunk); dengan word_timestamps=True tiap segmen
+    juga berisi 'words': [{'start', 'end', 'word'}, ...].
+    """
+    name = None
+
+    def available(self):
+        return True
+
+    def device(self, gpu_available):
+        """Device yang benar-benar dipakai engine ini ('cuda' atau 'cpu')"""
+        return 'cuda' if gpu_available else 'cpu'
+
+    def load(self, model_size, device):
+        raise NotImplementedError
+
+    def transcribe(self, model, audio, language, gpu, initial_prompt=None, word_timestamps=False):
+        raise NotImplementedError
+
+    def detect_language(self, model, audio):
+        """Probabilitas bahasa untuk array float32 16 kHz (maks. 30 detik): dict kode -> prob"""
+        raise NotImplementedError
+
+
+class WhisperBackend(InferenceBackend):
+    """openai-whisper (PyTorch); fp16 di GPU, fp32 di CPU"""
+    name = 'whisper'
+
+    def available(self):
+        try:
+            import whisper
+            return True
+        except ImportError:
+            return False
+
+    def load(self, model_size, device):
+        import whisper
+        return whisper.load_model(model_size, device=device)
+
+    def transcribe(self, model, audio, language, gpu, initial_prompt=None, word_timestamps=False):
+        return model.transcribe(audio, language=language, task="transcribe", fp16=gpu, verbose=False,
+                                initial_prompt=initial_prompt, word_timestamps=word_timestamps)
+
+    def detect_language(self, model, audio):
+        import whisper
+        mel = whisper.log_mel_spectrogram(whisper.pad_or_trim(audio), n_mels=model.dims.n_mels)
+        _, probs = model.detect_language(mel.to(model.device))
+        return probs
+
+
+class QuantizedWhisperBackend(WhisperBackend):
+    """openai-whisper dengan layer Linear dikuantisasi dinamis ke int8 (hanya CPU)"""
+    name = 'whisper-int8'
+
+    def device(self, gpu_available):
+        return 'cpu'
+
+    def load(self, model_size, device):
+        import torch
+        import whisper
+        if device != 'cpu':
+            logger.warning("whisper-int8 hanya berjalan di CPU, GPU tidak dipakai")
+        model = whisper.load_model(model_size, device='cpu')
+        return torch.quantization.quantize_dynamic(model, {torch.nn.Linear}, dtype=torch.qint8)
+
+    def transcribe(self, model, audio, language, gpu, initial_prompt=None, word_timestamps=False):
+        return super().transcribe(model, audio, language, False, initial_prompt, word_timestamps)
+
+
+class FasterWhisperBackend(InferenceBackend):
+    """faster-whisper (CTranslate2); model int8/float16 dengan API hasil yang sama"""
+    name = 'faster-whisper'
+
+    def available(self):
+        try:
+            import faster_whisper
+            return True
+        except ImportError:
+            return False
+
+    def load(self, model_size, device):
+        from faster_whisper import WhisperModel
+        compute_type = CT2_COMPUTE_TYPE or ('float16' if device == 'cuda' else 'int8')
+        return WhisperModel(model_size, device=device, compute_type=compute_type)
+
+    def transcribe(self, model, audio, language, gpu, initial_prompt=None, word_timestamps=False):
+        segments, _ = model.transcribe(audio, language=language, task="transcribe",
+                                       initial_prompt=initial_prompt, word_timestamps=word_timestamps)
+        # Segmen berupa generator; decoding baru berjalan saat diiterasi
+        segments = [self._segment(segment) for segment in segments]
+        return {'text': ''.join(segment['text'] for segment in segments), 'segments': segments}
+
+    def _segment(self, segment):
+        result = {'start': segment.start, 'end': segment.end, 'text': segment.text,
+                  'avg_logprob': segment.avg_logprob, 'no_speech_prob': segment.no_speech_prob}
+        if segment.words:
+            result['words'] = [{'start': word.start, 'end': word.end, 'word': word.word} for word in segment.words]
+        return result
+
+    def detect_language(self, model, audio):
+        # Bahasa dideteksi saat transcribe() dipanggil; generator segmen tidak diiterasi
+        # sehingga decoding tidak dijalankan
+        _, info = model.transcribe(audio, task="transcribe")
+        return dict(info.all_language_probs or [(info.language, info.language_probability)])
+
+
+BACKENDS = {backend.name: backend for backend in (WhisperBackend, QuantizedWhisperBackend, FasterWhisperBackend)}
+
+
+def get_backend(name=None):
+    """Buat backend berdasarkan nama (default: WHISPER_BACKEND)"""
+    name = name or WHISPER_BACKEND
+    if name not in BACKENDS:
+        raise Exception(f"WHISPER_BACKEND tidak dikenal: {name} (pilihan: {', '.join(BACKENDS)})")
+    return BACKENDS[name]()
+
+
+def available_backends():
+    return [name for name, backend in BACKENDS.items() if backend().available()]
@@ -0,0 +1,288 @@
+# metrics.py
+import bisect
+import functools
+import json
+import logging
+import threading
+import time
+from collections import OrderedDict
+from contextlib import contextmanager
+
+logger = logging.getLogger(__name__)
+
+# Jumlah trace job terakhir yang disimpan di memori
+MAX_TRACES = 200
+
+STAGE_BUCKETS = (0.01, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300, 600)
+RTF_BUCKETS = (0.05, 0.1, 0.2, 0.3, 0.5, 0.75, 1, 1.5, 2, 3, 5, 10)
+LLM_BUCKETS = (0.5, 1, 2, 5, 10, 20, 30, 60, 120, 300)
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _format_labels(names, values, extra=None):
+    pairs = list(zip(names, values)) + list(extra or [])
+    if not pairs:
+        return ''
+    return '{' + ','.join(f'{name}="{_escape(value)}"' for name, value in pairs) + '}'
+
+
+def _format_value(value):
+    if value == float('inf'):
+        return '+Inf'
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+class Metric:
+    """Dasar metrik berlabel; nilai per kombinasi label disimpan di dict"""
+    kind = None
+
+    def __init__(self, name, help_text, labels=()):
+        self.name = name
+        self.help_text = help_text
+        self.label_names = tuple(labels)
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def _key(self, labels):
+        return tuple(str(labels.get(name, '')) for name in self.label_names)
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} {self.kind}"]
+        with self._lock:
+            items = sorted(self._values.items())
+        for key, value in items:
+            lines.extend(self._render_value(key, value))
+        return lines
+
+    def _render_value(self, key, value):
+        return [f"{self.name}{_format_labels(self.label_names, key)} {_format_value(value)}"]
+
+
+class Counter(Metric):
+    kind = 'counter'
+
+    def inc(self, amount=1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+
+class Gauge(Metric):
+    kind = 'gauge'
+
+    def set(self, value, **labels):
+        with self._lock:
+            self._values[self._key(labels)] = value
+
+    def inc(self, amount=1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def dec(self, amount=1, **labels):
+        self.inc(-amount, **labels)
+
+
+class Histogram(Metric):
+    """Histogram kumulatif gaya Prometheus; observe() hanya bisect + beberapa penjumlahan"""
+    kind = 'histogram'
+
+    def __init__(self, name, help_text, labels=(), buckets=STAGE_BUCKETS):
+        super().__init__(name, help_text, labels)
+        self.buckets = tuple(sorted(buckets))
+
+    def observe(self, value, **labels):
+        key = self._key(labels)
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            state = self._values.get(key)
+            if state is None:
+                state = self._values[key] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            state[0][index] += 1
+            state[1] += value
+            state[2] += 1
+
+    def _render_value(self, key, state):
+        counts, total, count = state
+        lines = []
+        cumulative = 0
+        for bound, bucket_count in zip(self.buckets + (float('inf'),), counts):
+            cumulative += bucket_count
+            labels = _format_labels(self.label_names, key, [('le', _format_value(bound))])
+            lines.append(f"{self.name}_bucket{labels} {cumulative}")
+        labels = _format_labels(self.label_names, key)
+        lines.append(f"{self.name}_sum{labels} {_format_value(total)}")
+        lines.append(f"{self.name}_count{labels} {count}")
+        return lines
+
+
+class Registry:
+    def __init__(self):
+        self._metrics = OrderedDict()
+
+    def register(self, metric):
+        self._metrics[metric.name] = metric
+        return metric
+
+    def render(self):
+        """Semua metrik dalam format teks Prometheus (exposition 0.0.4)"""
+        lines = []
+        for metric in self._metrics.values():
+            lines.extend(metric.render())
+        return '\n'.join(lines) + '\n'
+
+
+registry = Registry()
+
+JOBS = registry.register(Counter(
+    'whisper_transcription_jobs_total', 'Job transkripsi yang selesai per status', ['status']))
+JOBS_IN_PROGRESS = registry.register(Gauge(
+    'whisper_jobs_in_progress', 'Job yang sedang berjalan', ['kind']))
+AUDIO_SECONDS = registry.register(Counter(
+    'whisper_audio_seconds_total', 'Total detik audio yang berhasil ditranskripsi'))
+REALTIME_FACTOR = registry.register(Histogram(
+    'whisper_realtime_factor', 'Waktu proses dibagi durasi audio per job', buckets=RTF_BUCKETS))
+STAGE_SECONDS = registry.register(Histogram(
+    'whisper_stage_seconds', 'Durasi per tahap pipeline', ['stage'], buckets=STAGE_BUCKETS))
+LLM_SECONDS = registry.register(Histogram(
+    'llm_request_seconds', 'Latensi request LLM per model', ['model', 'outcome'], buckets=LLM_BUCKETS))
+MODEL_SELECTIONS = registry.register(Counter(
+    'whisper_model_selected_total', 'Ukuran model Whisper yang dipilih per job', ['model_size']))
+CPU_SLOTS = registry.register(Gauge(
+    'whisper_cpu_slots', 'Jumlah slot CPU untuk job transkripsi bersamaan'))
+CPU_THREADS_PER_JOB = registry.register(Gauge(
+    'whisper_cpu_threads_per_job', 'Core (thread torch/OpenMP) per job transkripsi'))
+CPU_SLOT_JOBS = registry.register(Gauge(
+    'whisper_cpu_slot_busy', 'Slot CPU yang sedang dipakai job (1 = terpakai)', ['slot']))
+
+
+class JobTrace:
+    """Rangkaian span (tahap) satu job dengan offset relatif terhadap awal job"""
+
+    def __init__(self, job_id, kind):
+        self.job_id = job_id
+        self.kind = kind
+        self.started_at = time.time()
+        self._start = time.perf_counter()
+        self.status = 'running'
+        self.spans = []
+
+    def add(self, stage, started, seconds, attrs=None):
+        span = {'stage': stage, 'offset': round(started - self._start, 4), 'seconds': round(seconds, 4)}
+        if attrs:
+            span.update(attrs)
+        self.spans.append(span)
+
+    def totals(self):
+        totals = {}
+        for span in self.spans:
+            totals[span['stage']] = round(totals.get(span['stage'], 0) + span['seconds'], 4)
+        return totals
+
+    def to_dict(self):
+        return {
+            'job_id': self.job_id,
+            'kind': self.kind,
+            'status': self.status,
+            'started_at': self.started_at,
+            'elapsed': round(time.perf_counter() - self._start, 4),
+            'totals': self.totals(),
+            'spans': self.spans
+        }
+
+
+job_traces = OrderedDict()
+_traces_lock = threading.Lock()
+_local = threading.local()
+
+
+def current_trace():
+    return getattr(_local, 'trace', None)
+
+
+@contextmanager
+def job_trace(job_id, kind='transcription'):
+    """
+    Aktifkan trace untuk job di thread ini.
+
+    Jika job yang sama sudah punya trace aktif (misal fallback streaming -> file),
+    trace itu dipakai ulang dan baru ditutup oleh pemanggil terluar.
+    """
+    trace = current_trace()
+    if trace is not None and trace.job_id == job_id:
+        yield trace
+        return
+
+    trace = JobTrace(job_id, kind)
+    with _traces_lock:
+        job_traces[job_id] = trace
+        while len(job_traces) > MAX_TRACES:
+            job_traces.popitem(last=False)
+    _local.trace = trace
+    JOBS_IN_PROGRESS.inc(kind=kind)
+    try:
+        yield trace
+    finally:
+        _local.trace = None
+        JOBS_IN_PROGRESS.dec(kind=kind)
+        if trace.status == 'running':
+            trace.status = 'finished'
+        logger.info(json.dumps({'event': 'job_trace', 'job_id': job_id, 'kind': kind, 'status': trace.status,
+                                'totals': trace.totals()}))
+
+
+def traced_job(kind):
+    """Decorator untuk fungsi job(job_id, ...) agar semua span di dalamnya masuk trace job"""
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(job_id, *args, **kwargs):
+            with job_trace(job_id, kind):
+                return func(job_id, *args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def record_span(stage, seconds, started=None, **attrs):
+    """Catat durasi yang diukur sendiri (misal waktu tunggu antrean)"""
+    STAGE_SECONDS.observe(seconds, stage=stage)
+    trace = current_trace()
+    if trace is not None:
+        trace.add(stage, started if started is not None else time.perf_counter() - seconds, seconds, attrs)
+
+
+@contextmanager
+def span(stage, **attrs):
+    """Ukur satu tahap: masuk histogram whisper_stage_seconds dan trace job yang aktif"""
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        record_span(stage, time.perf_counter() - started, started, **attrs)
+
+
+def timed(stage):
+    """Decorator versi span() untuk method/fungsi"""
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            with span(stage):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def set_job_status(status):
+    trace = current_trace()
+    if trace is not None:
+        trace.status = status
+
+
+def get_trace(job_id):
+    with _traces_lock:
+        trace = job_traces.get(job_id)
+    return trace.to_dict() if trace else None
@@ -0,0 +1,133 @@
+# model_policy.py
+import logging
+import os
+import threading
+from eta import rtf_estimator
+import metrics
+
+logger = logging.getLogger(__name__)
+
+# Ukuran model Whisper dari yang paling ringan; perkiraan biaya relatif (base = 1) dipakai
+# sebelum ukuran tersebut pernah diukur di host ini
+MODEL_SIZES = ('tiny', 'base', 'small', 'medium', 'large')
+SIZE_COST = {'tiny': 0.5, 'base': 1.0, 'small': 2.5, 'medium': 6.0, 'large': 12.0}
+
+# 'adaptive' = pilih per job, 'fixed' = selalu ukuran default (perilaku lama)
+MODEL_POLICY = os.environ.get('WHISPER_MODEL_POLICY', 'adaptive')
+# Paksa satu ukuran model (mengabaikan policy)
+FIXED_MODEL_SIZE = os.environ.get('WHISPER_MODEL_SIZE')
+# Batas bawah/atas ukuran yang boleh dipilih; kosong = tiny / satu tingkat di atas default
+MIN_MODEL_SIZE = os.environ.get('WHISPER_MIN_MODEL_SIZE', 'tiny')
+MAX_MODEL_SIZE = os.environ.get('WHISPER_MAX_MODEL_SIZE')
+# Target waktu selesai job (menit) termasuk antrean job yang sedang berjalan
+JOB_DEADLINE_MINUTES = float(os.environ.get('TRANSCRIPTION_DEADLINE_MINUTES', 30))
+# Durasi yang diasumsikan untuk job yang durasinya belum diketahui (transkripsi streaming)
+UNKNOWN_DURATION_MINUTES = float(os.environ.get('TRANSCRIPTION_UNKNOWN_DURATION_MINUTES', 30))
+
+
+def default_model_size(gpu):
+    return 'small' if gpu else 'base'
+
+
+class ModelPolicy:
+    """
+    Pilih ukuran model Whisper per job.
+
+    Perkiraan waktu selesai = sisa pekerjaan job yang sedang berjalan + durasi file x RTF
+    ukuran tersebut di host ini. Dipilih ukuran terbesar yang masih memenuhi deadline;
+    saat antrean panjang job baru turun ke model lebih kecil, saat kosong naik hingga
+    MAX_MODEL_SIZE.
+
+    Job yang durasinya belum diketahui (upload streaming) dihitung sepanjang
+    UNKNOWN_DURATION_MINUTES; jika audio yang sudah diproses melewati asumsi itu, sisa
+    durasinya diasumsikan sama panjang dengan yang sudah diproses (lihat job_progress).
+    """
+
+    def __init__(self, deadline_seconds=JOB_DEADLINE_MINUTES * 60, policy=MODEL_POLICY,
+                 min_size=MIN_MODEL_SIZE, max_size=MAX_MODEL_SIZE, fixed_size=FIXED_MODEL_SIZE,
+                 unknown_duration=UNKNOWN_DURATION_MINUTES * 60):
+        for size in (min_size, max_size, fixed_size):
+            if size and size not in MODEL_SIZES:
+                raise Exception(f"Ukuran model Whisper tidak valid: {size}")
+        if policy not in ('adaptive', 'fixed'):
+            raise Exception(f"WHISPER_MODEL_POLICY tidak valid: {policy}")
+        self.deadline_seconds = deadline_seconds
+        self.policy = policy
+        self.min_size = min_size
+        self.max_size = max_size
+        self.fixed_size = fixed_size
+        self.unknown_duration = unknown_duration
+        self.active = {}
+        # Job dengan durasi belum diketahui: job_id -> (durasi yang diasumsikan, rtf)
+        self.open_ended = {}
+        self._lock = threading.Lock()
+
+    def candidates(self, gpu):
+        """Ukuran yang boleh dipilih, dari yang terbesar"""
+        default_index = MODEL_SIZES.index(default_model_size(gpu))
+        max_index = MODEL_SIZES.index(self.max_size) if self.max_size else default_index + 1
+        min_index = min(MODEL_SIZES.index(self.min_size), max_index)
+        return list(reversed(MODEL_SIZES[min_index:max_index + 1]))
+
+    def rtf(self, model_size, gpu, chunk_count=None):
+        """RTF ukuran model di host ini; ukuran yang belum pernah diukur diskalakan dari ukuran default"""
+        rtf, source = rtf_estimator.estimate(model_size, gpu, chunk_count)
+        if source == 'default':
+            reference = default_model_size(gpu)
+            if reference != model_size:
+                rtf, _ = rtf_estimator.estimate(reference, gpu, chunk_count)
+            rtf *= SIZE_COST[model_size] / SIZE_COST[reference]
+        return rtf
+
+    def backlog_seconds(self):
+        """Perkiraan sisa waktu proses semua job yang sedang berjalan"""
+        with self._lock:
+            return sum(self.active.values())
+
+    def choose(self, duration, gpu, chunk_count=None):
+        """
+        Returns:
+            tuple: (ukuran model, alasan)
+        """
+        if self.fixed_size:
+            return self.fixed_size, 'fixed'
+        if self.policy == 'fixed':
+            return default_model_size(gpu), 'fixed'
+
+        backlog = self.backlog_seconds()
+        candidates = self.candidates(gpu)
+        assumed = '' if duration else f", durasi diasumsikan {self.unknown_duration / 60:.0f} menit"
+        for model_size in candidates:
+            predicted = backlog + (duration or self.unknown_duration) * self.rtf(model_size, gpu, chunk_count)
+            if predicted <= self.deadline_seconds:
+                return model_size, f"perkiraan selesai {predicted / 60:.1f} menit{assumed}"
+        return candidates[-1], f"tidak ada ukuran yang memenuhi deadline (antrean {backlog / 60:.1f} menit)"
+
+    def job_started(self, job_id, model_size, duration, gpu):
+        """Daftarkan job ke antrean aktif (perkiraan waktu prosesnya dipakai job berikutnya)"""
+        rtf = self.rtf(model_size, gpu)
+        with self._lock:
+            if duration:
+                self.active[job_id] = duration * rtf
+            else:
+                self.open_ended[job_id] = (self.unknown_duration, rtf)
+                self.active[job_id] = self.unknown_duration * rtf
+        metrics.MODEL_SELECTIONS.inc(model_size=model_size)
+
+    def job_progress(self, job_id, audio_seconds):
+        """Perbarui perkiraan job berdurasi belum diketahui dari audio yang sudah diproses"""
+        with self._lock:
+            entry = self.open_ended.get(job_id)
+            if not entry or audio_seconds < entry[0]:
+                return
+            assumed = audio_seconds * 2
+            self.open_ended[job_id] = (assumed, entry[1])
+            self.active[job_id] = assumed * entry[1]
+
+    def job_finished(self, job_id):
+        with self._lock:
+            self.active.pop(job_id, None)
+            self.open_ended.pop(job_id, None)
+
+
+model_policy = ModelPolicy()
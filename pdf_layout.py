@@ -0,0 +1,377 @@
+# pdf_layout.py
+import os
+import re
+import logging
+from datetime import datetime
+from functools import lru_cache
+from fpdf import FPDF
+from fpdf.enums import XPos, YPos
+from report_formatter import Run
+
+logger = logging.getLogger(__name__)
+# Subsetting font fontTools sangat ramai di level INFO
+logging.getLogger('fontTools').setLevel(logging.WARNING)
+
+# Kandidat font TTF (Unicode) per gaya; yang pertama ditemukan dipakai.
+# Bisa diganti lewat env PDF_FONT_PATH, PDF_FONT_BOLD_PATH, PDF_FONT_ITALIC_PATH,
+# PDF_FONT_BOLD_ITALIC_PATH dan PDF_MONO_FONT_PATH.
+FONT_CANDIDATES = {
+    'sans': {
+        '': ['/usr/share/fonts/truetype/dejavu/DejaVuSans.ttf',
+             '/usr/share/fonts/truetype/liberation/LiberationSans-Regular.ttf',
+             '/usr/share/fonts/truetype/noto/NotoSans-Regular.ttf',
+             '/Library/Fonts/Arial.ttf',
+             'C:\\Windows\\Fonts\\arial.ttf'],
+        'B': ['/usr/share/fonts/truetype/dejavu/DejaVuSans-Bold.ttf',
+              '/usr/share/fonts/truetype/liberation/LiberationSans-Bold.ttf',
+              '/usr/share/fonts/truetype/noto/NotoSans-Bold.ttf',
+              '/Library/Fonts/Arial Bold.ttf',
+              'C:\\Windows\\Fonts\\arialbd.ttf'],
+        'I': ['/usr/share/fonts/truetype/dejavu/DejaVuSans-Oblique.ttf',
+              '/usr/share/fonts/truetype/liberation/LiberationSans-Italic.ttf',
+              '/usr/share/fonts/truetype/noto/NotoSans-Italic.ttf',
+              '/Library/Fonts/Arial Italic.ttf',
+              'C:\\Windows\\Fonts\\ariali.ttf'],
+        'BI': ['/usr/share/fonts/truetype/dejavu/DejaVuSans-BoldOblique.ttf',
+               '/usr/share/fonts/truetype/liberation/LiberationSans-BoldItalic.ttf',
+               '/usr/share/fonts/truetype/noto/NotoSans-BoldItalic.ttf',
+               '/Library/Fonts/Arial Bold Italic.ttf',
+               'C:\\Windows\\Fonts\\arialbi.ttf'],
+    },
+    'mono': {
+        '': ['/usr/share/fonts/truetype/dejavu/DejaVuSansMono.ttf',
+             '/usr/share/fonts/truetype/liberation/LiberationMono-Regular.ttf',
+             '/Library/Fonts/Courier New.ttf',
+             'C:\\Windows\\Fonts\\cour.ttf'],
+    },
+}
+
+FONT_ENV = {
+    ('sans', ''): 'PDF_FONT_PATH',
+    ('sans', 'B'): 'PDF_FONT_BOLD_PATH',
+    ('sans', 'I'): 'PDF_FONT_ITALIC_PATH',
+    ('sans', 'BI'): 'PDF_FONT_BOLD_ITALIC_PATH',
+    ('mono', ''): 'PDF_MONO_FONT_PATH',
+}
+
+# Font inti PDF (hanya latin-1) jika tidak ada TTF
+CORE_FAMILIES = {'sans': 'Helvetica', 'mono': 'Courier'}
+
+# Ukuran (pt) dan jarak (mm)
+BODY_SIZE = 11
+CODE_SIZE = 9
+TITLE_SIZE = 16
+HEADING_SIZES = {1: 15, 2: 13.5, 3: 12.5}
+LINE_SPACING = 1.35
+PARAGRAPH_GAP = 1.8
+LIST_INDENT = 6
+MARGIN = 18
+PT_TO_MM = 0.3528
+
+TOKEN_RE = re.compile(r'\s+|\S+')
+
+
+@lru_cache(maxsize=None)
+def find_fonts():
+    """
+    Cari file TTF untuk setiap gaya.
+
+    Returns:
+        dict: {(group, style): path} hanya untuk gaya yang ditemukan
+    """
+    fonts = {}
+    for group, styles in FONT_CANDIDATES.items():
+        for style, candidates in styles.items():
+            env_path = os.environ.get(FONT_ENV[(group, style)])
+            for path in ([env_path] if env_path else []) + candidates:
+                if os.path.isfile(path):
+                    fonts[(group, style)] = path
+                    break
+    return fonts
+
+
+class PDFLayout:
+    """
+    Layout PDF berbasis paragraf untuk blok hasil report_formatter.parse_report.
+
+    Teks dibungkus per kata berdasarkan lebar glyph dari font TTF yang di-embed
+    (lebar tiap kata di-cache), lalu ditulis baris demi baris dengan indentasi
+    gantung untuk list. Tanpa TTF, dipakai font inti PDF dengan teks latin-1.
+
+    Tujuannya tata letak dan dukungan Unicode, bukan kecepatan: dengan TTF yang di-embed,
+    parsing dan subsetting font membuat waktu render sedikit lebih lama dari renderer lama
+    (lihat benchmarks/bench_pdf_layout.py).
+    """
+
+    def __init__(self):
+        self.pdf = FPDF()
+        self.pdf.set_margins(MARGIN, MARGIN, MARGIN)
+        self.pdf.set_auto_page_break(auto=True, margin=MARGIN)
+        self.families = {}
+        self.unicode_families = set()
+        self._font_files = {}
+        self._registered = set()
+        self._widths = {}
+        self._find_families()
+        self.pdf.add_page()
+
+    def _find_families(self):
+        fonts = find_fonts()
+        for group in CORE_FAMILIES:
+            if (group, '') not in fonts:
+                self.families[group] = CORE_FAMILIES[group]
+                continue
+            family = f"Report{group.capitalize()}"
+            for (font_group, style), path in fonts.items():
+                if font_group == group:
+                    self._font_files[(family, style)] = path
+            self.families[group] = family
+            self.unicode_families.add(family)
+        if 'ReportSans' not in self.unicode_families:
+            logger.warning("Font TTF tidak ditemukan, PDF memakai font inti (hanya latin-1). "
+                           "Set PDF_FONT_PATH untuk dukungan Unicode.")
+
+    def _set_font(self, font):
+        """set_font; file TTF baru di-parse saat gaya itu pertama kali dipakai"""
+        family, style, size = font
+        if family in self.unicode_families and (family, style) not in self._registered:
+            self.pdf.add_font(family, style, self._font_files[(family, style)])
+            self._registered.add((family, style))
+        self.pdf.set_font(family, style, size)
+
+    @property
+    def bullet(self):
+        return '•' if self.families['sans'] in self.unicode_families else '-'
+
+    def _text(self, family, text):
+        if family in self.unicode_families:
+            return text
+        return text.encode('latin-1', 'replace').decode('latin-1')
+
+    def _font(self, run_style, size):
+        """(family, style, size) untuk satu potongan teks"""
+        family = self.families['mono' if run_style[2] else 'sans']
+        style = ('B' if run_style[0] else '') + ('I' if run_style[1] else '')
+        if family in self.unicode_families:
+            # Gaya tanpa file TTF turun ke gaya terdekat yang ada (BI -> B -> regular)
+            while style and (family, style) not in self._font_files:
+                style = style[:-1]
+        return family, style, size
+
+    def _width(self, font, text):
+        """Lebar teks (mm) dengan cache per font dan kata"""
+        key = (font, text)
+        width = self._widths.get(key)
+        if width is None:
+            self._set_font(font)
+            width = self.pdf.get_string_width(text)
+            self._widths[key] = width
+        return width
+
+    def _words(self, runs, bold=False, italic=False, size=BODY_SIZE):
+        """
+        Pecah runs menjadi kata; satu kata bisa terdiri dari beberapa potongan
+        dengan gaya berbeda (misal '**tebal**,').
+
+        Returns:
+            list: (space_width, [(font, text, width), ...]) per kata
+        """
+        words = []
+        pieces = []
+        space_width = 0
+        for run in runs:
+            font = self._font((run.bold or bold, run.italic or italic, run.code), size)
+            for token in TOKEN_RE.findall(self._text(font[0], run.text)):
+                if token.isspace():
+                    if pieces:
+                        words.append((space_width, pieces))
+                        pieces = []
+                    space_width = self._width(font, ' ')
+                else:
+                    pieces.append((font, token, self._width(font, token)))
+        if pieces:
+            words.append((space_width, pieces))
+        return words
+
+    def _split_piece(self, font, text, max_width):
+        """Potong kata yang lebih panjang dari satu baris per karakter"""
+        parts = []
+        current = ''
+        current_width = 0
+        for char in text:
+            char_width = self._width(font, char)
+            if current and current_width + char_width > max_width:
+                parts.append((font, current, current_width))
+                current = ''
+                current_width = 0
+            current += char
+            current_width += char_width
+        if current:
+            parts.append((font, current, current_width))
+        return parts
+
+    def wrap(self, words, max_width):
+        """
+        Bungkus kata secara greedy ke baris dengan lebar maksimum.
+
+        Returns:
+            list: Baris berupa daftar (font, text, width)
+        """
+        lines = []
+        line = []
+        line_width = 0
+        for space_width, pieces in words:
+            word_width = sum(piece[2] for piece in pieces)
+            if line and line_width + space_width + word_width <= max_width:
+                font = line[-1][0]
+                line.append((font, ' ', space_width))
+                line.extend(pieces)
+                line_width += space_width + word_width
+                continue
+            if line:
+                lines.append(line)
+            line = []
+            line_width = 0
+            if word_width <= max_width:
+                line = list(pieces)
+                line_width = word_width
+                continue
+            # Kata terlalu panjang (URL, dsb.) dipotong paksa
+            for font, text, _ in pieces:
+                for part in self._split_piece(font, text, max_width):
+                    if line and line_width + part[2] > max_width:
+                        lines.append(line)
+                        line = []
+                        line_width = 0
+                    line.append(part)
+                    line_width += part[2]
+        if line:
+            lines.append(line)
+        return lines
+
+    def _emit_line(self, line, x, line_height, marker=None):
+        """
+        Tulis satu baris yang sudah dibungkus.
+
+        Posisi tiap potongan dihitung dari lebar ter-cache dan teks ditulis dengan pdf.text
+        di posisi tersebut.
+        """
+        pdf = self.pdf
+        if pdf.will_page_break(line_height):
+            pdf.add_page()
+        top = pdf.get_y()
+        if marker:
+            marker_font, marker_text, marker_x = marker
+            self._set_font(marker_font)
+            pdf.text(marker_x, top + line_height / 2 + marker_font[2] * PT_TO_MM * 0.3, marker_text)
+
+        # Gabungkan potongan bergaya sama agar jumlah operasi teks minimal
+        merged = []
+        for font, text, width in line:
+            if merged and merged[-1][0] == font:
+                merged[-1][1].append(text)
+                merged[-1][2] += width
+            else:
+                merged.append([font, [text], width])
+        for font, texts, width in merged:
+            self._set_font(font)
+            pdf.text(x, top + line_height / 2 + font[2] * PT_TO_MM * 0.3, ''.join(texts))
+            x += width
+        pdf.ln(line_height)
+
+    def paragraph(self, runs, size=BODY_SIZE, bold=False, italic=False, indent=0, marker=None,
+                  gap=PARAGRAPH_GAP):
+        """
+        Tulis satu paragraf.
+
+        Args:
+            runs (list): Run teks
+            indent (float): Indentasi kiri (mm)
+            marker (str): Penanda list ('•', '3.') yang digantung di kiri teks
+        """
+        pdf = self.pdf
+        line_height = size * PT_TO_MM * LINE_SPACING
+        x = pdf.l_margin + indent
+        first_marker = None
+        text_x = x
+        if marker:
+            marker_font = self._font((bold, False, False), size)
+            marker_text = self._text(marker_font[0], marker)
+            text_x = x + max(LIST_INDENT, self._width(marker_font, marker_text) + 2)
+            first_marker = (marker_font, marker_text, x)
+
+        lines = self.wrap(self._words(runs, bold, italic, size), pdf.w - pdf.r_margin - text_x)
+        for number, line in enumerate(lines):
+            self._emit_line(line, text_x, line_height, first_marker if number == 0 else None)
+        pdf.ln(gap)
+
+    def title(self, text):
+        pdf = self.pdf
+        self._set_font(self._font((True, False, False), TITLE_SIZE))
+        pdf.multi_cell(0, TITLE_SIZE * 0.5, self._text(self.families['sans'], text), align='C',
+                       new_x=XPos.LMARGIN, new_y=YPos.NEXT)
+        pdf.ln(2)
+        self._set_font(self._font((False, False, False), 9))
+        pdf.set_text_color(110, 110, 110)
+        pdf.cell(0, 5, f'Dibuat pada: {datetime.now().strftime("%d %B %Y, %H:%M:%S")}', align='C',
+                 new_x=XPos.LMARGIN, new_y=YPos.NEXT)
+        pdf.set_text_color(0, 0, 0)
+        pdf.ln(6)
+
+    def code(self, text):
+        """Blok kode: monospace, latar abu-abu, baris asli dipertahankan"""
+        pdf = self.pdf
+        family = self.families['mono']
+        self._set_font(self._font((False, False, True), CODE_SIZE))
+        pdf.set_fill_color(242, 242, 242)
+        pdf.multi_cell(0, CODE_SIZE * 0.45, self._text(family, text), fill=True, align='L',
+                       new_x=XPos.LMARGIN, new_y=YPos.NEXT, padding=(1.5, 2))
+        pdf.ln(PARAGRAPH_GAP)
+
+    def rule(self):
+        pdf = self.pdf
+        pdf.ln(1)
+        pdf.set_draw_color(180, 180, 180)
+        pdf.line(pdf.l_margin, pdf.get_y(), pdf.w - pdf.r_margin, pdf.get_y())
+        pdf.ln(3)
+
+    def render(self, title, blocks):
+        """Tulis judul dan semua blok laporan"""
+        self.title(title)
+        for block in blocks:
+            if block.kind == 'heading':
+                size = HEADING_SIZES.get(block.level, BODY_SIZE + 0.5)
+                self.pdf.ln(2)
+                self.paragraph(block.runs, size=size, bold=True, gap=1)
+            elif block.kind == 'bullet':
+                self.paragraph(block.runs, indent=block.level * LIST_INDENT, marker=self.bullet, gap=0.8)
+            elif block.kind == 'numbered':
+                self.paragraph(block.runs, indent=block.level * LIST_INDENT,
+                               marker=f'{block.number}.', gap=0.8)
+            elif block.kind == 'quote':
+                self.paragraph(block.runs, italic=True, indent=LIST_INDENT)
+            elif block.kind == 'code':
+                self.code(''.join(run.text for run in block.runs))
+            elif block.kind == 'rule':
+                self.rule()
+            elif block.kind == 'think':
+                self.paragraph([Run('Proses Berpikir')], bold=True, gap=0.5)
+                self.pdf.set_text_color(90, 90, 90)
+                for text in block.runs[0].text.split('\n'):
+                    if text.strip():
+                        self.paragraph([Run(text.strip())], size=BODY_SIZE - 1, italic=True,
+                                       indent=LIST_INDENT, gap=1)
+                self.pdf.set_text_color(0, 0, 0)
+            else:
+                self.paragraph(block.runs)
+
+    def output(self, output_path):
+        self.pdf.output(output_path)
+
+
+def render_pdf(title, blocks, output_path):
+    """Render blok laporan ke file PDF"""
+    layout = PDFLayout()
+    layout.render(title, blocks)
+    layout.output(output_path)
+    return output_path
@@ -0,0 +1,275 @@
+# profiling.py
+import cProfile
+import functools
+import io
+import json
+import logging
+import os
+import pstats
+import shutil
+import sys
+import threading
+import time
+from contextlib import contextmanager
+
+logger = logging.getLogger(__name__)
+
+# Folder artefak profil: <PROFILES_FOLDER>/<kind>-<job_id>/
+PROFILES_FOLDER = os.environ.get('PROFILES_DIR', 'profiles')
+# Interval stack sampler (detik)
+SAMPLE_INTERVAL = float(os.environ.get('PROFILE_SAMPLE_INTERVAL_MS', 10)) / 1000
+# Jumlah chunk inferensi pertama yang diprofil dengan torch.profiler (overhead besar)
+TORCH_PROFILE_CHUNKS = int(os.environ.get('PROFILE_TORCH_CHUNKS', 2))
+# Jumlah fungsi teratas di ringkasan cProfile
+CPROFILE_TOP = 60
+
+_requested = set()
+_requested_lock = threading.Lock()
+_local = threading.local()
+
+
+def flag_enabled(value):
+    """Nilai flag dari form/query/JSON ('1', 'true', 'on', True)"""
+    return str(value).lower() in ('1', 'true', 'on', 'yes')
+
+
+def request_profile(job_id):
+    """Tandai job agar dijalankan dengan profiler saat mulai diproses"""
+    with _requested_lock:
+        _requested.add(job_id)
+
+
+def _take_request(job_id):
+    with _requested_lock:
+        if job_id in _requested:
+            _requested.discard(job_id)
+            return True
+    return False
+
+
+def current_session():
+    return getattr(_local, 'session', None)
+
+
+class StackSampler(threading.Thread):
+    """
+    Sampler stack berkala untuk thread yang terdaftar.
+
+    Hasilnya dalam format "folded" (frame;frame;frame jumlah) yang bisa langsung
+    dibaca flamegraph.pl / speedscope.
+    """
+
+    def __init__(self, interval=SAMPLE_INTERVAL):
+        super().__init__(daemon=True)
+        self.interval = interval
+        self.thread_ids = set()
+        self.stacks = {}
+        self.samples = 0
+        self._stop_event = threading.Event()
+
+    def run(self):
+        while not self._stop_event.wait(self.interval):
+            frames = sys._current_frames()
+            for thread_id in list(self.thread_ids):
+                frame = frames.get(thread_id)
+                if frame is None:
+                    continue
+                stack = []
+                while frame is not None:
+                    code = frame.f_code
+                    stack.append(f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})")
+                    frame = frame.f_back
+                key = ';'.join(reversed(stack))
+                self.stacks[key] = self.stacks.get(key, 0) + 1
+                self.samples += 1
+
+    def stop(self):
+        self._stop_event.set()
+        self.join()
+
+    def write(self, path):
+        with open(path, 'w', encoding='utf-8') as f:
+            for stack, count in sorted(self.stacks.items(), key=lambda item: item[1], reverse=True):
+                f.write(f"{stack} {count}\n")
+
+
+class ProfileSession:
+    """Profil satu job: cProfile di thread job, stack sampler, dan torch.profiler untuk inferensi"""
+
+    def __init__(self, kind, job_id, root=PROFILES_FOLDER):
+        self.kind = kind
+        self.job_id = job_id
+        self.name = f"{kind}-{job_id}"
+        self.path = os.path.join(root, self.name)
+        self.torch_chunks_left = TORCH_PROFILE_CHUNKS
+        self.torch_tables = []
+        self.profiler = cProfile.Profile()
+        self.sampler = StackSampler()
+        self.started_at = time.time()
+        self._lock = threading.Lock()
+
+    def start(self):
+        os.makedirs(self.path, exist_ok=True)
+        self.sampler.thread_ids.add(threading.get_ident())
+        self.sampler.start()
+        try:
+            self.profiler.enable()
+        except ValueError as e:
+            # Profiler lain sudah aktif (job lain yang diprofil); stack sampler tetap jalan
+            logger.warning(f"cProfile tidak bisa dipakai untuk job {self.job_id}: {e}")
+            self.profiler = None
+
+    def stop(self):
+        if self.profiler:
+            self.profiler.disable()
+        self.sampler.stop()
+        self.save()
+
+    def save(self):
+        if self.profiler:
+            self.profiler.dump_stats(os.path.join(self.path, 'cprofile.prof'))
+            summary = io.StringIO()
+            pstats.Stats(self.profiler, stream=summary).sort_stats('cumulative').print_stats(CPROFILE_TOP)
+            with open(os.path.join(self.path, 'cprofile.txt'), 'w', encoding='utf-8') as f:
+                f.write(summary.getvalue())
+        self.sampler.write(os.path.join(self.path, 'stacks.folded'))
+        if self.torch_tables:
+            with open(os.path.join(self.path, 'torch_ops.txt'), 'w', encoding='utf-8') as f:
+                f.write('\n\n'.join(self.torch_tables))
+
+        meta = {
+            'kind': self.kind,
+            'job_id': self.job_id,
+            'started_at': self.started_at,
+            'seconds': round(time.time() - self.started_at, 3),
+            'samples': self.sampler.samples,
+            'sample_interval': self.sampler.interval,
+            'torch_chunks': len(self.torch_tables)
+        }
+        with open(os.path.join(self.path, 'meta.json'), 'w', encoding='utf-8') as f:
+            json.dump(meta, f, indent=2)
+        logger.info(f"🔬 Profil job {self.job_id} disimpan di {self.path}")
+
+    def claim_torch_chunk(self):
+        with self._lock:
+            if self.torch_chunks_left <= 0:
+                return None
+            self.torch_chunks_left -= 1
+            return TORCH_PROFILE_CHUNKS - self.torch_chunks_left
+
+
+@contextmanager
+def job_profile(kind, job_id, enabled=True):
+    """Jalankan blok di bawah profiler jika enabled; session yang sudah aktif di thread ini dipakai ulang"""
+    if not enabled or current_session() is not None:
+        yield current_session()
+        return
+
+    session = ProfileSession(kind, job_id)
+    _local.session = session
+    session.start()
+    try:
+        yield session
+    finally:
+        _local.session = None
+        try:
+            session.stop()
+        except Exception as e:
+            logger.error(f"Gagal menyimpan profil job {job_id}: {e}")
+
+
+def profiled_job(kind):
+    """Decorator fungsi job(job_id, ...): diprofil jika request_profile(job_id) dipanggil sebelumnya"""
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(job_id, *args, **kwargs):
+            with job_profile(kind, job_id, enabled=_take_request(job_id)):
+                return func(job_id, *args, **kwargs)
+        return wrapper
+    return decorator
+
+
+@contextmanager
+def attached(session):
+    """Ikutkan thread ini (misal worker pool) ke stack sampler session"""
+    if session is None:
+        yield
+        return
+    thread_id = threading.get_ident()
+    session.sampler.thread_ids.add(thread_id)
+    try:
+        yield
+    finally:
+        session.sampler.thread_ids.discard(thread_id)
+
+
+@contextmanager
+def torch_ops():
+    """Profil operator torch untuk beberapa chunk inferensi pertama dari job yang diprofil"""
+    session = current_session()
+    index = session.claim_torch_chunk() if session else None
+    if index is None:
+        yield
+        return
+    try:
+        import torch
+        from torch.profiler import profile, ProfilerActivity
+    except ImportError:
+        yield
+        return
+
+    activities = [ProfilerActivity.CPU]
+    if torch.cuda.is_available():
+        activities.append(ProfilerActivity.CUDA)
+    with profile(activities=activities) as prof:
+        yield
+    sort_key = 'cuda_time_total' if len(activities) > 1 else 'cpu_time_total'
+    session.torch_tables.append(f"# Chunk {index}\n" + prof.key_averages().table(sort_by=sort_key, row_limit=40))
+    prof.export_chrome_trace(os.path.join(session.path, f"torch_trace_{index}.json"))
+
+
+def list_profiles(root=PROFILES_FOLDER):
+    """Daftar profil tersimpan (terbaru dulu): dict name, meta dan files (nama, ukuran)"""
+    if not os.path.isdir(root):
+        return []
+    profiles = []
+    for name in os.listdir(root):
+        path = os.path.join(root, name)
+        if not os.path.isdir(path):
+            continue
+        meta = {}
+        try:
+            with open(os.path.join(path, 'meta.json'), encoding='utf-8') as f:
+                meta = json.load(f)
+        except (OSError, ValueError):
+            pass
+        files = sorted((file, os.path.getsize(os.path.join(path, file))) for file in os.listdir(path))
+        profiles.append({'name': name, 'meta': meta, 'files': files,
+                         'modified': os.path.getmtime(path)})
+    profiles.sort(key=lambda profile: profile['modified'], reverse=True)
+    return profiles
+
+
+def profile_path(name, root=PROFILES_FOLDER):
+    """
+    Path folder satu profil, atau None jika nama tidak valid.
+
+    Nama kosong, '.' dan '..' ditolak; path hasil harus tepat satu tingkat di bawah root
+    agar tidak bisa menunjuk root itu sendiri atau folder di luarnya.
+    """
+    name = os.path.basename(name or '')
+    if name in ('', '.', '..'):
+        return None
+    root = os.path.abspath(root)
+    path = os.path.abspath(os.path.join(root, name))
+    if os.path.dirname(path) != root:
+        return None
+    return path
+
+
+def delete_profile(name, root=PROFILES_FOLDER):
+    path = profile_path(name, root)
+    if path and os.path.isdir(path):
+        shutil.rmtree(path)
+        return True
+    return False
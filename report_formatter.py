@@ -0,0 +1,154 @@
+# report_formatter.py
+import re
+from collections import namedtuple
+
+# Potongan teks inline dengan format
+Run = namedtuple('Run', ['text', 'bold', 'italic', 'code'], defaults=(False, False, False))
+
+# Blok dokumen hasil parsing markdown
+# kind: heading, paragraph, bullet, numbered, quote, code, rule, think
+# level: level heading (1-6) atau kedalaman indentasi list (0, 1, ...)
+# number: nomor item untuk list bernomor
+Block = namedtuple('Block', ['kind', 'runs', 'level', 'number'], defaults=(0, None))
+
+# Satu regex per baris; grup yang cocok menentukan jenis blok
+LINE_RE = re.compile(r'''^(?:
+      (?P<fence>\s*```.*)
+    | \s{0,3}(?P<hashes>\#{1,6})\s+(?P<heading>.+?)(?:\s+\#+)?\s*
+    | (?P<rule>\s{0,3}(?:(?:-\s*){3,}|(?:\*\s*){3,}|(?:_\s*){3,}))
+    | (?P<bindent>[ \t]*)[-*+]\s+(?P<bullet>.+)
+    | (?P<nindent>[ \t]*)(?P<number>\d+)[.)]\s+(?P<numbered>.+)
+    | \s*>\s?(?P<quote>.*)
+)$''', re.VERBOSE)
+
+INLINE_RE = re.compile(
+    r'\*\*(?P<bold>.+?)\*\*'
+    r'|__(?P<bold2>.+?)__'
+    r'|(?<![\w*])\*(?P<italic>[^*\s](?:[^*]*?[^*\s])?)\*(?![\w*])'
+    r'|`(?P<code>[^`]+)`'
+)
+
+THINK_OPEN = '<think>'
+THINK_CLOSE = '</think>'
+
+
+def parse_inline(text):
+    """Pecah teks satu baris menjadi Run (bold/italic/code)"""
+    runs = []
+    position = 0
+    for match in INLINE_RE.finditer(text):
+        if match.start() > position:
+            runs.append(Run(text[position:match.start()]))
+        if match.group('bold') is not None:
+            runs.append(Run(match.group('bold'), bold=True))
+        elif match.group('bold2') is not None:
+            runs.append(Run(match.group('bold2'), bold=True))
+        elif match.group('italic') is not None:
+            runs.append(Run(match.group('italic'), italic=True))
+        else:
+            runs.append(Run(match.group('code'), code=True))
+        position = match.end()
+    if position < len(text):
+        runs.append(Run(text[position:]))
+    return runs
+
+
+def plain_text(runs):
+    """Gabungkan Run menjadi teks biasa"""
+    return ''.join(run.text for run in runs)
+
+
+def _indent_level(indent):
+    return len(indent.replace('\t', '    ')) // 2
+
+
+def parse_report(content):
+    """
+    Parse konten laporan markdown menjadi daftar Block dalam satu kali jalan.
+
+    Dipakai bersama oleh writer DOCX dan PDF sehingga format cukup dihitung sekali.
+
+    Args:
+        content (str): Konten laporan mentah (markdown, boleh berisi <think>)
+
+    Returns:
+        list: Daftar Block
+    """
+    blocks = []
+    code_lines = None
+    think_lines = None
+
+    lines = content.replace('\r\n', '\n').replace('\r', '\n').split('\n')
+    index = 0
+    while index < len(lines):
+        line = lines[index]
+        index += 1
+
+        # Di dalam blok <think>
+        if think_lines is not None:
+            close_at = line.find(THINK_CLOSE)
+            if close_at < 0:
+                think_lines.append(line)
+                continue
+            think_lines.append(line[:close_at])
+            think_text = '\n'.join(think_lines).strip()
+            if think_text:
+                blocks.append(Block('think', [Run(think_text)]))
+            think_lines = None
+            # Sisa baris setelah </think> diproses sebagai baris biasa
+            rest = line[close_at + len(THINK_CLOSE):]
+            if rest.strip():
+                lines.insert(index, rest)
+            continue
+
+        # Di dalam code fence
+        if code_lines is not None:
+            if line.lstrip().startswith('```'):
+                blocks.append(Block('code', [Run('\n'.join(code_lines), code=True)]))
+                code_lines = None
+            else:
+                code_lines.append(line)
+            continue
+
+        open_at = line.find(THINK_OPEN)
+        if open_at >= 0:
+            # Teks sebelum <think> tetap diproses, sisanya masuk ke blok think
+            before = line[:open_at]
+            lines.insert(index, line[open_at + len(THINK_OPEN):])
+            think_lines = []
+            if before.strip():
+                line = before
+                # Blok think mulai di baris berikutnya (sisa baris sudah disisipkan)
+            else:
+                continue
+
+        line = line.rstrip()
+        if not line:
+            continue
+
+        match = LINE_RE.match(line)
+        if match is None:
+            blocks.append(Block('paragraph', parse_inline(line.strip())))
+        elif match.group('fence') is not None:
+            code_lines = []
+        elif match.group('heading') is not None:
+            blocks.append(Block('heading', parse_inline(match.group('heading')), len(match.group('hashes'))))
+        elif match.group('rule') is not None:
+            blocks.append(Block('rule', []))
+        elif match.group('bullet') is not None:
+            blocks.append(Block('bullet', parse_inline(match.group('bullet')), _indent_level(match.group('bindent'))))
+        elif match.group('numbered') is not None:
+            blocks.append(Block('numbered', parse_inline(match.group('numbered')),
+                                _indent_level(match.group('nindent')), int(match.group('number'))))
+        else:
+            blocks.append(Block('quote', parse_inline(match.group('quote'))))
+
+    # Blok yang tidak ditutup tetap dimasukkan
+    if code_lines:
+        blocks.append(Block('code', [Run('\n'.join(code_lines), code=True)]))
+    if think_lines:
+        think_text = '\n'.join(think_lines).strip()
+        if think_text:
+            blocks.append(Block('think', [Run(think_text)]))
+
+    return blocks
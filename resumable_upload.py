@@ -0,0 +1,302 @@
+# resumable_upload.py
+import hashlib
+import json
+import logging
+import os
+import subprocess
+import threading
+import time
+import uuid
+
+logger = logging.getLogger(__name__)
+
+# Ukuran potongan baca dari request stream
+STREAM_READ_SIZE = 1024 * 1024
+# Validasi header dengan ffprobe setelah sekian byte diterima
+PROBE_HEADER_BYTES = 4 * 1024 * 1024
+# Upload yang tidak dilanjutkan selama ini dihapus
+UPLOAD_EXPIRE_SECONDS = int(os.environ.get('UPLOAD_EXPIRE_HOURS', 24)) * 3600
+
+# Pesan ffprobe untuk container yang index-nya di akhir file (misal MP4 dengan moov di belakang);
+# belum bisa divalidasi sebelum upload selesai
+DEFERRED_PROBE_ERRORS = ('moov atom not found', 'End of file', 'Truncating packet')
+
+
+class UploadError(Exception):
+    """Error protokol upload dengan status HTTP yang sesuai"""
+    def __init__(self, message, status_code=400):
+        super().__init__(message)
+        self.status_code = status_code
+
+
+class UploadNotFound(UploadError):
+    def __init__(self, upload_id):
+        super().__init__(f"Upload {upload_id} tidak ditemukan", status_code=404)
+
+
+class UploadOffsetConflict(UploadError):
+    """Offset dari client tidak sama dengan jumlah byte yang sudah diterima"""
+    def __init__(self, offset):
+        super().__init__(f"Offset tidak cocok, server sudah menerima {offset} byte", status_code=409)
+        self.offset = offset
+
+
+def reserve_unique_path(folder, filename):
+    """
+    Buat file kosong dengan nama unik di folder (nama_1.ext, nama_2.ext, ... jika sudah ada).
+
+    File dibuat secara atomik (mode 'x'), jadi dua upload bernama sama yang berjalan
+    bersamaan tidak pernah mendapat path yang sama atau menimpa file upload lain.
+    """
+    base, ext = os.path.splitext(filename)
+    counter = 0
+    while True:
+        name = filename if counter == 0 else f"{base}_{counter}{ext}"
+        path = os.path.join(folder, name)
+        try:
+            open(path, 'xb').close()
+            return path
+        except FileExistsError:
+            counter += 1
+
+
+def probe_media(path):
+    """
+    Jalankan ffprobe pada file (boleh belum lengkap).
+
+    Returns:
+        tuple: (ok, info atau pesan error); info berisi format_name, duration dan jumlah stream audio
+    """
+    command = ['ffprobe', '-v', 'error', '-show_entries', 'format=format_name,duration:stream=codec_type',
+               '-of', 'json', path]
+    try:
+        result = subprocess.run(command, capture_output=True, text=True, timeout=30)
+    except FileNotFoundError:
+        return True, {'skipped': 'ffprobe tidak tersedia'}
+    except subprocess.TimeoutExpired:
+        return False, 'Timeout saat memeriksa file'
+
+    if result.returncode != 0:
+        return False, result.stderr.strip()[:300] or 'ffprobe gagal'
+    try:
+        data = json.loads(result.stdout or '{}')
+    except ValueError:
+        return False, 'Output ffprobe tidak valid'
+
+    streams = data.get('streams', [])
+    fmt = data.get('format', {})
+    return True, {
+        'format_name': fmt.get('format_name'),
+        'duration': float(fmt['duration']) if fmt.get('duration') not in (None, 'N/A') else None,
+        'audio_streams': sum(1 for stream in streams if stream.get('codec_type') == 'audio')
+    }
+
+
+class ResumableUploads:
+    """
+    Upload bertahap yang bisa dilanjutkan (mirip protokol tus).
+
+    Byte diterima ditambahkan ke <partial_folder>/<upload_id>.part; metadata disimpan di
+    <upload_id>.json sehingga upload tetap bisa dilanjutkan setelah server restart.
+    SHA-256 dihitung bertahap saat potongan diterima dan header file diperiksa ffprobe
+    di awal, jadi saat byte terakhir tiba file langsung bisa dipindah dan ditranskripsi.
+    """
+
+    def __init__(self, upload_folder, partial_folder):
+        self.upload_folder = upload_folder
+        self.partial_folder = partial_folder
+        self._sessions = {}
+        self._locks = {}
+        self._lock = threading.Lock()
+        os.makedirs(self.partial_folder, exist_ok=True)
+
+    def _paths(self, upload_id):
+        # upload_id selalu uuid hex; tolak nilai lain agar tidak bisa keluar dari folder
+        if not upload_id or any(c not in '0123456789abcdef' for c in upload_id):
+            raise UploadNotFound(upload_id)
+        base = os.path.join(self.partial_folder, upload_id)
+        return base + '.part', base + '.json'
+
+    def _lock_for(self, upload_id):
+        with self._lock:
+            if upload_id not in self._locks:
+                self._locks[upload_id] = threading.Lock()
+            return self._locks[upload_id]
+
+    def _save_meta(self, session):
+        _, meta_path = self._paths(session['upload_id'])
+        meta = {key: session.get(key) for key in ('upload_id', 'filename', 'size', 'sha256_expected',
+                                                  'created_at', 'probe', 'profile', 'language')}
+        with open(meta_path, 'w', encoding='utf-8') as f:
+            json.dump(meta, f)
+
+    def create(self, filename, size, sha256_expected=None, profile=False, language=None):
+        """
+        Buat sesi upload baru; profile=True menjalankan transkripsinya dengan profiler dan
+        language (kode bahasa atau None untuk deteksi otomatis) diteruskan ke job transkripsi
+        """
+        if size <= 0:
+            raise UploadError('Ukuran file tidak valid')
+        self.expire_stale()
+
+        upload_id = uuid.uuid4().hex
+        part_path, _ = self._paths(upload_id)
+        open(part_path, 'wb').close()
+
+        session = {
+            'upload_id': upload_id,
+            'filename': filename,
+            'size': size,
+            'offset': 0,
+            'sha256_expected': sha256_expected.lower() if sha256_expected else None,
+            'created_at': time.time(),
+            'probe': None,
+            'profile': bool(profile),
+            'language': language,
+            'hasher': hashlib.sha256()
+        }
+        self._save_meta(session)
+        self._sessions[upload_id] = session
+        logger.info(f"Upload dibuat: {upload_id} ({filename}, {size} byte)")
+        return session
+
+    def get(self, upload_id):
+        """Dapatkan sesi; dimuat ulang dari disk (hash dihitung ulang) setelah restart"""
+        session = self._sessions.get(upload_id)
+        if session:
+            return session
+
+        part_path, meta_path = self._paths(upload_id)
+        if not os.path.exists(meta_path):
+            raise UploadNotFound(upload_id)
+
+        with self._lock_for(upload_id):
+            if upload_id in self._sessions:
+                return self._sessions[upload_id]
+            with open(meta_path, encoding='utf-8') as f:
+                session = json.load(f)
+            hasher = hashlib.sha256()
+            offset = 0
+            with open(part_path, 'rb') as f:
+                for data in iter(lambda: f.read(STREAM_READ_SIZE), b''):
+                    hasher.update(data)
+                    offset += len(data)
+            session['offset'] = offset
+            session['hasher'] = hasher
+            self._sessions[upload_id] = session
+            return session
+
+    def append(self, upload_id, offset, stream):
+        """
+        Tambahkan isi stream di posisi offset.
+
+        Byte yang sempat diterima tetap tersimpan walau koneksi putus di tengah potongan;
+        client cukup menanyakan offset terbaru lalu melanjutkan.
+
+        Returns:
+            dict: Sesi (offset terbaru, 'complete' True jika semua byte sudah diterima)
+        """
+        session = self.get(upload_id)
+        with self._lock_for(upload_id):
+            if session.get('complete'):
+                raise UploadError('Upload sudah selesai', status_code=409)
+            if offset != session['offset']:
+                raise UploadOffsetConflict(session['offset'])
+
+            part_path, _ = self._paths(upload_id)
+            remaining = session['size'] - session['offset']
+            try:
+                with open(part_path, 'ab') as f:
+                    while remaining > 0:
+                        data = stream.read(min(STREAM_READ_SIZE, remaining))
+                        if not data:
+                            break
+                        f.write(data)
+                        session['hasher'].update(data)
+                        session['offset'] += len(data)
+                        remaining -= len(data)
+                    if remaining == 0 and stream.read(1):
+                        raise UploadError('Data melebihi ukuran file yang didaftarkan', status_code=413)
+            finally:
+                self._save_meta(session)
+
+            if session['probe'] is None and session['offset'] >= min(PROBE_HEADER_BYTES, session['size']):
+                self._probe_header(session)
+
+            if session['offset'] == session['size']:
+                self._finalize(session)
+            return session
+
+    def _probe_header(self, session):
+        """Periksa header file sebelum upload selesai agar file rusak/bukan media ditolak lebih awal"""
+        part_path, _ = self._paths(session['upload_id'])
+        ok, info = probe_media(part_path)
+        if ok:
+            session['probe'] = 'header_ok'
+        elif any(marker in info for marker in DEFERRED_PROBE_ERRORS):
+            session['probe'] = 'deferred'
+        else:
+            self.delete(session['upload_id'])
+            raise UploadError(f"File bukan audio/video yang valid: {info}", status_code=415)
+        self._save_meta(session)
+
+    def _unique_path(self, filename):
+        return reserve_unique_path(self.upload_folder, filename)
+
+    def _finalize(self, session):
+        """Verifikasi hash dan isi lengkap lalu pindahkan file ke folder upload"""
+        upload_id = session['upload_id']
+        part_path, meta_path = self._paths(upload_id)
+
+        digest = session['hasher'].hexdigest()
+        if session['sha256_expected'] and digest != session['sha256_expected']:
+            self.delete(upload_id)
+            raise UploadError('Checksum SHA-256 tidak cocok, upload ulang file', status_code=460)
+
+        ok, info = probe_media(part_path)
+        if not ok or (isinstance(info, dict) and info.get('audio_streams') == 0):
+            self.delete(upload_id)
+            raise UploadError(f"File tidak memiliki audio yang bisa dibaca: {info if not ok else 'tanpa stream audio'}",
+                              status_code=415)
+
+        final_path = self._unique_path(session['filename'])
+        os.replace(part_path, final_path)
+        os.remove(meta_path)
+
+        # Hasher tidak dibutuhkan lagi; sesi hanya disimpan untuk status sampai kedaluwarsa
+        session.pop('hasher', None)
+        session.update({
+            'complete': True,
+            'completed_at': time.time(),
+            'sha256': digest,
+            'path': final_path,
+            'filename': os.path.basename(final_path),
+            'media': info
+        })
+        logger.info(f"Upload selesai: {upload_id} -> {final_path}")
+
+    def delete(self, upload_id):
+        """Batalkan upload dan hapus file sementara"""
+        self._sessions.pop(upload_id, None)
+        with self._lock:
+            self._locks.pop(upload_id, None)
+        for path in self._paths(upload_id):
+            if os.path.exists(path):
+                os.remove(path)
+
+    def expire_stale(self):
+        """Hapus upload yang sudah lama tidak dilanjutkan dan sesi selesai yang sudah lama"""
+        now = time.time()
+        for upload_id, session in list(self._sessions.items()):
+            if session.get('complete') and now - session.get('completed_at', now) > UPLOAD_EXPIRE_SECONDS:
+                self.delete(upload_id)
+        for name in os.listdir(self.partial_folder):
+            if not name.endswith('.part'):
+                continue
+            path = os.path.join(self.partial_folder, name)
+            try:
+                if now - os.path.getmtime(path) > UPLOAD_EXPIRE_SECONDS:
+                    self.delete(name[:-len('.part')])
+                    logger.info(f"Upload kedaluwarsa dihapus: {name}")
+            except OSError:
+                pass
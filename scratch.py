@@ -0,0 +1,129 @@
+# scratch.py
+import atexit
+import logging
+import os
+import shutil
+import tempfile
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+
+logger = logging.getLogger(__name__)
+
+# Folder scratch; arahkan ke tmpfs (misal /dev/shm/whisper-scratch) agar chunk audio tidak menyentuh disk
+SCRATCH_DIR = os.environ.get('SCRATCH_DIR') or os.path.join(tempfile.gettempdir(), 'whisper-scratch')
+# Batas total isi folder scratch untuk semua job (MB)
+SCRATCH_QUOTA_MB = int(os.environ.get('SCRATCH_QUOTA_MB', 2048))
+# Sisakan ruang kosong minimal di filesystem scratch (penting untuk tmpfs yang memakai RAM)
+SCRATCH_MIN_FREE_MB = int(os.environ.get('SCRATCH_MIN_FREE_MB', 256))
+
+OWNER_FILE = '.owner'
+JOB_PREFIX = 'job-'
+
+
+class ScratchQuotaExceeded(Exception):
+    """Ruang scratch tidak cukup untuk file yang akan ditulis"""
+
+
+def _pid_alive(pid):
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    except OSError:
+        return False
+    return True
+
+
+class ScratchSpace:
+    """
+    Folder kerja sementara per job di bawah satu root (bisa tmpfs).
+
+    - Setiap job mendapat folder unik job-<pid>-<id>, jadi dua job dengan nama file sama tidak bentrok
+    - Folder dihapus saat job selesai (context manager) dan saat proses keluar (atexit)
+    - Folder milik proses yang sudah mati disapu saat startup
+    - Total isi dibatasi quota; ensure_space() dipanggil sebelum menulis file besar
+    """
+
+    def __init__(self, root=SCRATCH_DIR, quota_bytes=SCRATCH_QUOTA_MB * 1024 * 1024,
+                 min_free_bytes=SCRATCH_MIN_FREE_MB * 1024 * 1024):
+        self.root = root
+        self.quota_bytes = quota_bytes
+        self.min_free_bytes = min_free_bytes
+        self._active = set()
+        self._lock = threading.Lock()
+        os.makedirs(self.root, exist_ok=True)
+        atexit.register(self.cleanup_active)
+
+    def usage(self):
+        """Total ukuran file di folder scratch (bytes)"""
+        total = 0
+        for dirpath, _, filenames in os.walk(self.root):
+            for name in filenames:
+                try:
+                    total += os.path.getsize(os.path.join(dirpath, name))
+                except OSError:
+                    pass
+        return total
+
+    def ensure_space(self, nbytes):
+        """Raise ScratchQuotaExceeded jika menulis nbytes akan melewati quota atau ruang kosong minimal"""
+        used = self.usage()
+        if used + nbytes > self.quota_bytes:
+            raise ScratchQuotaExceeded(
+                f"Quota scratch habis ({(used + nbytes) / 1048576:.0f} MB > {self.quota_bytes / 1048576:.0f} MB)")
+        free = shutil.disk_usage(self.root).free
+        if free - nbytes < self.min_free_bytes:
+            raise ScratchQuotaExceeded(f"Ruang kosong di {self.root} tinggal {free / 1048576:.0f} MB")
+
+    @contextmanager
+    def job(self, label='job'):
+        """Buat folder scratch untuk satu job; selalu dihapus saat keluar dari blok"""
+        path = os.path.join(self.root, f"{JOB_PREFIX}{os.getpid()}-{uuid.uuid4().hex[:8]}")
+        os.makedirs(path)
+        with open(os.path.join(path, OWNER_FILE), 'w') as f:
+            f.write(f"{os.getpid()}\n{label}\n{time.time()}\n")
+        with self._lock:
+            self._active.add(path)
+        try:
+            yield path
+        finally:
+            shutil.rmtree(path, ignore_errors=True)
+            with self._lock:
+                self._active.discard(path)
+
+    def cleanup_active(self):
+        """Hapus folder job proses ini yang masih tersisa (dipanggil saat proses keluar)"""
+        with self._lock:
+            active = list(self._active)
+            self._active.clear()
+        for path in active:
+            shutil.rmtree(path, ignore_errors=True)
+
+    def sweep_orphans(self):
+        """Hapus folder job milik proses yang sudah tidak berjalan (misal setelah crash/kill)"""
+        removed = 0
+        for name in os.listdir(self.root):
+            path = os.path.join(self.root, name)
+            if not name.startswith(JOB_PREFIX) or not os.path.isdir(path):
+                continue
+            try:
+                with open(os.path.join(path, OWNER_FILE)) as f:
+                    pid = int(f.readline().strip())
+            except (OSError, ValueError):
+                pid = None
+            if pid == os.getpid() and path in self._active:
+                continue
+            if pid is None or pid == os.getpid() or not _pid_alive(pid):
+                shutil.rmtree(path, ignore_errors=True)
+                removed += 1
+        if removed:
+            logger.info(f"🧹 {removed} folder scratch yatim dihapus dari {self.root}")
+        return removed
+
+
+# Scratch bersama untuk seluruh aplikasi
+scratch_space = ScratchSpace()
@@ -0,0 +1,211 @@
+# storage.py
+import logging
+import os
+import subprocess
+import threading
+import time
+from database import db
+
+logger = logging.getLogger(__name__)
+
+# Media sumber diproses N hari setelah transkripsi berhasil (0 = simpan selamanya)
+MEDIA_RETENTION_DAYS = int(os.environ.get('MEDIA_RETENTION_DAYS', 30))
+# 'compress' = ubah ke Opus mono (cukup untuk transkripsi ulang), 'delete' = hapus file
+MEDIA_RETENTION_ACTION = os.environ.get('MEDIA_RETENTION_ACTION', 'compress')
+# Bitrate Opus untuk media yang dikompres
+MEDIA_COMPRESS_BITRATE = os.environ.get('MEDIA_COMPRESS_BITRATE', '24k')
+# Interval pengecekan retensi di background (detik)
+RETENTION_INTERVAL_SECONDS = int(os.environ.get('RETENTION_INTERVAL_HOURS', 6)) * 3600
+
+COMPRESSED_MEDIA_EXTENSION = '.opus.ogg'
+
+
+def directory_size(path):
+    """Total ukuran file di folder (rekursif) dan jumlah file"""
+    total = 0
+    count = 0
+    for dirpath, _, filenames in os.walk(path):
+        for name in filenames:
+            try:
+                total += os.path.getsize(os.path.join(dirpath, name))
+                count += 1
+            except OSError:
+                pass
+    return total, count
+
+
+class StorageManager:
+    """
+    Kebijakan penyimpanan uploads/ dan transcripts/.
+
+    - Teks transkripsi hanya disimpan di database (terkompresi zstd/gzip); file .txt lama
+      dimigrasikan lalu dihapus
+    - Media sumber dikompres atau dihapus MEDIA_RETENTION_DAYS hari setelah transkripsi
+    - Media ikut dihapus saat transkripsinya dihapus (jika tidak dipakai transkripsi lain)
+    - usage() melaporkan pemakaian disk per tier
+    """
+
+    def __init__(self, upload_folder, transcripts_folder, tiers=None,
+                 retention_days=MEDIA_RETENTION_DAYS, retention_action=MEDIA_RETENTION_ACTION):
+        if retention_action not in ('compress', 'delete'):
+            raise Exception(f"MEDIA_RETENTION_ACTION tidak valid: {retention_action}")
+        self.upload_folder = upload_folder
+        self.transcripts_folder = transcripts_folder
+        self.tiers = tiers or {}
+        self.retention_days = retention_days
+        self.retention_action = retention_action
+        self._lock = threading.Lock()
+
+    def media_path(self, media_file):
+        return os.path.join(self.upload_folder, media_file)
+
+    def migrate_transcripts(self):
+        """Kompres transkripsi lama di database dan hapus salinan .txt yang sudah ada di database"""
+        compressed = db.compress_stored_transcriptions()
+        removed = 0
+        for _, filename in db.get_transcription_files():
+            path = os.path.join(self.transcripts_folder, filename or '')
+            if filename and os.path.isfile(path):
+                os.remove(path)
+                removed += 1
+        if compressed or removed:
+            logger.info(f"📦 Migrasi transkripsi: {compressed} dikompres, {removed} file .txt duplikat dihapus")
+        return compressed, removed
+
+    def compress_media(self, media_file):
+        """Encode ulang media ke Opus mono; return nama file baru"""
+        source = self.media_path(media_file)
+        target_name = os.path.splitext(media_file)[0] + COMPRESSED_MEDIA_EXTENSION
+        target = self.media_path(target_name)
+        command = [
+            'ffmpeg', '-nostdin', '-loglevel', 'error', '-y', '-i', source,
+            '-vn', '-ac', '1', '-c:a', 'libopus', '-b:a', MEDIA_COMPRESS_BITRATE, target
+        ]
+        result = subprocess.run(command, capture_output=True, text=True)
+        if result.returncode != 0 or not os.path.exists(target) or os.path.getsize(target) == 0:
+            if os.path.exists(target):
+                os.remove(target)
+            raise Exception(f"Gagal mengompres media: {result.stderr.strip()[:200]}")
+        os.remove(source)
+        return target_name
+
+    def apply_retention(self):
+        """
+        Kompres/hapus media yang sudah melewati masa retensi.
+
+        Returns:
+            dict: Jumlah file per aksi dan byte yang dibebaskan
+        """
+        summary = {'compressed': 0, 'deleted': 0, 'missing': 0, 'failed': 0, 'orphans': 0, 'freed_bytes': 0}
+        if self.retention_days <= 0:
+            return summary
+
+        with self._lock:
+            for media_file, media_status in db.get_media_due(self.retention_days):
+                path = self.media_path(media_file)
+                if not os.path.exists(path):
+                    db.set_media_state(media_file, media_file, 'deleted')
+                    summary['missing'] += 1
+                    continue
+                if media_status == 'compressed' and self.retention_action == 'compress':
+                    continue
+
+                size = os.path.getsize(path)
+                try:
+                    if self.retention_action == 'delete':
+                        os.remove(path)
+                        db.set_media_state(media_file, media_file, 'deleted')
+                        summary['deleted'] += 1
+                        summary['freed_bytes'] += size
+                    else:
+                        new_file = self.compress_media(media_file)
+                        db.set_media_state(media_file, new_file, 'compressed')
+                        summary['compressed'] += 1
+                        summary['freed_bytes'] += size - os.path.getsize(self.media_path(new_file))
+                except Exception as e:
+                    logger.error(f"Retensi media {media_file} gagal: {e}")
+                    summary['failed'] += 1
+
+            summary['orphans'] = self.delete_orphan_media()
+
+        if summary['compressed'] or summary['deleted']:
+            logger.info(f"🗄️  Retensi media: {summary['compressed']} dikompres, {summary['deleted']} dihapus, "
+                        f"{summary['freed_bytes'] / 1048576:.1f} MB dibebaskan")
+        return summary
+
+    def delete_media(self, transcription):
+        """Hapus media sumber milik transkripsi, kecuali masih dipakai transkripsi lain"""
+        media_file = transcription[8] or transcription[2]
+        if not media_file or transcription[9] == 'deleted':
+            return False
+        # Upload ulang dengan nama sama menimpa file yang sama untuk beberapa transkripsi
+        if db.count_media_references(media_file, exclude_id=transcription[0]):
+            return False
+        path = self.media_path(media_file)
+        if os.path.isfile(path):
+            os.remove(path)
+            return True
+        return False
+
+    def delete_orphan_media(self):
+        """Hapus file upload lama yang tidak dipakai transkripsi mana pun (misal job gagal)"""
+        referenced = db.get_media_references()
+        cutoff = time.time() - self.retention_days * 86400
+        removed = 0
+        for name in os.listdir(self.upload_folder):
+            path = os.path.join(self.upload_folder, name)
+            if name in referenced or not os.path.isfile(path) or os.path.getmtime(path) > cutoff:
+                continue
+            os.remove(path)
+            removed += 1
+        return removed
+
+    def usage(self):
+        """Pemakaian disk per tier (byte dan jumlah file)"""
+        usage = {}
+
+        media = {'originals': [0, 0], 'compressed': [0, 0]}
+        for name in os.listdir(self.upload_folder):
+            path = os.path.join(self.upload_folder, name)
+            if not os.path.isfile(path):
+                continue
+            tier = 'compressed' if name.endswith(COMPRESSED_MEDIA_EXTENSION) else 'originals'
+            media[tier][0] += os.path.getsize(path)
+            media[tier][1] += 1
+        usage['media_originals'] = {'bytes': media['originals'][0], 'files': media['originals'][1]}
+        usage['media_compressed'] = {'bytes': media['compressed'][0], 'files': media['compressed'][1]}
+
+        compressed_bytes, plain_bytes, rows = db.get_transcript_storage()
+        usage['transcripts_db'] = {'bytes': compressed_bytes + plain_bytes, 'rows': rows,
+                                   'compressed_bytes': compressed_bytes, 'plain_bytes': plain_bytes}
+
+        legacy = [name for name in os.listdir(self.transcripts_folder) if name.endswith('.txt')]
+        usage['transcripts_txt'] = {
+            'bytes': sum(os.path.getsize(os.path.join(self.transcripts_folder, name)) for name in legacy),
+            'files': len(legacy)
+        }
+
+        for tier, path in self.tiers.items():
+            size, count = directory_size(path) if os.path.isdir(path) else (0, 0)
+            usage[tier] = {'bytes': size, 'files': count}
+
+        usage['total_bytes'] = sum(tier['bytes'] for tier in usage.values())
+        return usage
+
+    def start_background(self, interval=RETENTION_INTERVAL_SECONDS):
+        """Jalankan migrasi sekali lalu retensi berkala di daemon thread"""
+        def worker():
+            try:
+                self.migrate_transcripts()
+            except Exception as e:
+                logger.error(f"Migrasi transkripsi gagal: {e}")
+            while True:
+                try:
+                    self.apply_retention()
+                except Exception as e:
+                    logger.error(f"Retensi media gagal: {e}")
+                time.sleep(interval)
+
+        thread = threading.Thread(target=worker, daemon=True)
+        thread.start()
+        return thread
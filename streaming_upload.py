@@ -0,0 +1,103 @@
+# streaming_upload.py
+import logging
+import subprocess
+import tempfile
+import threading
+
+logger = logging.getLogger(__name__)
+
+# Format yang bisa di-decode ffmpeg dari pipe tanpa seek ke akhir file.
+# MP4/M4A/MOV hanya bisa jika fragmented (moov di depan); jika tidak, decoder gagal
+# dan transkripsi diulang dari file yang tersimpan setelah upload selesai.
+STREAMABLE_EXTENSIONS = {'mp3', 'wav', 'flac', 'm4a', 'mp4', 'mkv', 'mov'}
+
+
+class PipeBuffer:
+    """
+    Buffer byte tanpa batas antara thread pembaca stdout ffmpeg dan thread transkripsi.
+
+    Dengan buffer ini ffmpeg tidak pernah tertahan oleh Whisper yang lebih lambat,
+    sehingga upload (yang menulis ke stdin ffmpeg) juga tidak ikut melambat.
+    """
+
+    def __init__(self):
+        self._data = bytearray()
+        self._closed = False
+        self._condition = threading.Condition()
+
+    def write(self, data):
+        with self._condition:
+            self._data.extend(data)
+            self._condition.notify_all()
+
+    def close(self):
+        with self._condition:
+            self._closed = True
+            self._condition.notify_all()
+
+    def read(self, size):
+        """Blok sampai size byte tersedia atau stream ditutup (seperti file biasa)"""
+        with self._condition:
+            while len(self._data) < size and not self._closed:
+                self._condition.wait()
+            chunk = bytes(self._data[:size])
+            del self._data[:size]
+            return chunk
+
+
+class StreamingDecoder:
+    """
+    Proses ffmpeg yang men-decode byte upload (stdin) menjadi PCM 16 kHz (stdout).
+
+    feed() dipanggil untuk setiap potongan upload; hasil decode dibaca lewat self.pcm
+    (PipeBuffer) oleh transcriber.iter_pcm_windows.
+    """
+
+    def __init__(self, command):
+        self._stderr = tempfile.TemporaryFile()
+        self.process = subprocess.Popen(command, stdin=subprocess.PIPE, stdout=subprocess.PIPE,
+                                        stderr=self._stderr)
+        self.pcm = PipeBuffer()
+        self.failed = False
+        self.bytes_decoded = 0
+        self._pump = threading.Thread(target=self._read_output, daemon=True)
+        self._pump.start()
+
+    def _read_output(self):
+        try:
+            for data in iter(lambda: self.process.stdout.read(64 * 1024), b''):
+                self.bytes_decoded += len(data)
+                self.pcm.write(data)
+        finally:
+            self.pcm.close()
+
+    def feed(self, data):
+        """Kirim byte upload ke ffmpeg; jika ffmpeg sudah berhenti, data diabaikan"""
+        if self.failed:
+            return
+        try:
+            self.process.stdin.write(data)
+        except (BrokenPipeError, OSError):
+            self.failed = True
+            logger.warning("Decoder streaming berhenti, upload tetap disimpan ke file")
+
+    def close_input(self):
+        """Tandai akhir upload (EOF untuk ffmpeg)"""
+        try:
+            self.process.stdin.close()
+        except (BrokenPipeError, OSError):
+            pass
+
+    def abort(self):
+        self.close_input()
+        if self.process.poll() is None:
+            self.process.kill()
+
+    def wait(self):
+        """Tunggu ffmpeg selesai; return (berhasil, pesan error)"""
+        returncode = self.process.wait()
+        self._pump.join()
+        self._stderr.seek(0)
+        error = self._stderr.read().decode('utf-8', 'replace').strip()
+        self._stderr.close()
+        return returncode == 0 and not self.failed, error
@@ -0,0 +1,152 @@
+# tests/test_http_client.py
+# Uji retry/backoff LLMHttpClient terhadap server HTTP palsu lokal.
+#
+#   python -m pytest tests/test_http_client.py   (atau: python -m unittest tests.test_http_client)
+import json
+import os
+import sys
+import threading
+import time
+import unittest
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from http_client import LLMHttpClient, LLMRequestError, LLMTimeoutError
+
+
+class FakeServer:
+    """
+    Server OpenRouter palsu: setiap request mengambil satu langkah skrip berikutnya.
+
+    Langkah berupa (status, headers, body) atau ('sleep', detik) untuk memicu read timeout;
+    langkah terakhir dipakai terus jika skrip habis.
+    """
+
+    def __init__(self, script):
+        self.script = list(script)
+        self.requests = []
+        self.active = 0
+        self.max_active = 0
+        self.lock = threading.Lock()
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def log_message(self, *args):
+                pass
+
+            def _handle(self):
+                length = int(self.headers.get('Content-Length') or 0)
+                body = self.rfile.read(length) if length else b''
+                with server.lock:
+                    server.requests.append((self.command, self.path, self.headers.get('Authorization'), body))
+                    step = server.script.pop(0) if len(server.script) > 1 else server.script[0]
+                    server.active += 1
+                    server.max_active = max(server.max_active, server.active)
+                try:
+                    if step[0] == 'sleep':
+                        time.sleep(step[1])
+                        step = (200, {}, {'choices': [{'message': {'content': 'terlambat'}}]})
+                    status, headers, payload = step
+                    data = json.dumps(payload).encode('utf-8')
+                    self.send_response(status)
+                    self.send_header('Content-Type', 'application/json')
+                    self.send_header('Content-Length', str(len(data)))
+                    for name, value in headers.items():
+                        self.send_header(name, value)
+                    self.end_headers()
+                    self.wfile.write(data)
+                except (BrokenPipeError, ConnectionResetError):
+                    pass
+                finally:
+                    with server.lock:
+                        server.active -= 1
+
+            do_GET = _handle
+            do_POST = _handle
+
+        self.httpd = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+        self.httpd.daemon_threads = True
+        self.url = f"http://127.0.0.1:{self.httpd.server_address[1]}/api/v1"
+        threading.Thread(target=self.httpd.serve_forever, daemon=True).start()
+
+    def close(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+
+def answer(content='halo'):
+    return (200, {}, {'choices': [{'message': {'content': content}}]})
+
+
+class LLMHttpClientTest(unittest.TestCase):
+
+    def make(self, script, **kwargs):
+        server = FakeServer(script)
+        self.addCleanup(server.close)
+        kwargs.setdefault('backoff_base', 0.01)
+        kwargs.setdefault('backoff_max', 0.05)
+        return server, LLMHttpClient(base_url=server.url, **kwargs)
+
+    def chat(self, client, **kwargs):
+        return client.chat_completion('kunci', 'model/a', [{'role': 'user', 'content': 'tes'}], **kwargs)
+
+    def test_retries_rate_limit_and_server_errors_then_succeeds(self):
+        server, client = self.make([(429, {}, {'error': 'rate'}), (503, {}, {'error': 'down'}), answer('ok')])
+        self.assertEqual(self.chat(client), 'ok')
+        self.assertEqual(len(server.requests), 3)
+        method, path, auth, body = server.requests[-1]
+        self.assertEqual((method, path, auth), ('POST', '/api/v1/chat/completions', 'Bearer kunci'))
+        self.assertEqual(json.loads(body)['model'], 'model/a')
+
+    def test_honours_retry_after(self):
+        server, client = self.make([(429, {'Retry-After': '0.3'}, {'error': 'rate'}), answer()], backoff_max=1.0)
+        start = time.perf_counter()
+        self.chat(client)
+        self.assertGreaterEqual(time.perf_counter() - start, 0.3)
+
+    def test_rate_limit_after_all_retries(self):
+        server, client = self.make([(429, {}, {'error': 'rate'})], max_retries=2)
+        with self.assertRaises(LLMRequestError) as raised:
+            self.chat(client)
+        self.assertEqual(raised.exception.status_code, 429)
+        self.assertEqual(len(server.requests), 3)
+
+    def test_client_error_is_not_retried(self):
+        server, client = self.make([(400, {}, {'error': 'bad request'})])
+        with self.assertRaises(LLMRequestError):
+            self.chat(client)
+        self.assertEqual(len(server.requests), 1)
+
+    def test_post_read_timeout_is_not_retried(self):
+        server, client = self.make([('sleep', 0.5)])
+        with self.assertRaises(LLMTimeoutError):
+            self.chat(client, timeout=0.1)
+        self.assertEqual(len(server.requests), 1)
+
+    def test_get_read_timeout_is_retried(self):
+        server, client = self.make([('sleep', 0.5), (200, {}, {'data': []})])
+        self.assertEqual(client.get_json('/models', timeout=0.2), {'data': []})
+        self.assertEqual(len(server.requests), 2)
+
+    def test_cancel_event_stops_retrying(self):
+        server, client = self.make([(503, {}, {'error': 'down'})], backoff_base=1.0, backoff_max=1.0)
+        cancel_event = threading.Event()
+        threading.Timer(0.1, cancel_event.set).start()
+        with self.assertRaises(LLMRequestError):
+            self.chat(client, cancel_event=cancel_event)
+        self.assertLessEqual(len(server.requests), 2)
+
+    def test_concurrency_limit_per_provider(self):
+        server, client = self.make([('sleep', 0.1)], max_concurrency=2)
+        threads = [threading.Thread(target=self.chat, args=(client,)) for _ in range(5)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(len(server.requests), 5)
+        self.assertLessEqual(server.max_active, 2)
+
+
+if __name__ == '__main__':
+    unittest.main()
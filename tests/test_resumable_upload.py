@@ -0,0 +1,131 @@
+# tests/test_resumable_upload.py
+# Uji protokol offset ResumableUploads (append, konflik offset, restart, checksum).
+#
+#   python -m pytest tests/test_resumable_upload.py   (atau: python -m unittest tests.test_resumable_upload)
+import hashlib
+import io
+import os
+import shutil
+import sys
+import tempfile
+import unittest
+from unittest import mock
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import resumable_upload
+from resumable_upload import ResumableUploads, UploadError, UploadNotFound, UploadOffsetConflict
+
+DATA = bytes(range(256)) * 64
+
+
+class BrokenStream(io.BytesIO):
+    """Stream yang putus (ConnectionError) setelah `limit` byte terbaca"""
+
+    def __init__(self, data, limit):
+        super().__init__(data)
+        self.limit = limit
+
+    def read(self, size=-1):
+        if self.tell() >= self.limit:
+            raise ConnectionError('koneksi putus')
+        return super().read(min(size, self.limit - self.tell()))
+
+
+class ResumableUploadsTest(unittest.TestCase):
+
+    def setUp(self):
+        self.folder = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.folder, True)
+        # Hasil ffprobe dibuat tetap agar tes tidak bergantung pada ffprobe yang terpasang
+        patcher = mock.patch.object(resumable_upload, 'probe_media',
+                                    return_value=(True, {'format_name': 'wav', 'duration': 1.0, 'audio_streams': 1}))
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.uploads = self.make()
+
+    def make(self):
+        return ResumableUploads(self.folder, os.path.join(self.folder, '.partial'))
+
+    def test_upload_in_pieces_completes(self):
+        session = self.uploads.create('rapat.wav', len(DATA), hashlib.sha256(DATA).hexdigest())
+        upload_id = session['upload_id']
+        self.uploads.append(upload_id, 0, io.BytesIO(DATA[:5000]))
+        session = self.uploads.append(upload_id, 5000, io.BytesIO(DATA[5000:]))
+
+        self.assertTrue(session['complete'])
+        self.assertEqual(session['path'], os.path.join(self.folder, 'rapat.wav'))
+        with open(session['path'], 'rb') as f:
+            self.assertEqual(f.read(), DATA)
+        self.assertEqual(os.listdir(os.path.join(self.folder, '.partial')), [])
+
+    def test_same_filename_gets_unique_path(self):
+        open(os.path.join(self.folder, 'rapat.wav'), 'wb').close()
+        session = self.uploads.create('rapat.wav', 10)
+        session = self.uploads.append(session['upload_id'], 0, io.BytesIO(DATA[:10]))
+        self.assertEqual(session['filename'], 'rapat_1.wav')
+
+    def test_offset_conflict(self):
+        upload_id = self.uploads.create('rapat.wav', len(DATA))['upload_id']
+        self.uploads.append(upload_id, 0, io.BytesIO(DATA[:1000]))
+        with self.assertRaises(UploadOffsetConflict) as raised:
+            self.uploads.append(upload_id, 500, io.BytesIO(DATA[500:]))
+        self.assertEqual(raised.exception.status_code, 409)
+        self.assertEqual(raised.exception.offset, 1000)
+        self.assertEqual(self.uploads.get(upload_id)['offset'], 1000)
+
+    def test_data_larger_than_declared_size(self):
+        upload_id = self.uploads.create('rapat.wav', 1000)['upload_id']
+        with self.assertRaises(UploadError) as raised:
+            self.uploads.append(upload_id, 0, io.BytesIO(DATA[:1001]))
+        self.assertEqual(raised.exception.status_code, 413)
+        self.assertFalse(self.uploads.get(upload_id).get('complete'))
+
+    def test_broken_stream_keeps_received_bytes(self):
+        upload_id = self.uploads.create('rapat.wav', len(DATA))['upload_id']
+        with self.assertRaises(ConnectionError):
+            self.uploads.append(upload_id, 0, BrokenStream(DATA, 3000))
+        self.assertEqual(self.uploads.get(upload_id)['offset'], 3000)
+        session = self.uploads.append(upload_id, 3000, io.BytesIO(DATA[3000:]))
+        self.assertTrue(session['complete'])
+
+    def test_resume_after_restart_rehashes_part_file(self):
+        session = self.uploads.create('rapat.wav', len(DATA), hashlib.sha256(DATA).hexdigest())
+        upload_id = session['upload_id']
+        self.uploads.append(upload_id, 0, io.BytesIO(DATA[:7000]))
+
+        # Server restart: sesi baru dimuat dari .json dan hash dihitung ulang dari .part
+        restarted = self.make()
+        session = restarted.get(upload_id)
+        self.assertEqual(session['offset'], 7000)
+        self.assertEqual(session['filename'], 'rapat.wav')
+        session = restarted.append(upload_id, 7000, io.BytesIO(DATA[7000:]))
+        self.assertTrue(session['complete'])
+        self.assertEqual(session['sha256'], hashlib.sha256(DATA).hexdigest())
+
+    def test_checksum_mismatch_deletes_upload(self):
+        upload_id = self.uploads.create('rapat.wav', len(DATA), 'a' * 64)['upload_id']
+        with self.assertRaises(UploadError) as raised:
+            self.uploads.append(upload_id, 0, io.BytesIO(DATA))
+        self.assertEqual(raised.exception.status_code, 460)
+        with self.assertRaises(UploadNotFound):
+            self.uploads.get(upload_id)
+        self.assertEqual(os.listdir(os.path.join(self.folder, '.partial')), [])
+        self.assertFalse(os.path.exists(os.path.join(self.folder, 'rapat.wav')))
+
+    def test_append_after_complete(self):
+        upload_id = self.uploads.create('rapat.wav', 10)['upload_id']
+        self.uploads.append(upload_id, 0, io.BytesIO(DATA[:10]))
+        with self.assertRaises(UploadError) as raised:
+            self.uploads.append(upload_id, 10, io.BytesIO(b''))
+        self.assertEqual(raised.exception.status_code, 409)
+
+    def test_invalid_upload_id(self):
+        with self.assertRaises(UploadNotFound):
+            self.uploads.get('../rahasia')
+        with self.assertRaises(UploadNotFound):
+            self.uploads.get('0' * 32)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,175 @@
+# tests/test_transcript_merge.py
+# Uji penggabungan segmen chunk yang saling overlap (TranscriptMerger dan transcribe_windows).
+#
+#   python -m pytest tests/test_transcript_merge.py   (atau: python -m unittest tests.test_transcript_merge)
+import os
+import sys
+import unittest
+from unittest import mock
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from inference_backends import InferenceBackend
+from transcript_merge import TranscriptMerger
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+
+def word(second):
+    """Satu kata 'w<detik>' selama setengah detik mulai di detik tersebut"""
+    return {'start': float(second), 'end': second + 0.5, 'word': f' w{second}'}
+
+
+def segment(first, last, with_words=True):
+    """Segmen berisi kata w<first> .. w<last>"""
+    words = [word(second) for second in range(first, last + 1)]
+    item = {'start': float(first), 'end': last + 0.5, 'text': ''.join(w['word'] for w in words).strip()}
+    if with_words:
+        item['words'] = words
+    return item
+
+
+def spoken(text):
+    return [int(token[1:]) for token in text.split()]
+
+
+class TranscriptMergerTest(unittest.TestCase):
+
+    def test_cut_point_is_middle_of_overlap(self):
+        merger = TranscriptMerger(overlap=2.0)
+        self.assertIsNone(merger.cut_point(0))
+        self.assertEqual(merger.cut_point(8.0), 9.0)
+        self.assertIsNone(TranscriptMerger(overlap=0).cut_point(8.0))
+
+    def test_words_on_either_side_of_cut_point(self):
+        merger = TranscriptMerger(overlap=2.0)
+        merger.add([segment(0, 4), segment(5, 9)], None, 0, 10)
+        cut = merger.cut_point(8.0)
+        # w9 (titik tengah 9.25) ada di kedua chunk; hanya versi chunk baru yang dipertahankan
+        kept = merger.add([segment(8, 12), segment(13, 17)], cut, 10, 18)
+        self.assertEqual(spoken(merger.text()), list(range(0, 18)))
+        self.assertEqual(kept[0]['start'], 9.0)
+        self.assertEqual(kept[0]['text'], 'w9 w10 w11 w12')
+
+    def test_word_midpoint_on_cut_belongs_to_new_chunk(self):
+        merger = TranscriptMerger(overlap=2.0)
+        merger.add([{'start': 8.75, 'end': 9.25, 'text': 'lama', 'words': [
+            {'start': 8.75, 'end': 9.25, 'word': ' lama'}]}], None, 0, 10)
+        merger.add([{'start': 8.75, 'end': 9.25, 'text': 'baru', 'words': [
+            {'start': 8.75, 'end': 9.25, 'word': ' baru'}]}], 9.0, 10, 18)
+        self.assertEqual(merger.text(), 'baru')
+
+    def test_segments_without_words_use_midpoint(self):
+        merger = TranscriptMerger(overlap=2.0)
+        merger.add([segment(0, 4, with_words=False), segment(8, 9, with_words=False)], None, 0, 10)
+        # Titik tengah 8.75 < 9: tetap di chunk lama, versi chunk baru dibuang
+        merger.add([segment(8, 9, with_words=False), segment(10, 12, with_words=False)], 9.0, 10, 13)
+        self.assertEqual(spoken(merger.text()), [0, 1, 2, 3, 4, 8, 9, 10, 11, 12])
+
+    def test_trim_tail_splits_segment_spanning_cut(self):
+        merger = TranscriptMerger(overlap=2.0)
+        merger.add([segment(0, 4), segment(5, 9)], None, 0, 10)
+        merger.add([segment(9, 12)], 9.0, 10, 13)
+        trimmed = merger.segments[1]
+        self.assertEqual(trimmed['text'], 'w5 w6 w7 w8')
+        self.assertEqual((trimmed['start'], trimmed['end']), (5.0, 8.5))
+        self.assertEqual([w['word'] for w in trimmed['words']], [' w5', ' w6', ' w7', ' w8'])
+        # Segmen sebelum titik potong tidak disentuh
+        self.assertEqual(merger.segments[0]['text'], 'w0 w1 w2 w3 w4')
+
+    def test_chunk_without_cut_is_not_trimmed(self):
+        merger = TranscriptMerger(overlap=2.0)
+        merger.add([segment(0, 9)], None, 0, 10)
+        # Chunk sebelumnya gagal, jadi chunk ini ditambahkan tanpa titik potong
+        merger.add([segment(18, 29)], None, 20, 30)
+        self.assertEqual(spoken(merger.text()), list(range(0, 10)) + list(range(18, 30)))
+
+    def test_on_final_sees_only_trimmed_segments(self):
+        finals = []
+        merger = TranscriptMerger(overlap=2.0, on_final=lambda start, end, segments: finals.append(
+            (start, end, [item['text'] for item in segments])))
+        merger.add([segment(0, 4), segment(5, 9)], None, 0, 10)
+        self.assertEqual(finals, [])
+        merger.add([segment(8, 12), segment(13, 17)], 9.0, 10, 18)
+        self.assertEqual(finals, [(0, 10, ['w0 w1 w2 w3 w4', 'w5 w6 w7 w8'])])
+        merger.finish()
+        self.assertEqual(finals[-1], (10, 18, ['w9 w10 w11 w12', 'w13 w14 w15 w16 w17']))
+        merger.finish()
+        self.assertEqual(len(finals), 2)
+
+    def test_prompt_uses_words_before_cut(self):
+        merger = TranscriptMerger(overlap=2.0)
+        merger.add([segment(0, 4), segment(5, 9)], None, 0, 10)
+        self.assertEqual(merger.prompt(3, 9.0), 'w6 w7 w8')
+        self.assertEqual(merger.prompt(3), 'w7 w8 w9')
+        self.assertIsNone(TranscriptMerger().prompt(3))
+
+    def test_public_segments_drop_words(self):
+        merger = TranscriptMerger(overlap=2.0)
+        merger.add([segment(0, 1)], None, 0, 2)
+        self.assertEqual(merger.public_segments(), [{'start': 0.0, 'end': 1.5, 'text': 'w0 w1'}])
+
+
+class FakeModel:
+    pass
+
+
+class FakeBackend(InferenceBackend):
+    """
+    Backend palsu: sampel audio berisi waktu absolutnya (detik), jadi setiap chunk
+    menghasilkan kata w<detik> untuk setiap detik penuh yang ada di audionya.
+    """
+    name = 'fake'
+
+    def __init__(self, fail_calls=()):
+        self.calls = 0
+        self.fail_calls = set(fail_calls)
+
+    def transcribe(self, model, audio, language, gpu, initial_prompt=None, word_timestamps=False):
+        self.calls += 1
+        if self.calls in self.fail_calls:
+            raise RuntimeError('chunk gagal')
+        chunk_start = round(float(audio[0]), 3)
+        seconds = len(audio) // 16000
+        words = [{'start': float(k), 'end': k + 0.5, 'word': f' w{round(chunk_start) + k}'} for k in range(seconds)]
+        text = ''.join(w['word'] for w in words)
+        return {'text': text, 'segments': [{'start': 0.0, 'end': seconds - 0.5, 'text': text, 'words': words}]}
+
+
+@unittest.skipIf(np is None, 'numpy tidak terpasang')
+class TranscribeWindowsMergeTest(unittest.TestCase):
+
+    def run_windows(self, backend, count=3, window_seconds=10):
+        import transcriber as transcriber_module
+        transcriber = transcriber_module.AudioTranscriber()
+        transcriber.backend = backend
+        model = FakeModel()
+        windows = []
+        for i in range(count):
+            start = i * window_seconds
+            samples = window_seconds * 16000
+            windows.append((float(start), (start + np.arange(samples) / 16000).astype(np.float32)))
+        with mock.patch.object(transcriber_module, 'CHUNK_OVERLAP_SECONDS', 2.0), \
+                mock.patch.object(transcriber, 'load_model', return_value=model):
+            text, duration, word_count, segments, language = transcriber.transcribe_windows(
+                iter(windows), language='id')
+        return text, duration, word_count
+
+    def test_overlapping_windows_keep_every_word_once(self):
+        text, duration, word_count = self.run_windows(FakeBackend())
+        self.assertEqual(spoken(text), list(range(0, 30)))
+        self.assertEqual(duration, 30.0)
+        self.assertEqual(word_count, 30)
+
+    def test_failed_window_does_not_trim_next_one(self):
+        text, _, _ = self.run_windows(FakeBackend(fail_calls={2}))
+        # Window kedua (10-20 s) gagal; window ketiga dimulai 18 s (overlap dari window kedua)
+        # dan tidak dipotong, jadi w18 dan w19 tetap ada
+        self.assertEqual(spoken(text), list(range(0, 10)) + list(range(18, 30)))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,44 @@
+# text_compression.py
+import gzip
+
+try:
+    import zstandard
+except ImportError:  # zstd opsional; gzip selalu tersedia
+    zstandard = None
+
+# Codec untuk data baru; data lama tetap dibaca dengan codec yang tercatat
+DEFAULT_CODEC = 'zstd' if zstandard else 'gzip'
+
+ZSTD_LEVEL = 10
+GZIP_LEVEL = 6
+
+
+def compress_text(text, codec=None):
+    """
+    Kompres teks UTF-8.
+
+    Returns:
+        tuple: (bytes terkompresi, nama codec)
+    """
+    codec = codec or DEFAULT_CODEC
+    data = (text or '').encode('utf-8')
+    if codec == 'zstd':
+        if zstandard is None:
+            raise Exception("Codec zstd membutuhkan paket 'zstandard'")
+        return zstandard.ZstdCompressor(level=ZSTD_LEVEL).compress(data), codec
+    if codec == 'gzip':
+        return gzip.compress(data, compresslevel=GZIP_LEVEL, mtime=0), codec
+    raise Exception(f"Codec kompresi tidak dikenal: {codec}")
+
+
+def decompress_text(blob, codec):
+    """Kebalikan compress_text"""
+    if blob is None:
+        return None
+    if codec == 'zstd':
+        if zstandard is None:
+            raise Exception("Transkripsi dikompres dengan zstd, install paket 'zstandard' untuk membacanya")
+        return zstandard.ZstdDecompressor().decompress(bytes(blob)).decode('utf-8')
+    if codec == 'gzip':
+        return gzip.decompress(bytes(blob)).decode('utf-8')
+    raise Exception(f"Codec kompresi tidak dikenal: {codec}")
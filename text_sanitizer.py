@@ -0,0 +1,40 @@
+# text_sanitizer.py
+import re
+
+# Karakter tipografi yang diganti agar aman untuk DOCX
+DOCX_REPLACEMENTS = {
+    '\u2013': '-',  # en dash
+    '\u2014': '-',  # em dash
+    '\u2018': "'",  # left single quotation mark
+    '\u2019': "'",  # right single quotation mark
+    '\u201c': '"',  # left double quotation mark
+    '\u201d': '"',  # right double quotation mark
+    '\u2026': '...', # horizontal ellipsis
+}
+
+# Karakter kontrol selain tab, newline dan carriage return
+_CONTROL_CLASS = '\x00-\x08\x0b\x0c\x0e-\x1f'
+
+# Satu regex terkompilasi per format; karakter bersih dilewati di C tanpa alokasi per karakter.
+# DOCX: karakter tipografi + karakter yang tidak valid di XML 1.0 (kontrol, surrogate, U+FFFE, U+FFFF)
+_DOCX_RE = re.compile('[' + ''.join(DOCX_REPLACEMENTS) + _CONTROL_CLASS + '\ud800-\udfff\ufffe\uffff]')
+# PDF: hanya karakter kontrol
+_PDF_RE = re.compile('[' + _CONTROL_CLASS + ']')
+
+
+def _docx_replacement(match):
+    return DOCX_REPLACEMENTS.get(match.group(), ' ')
+
+
+def _normalize_newlines(text):
+    return text.replace('\r\n', '\n').replace('\r', '\n')
+
+
+def sanitize_for_docx(text):
+    """Ganti karakter tipografi dan buang karakter yang tidak valid di XML/DOCX"""
+    return _DOCX_RE.sub(_docx_replacement, _normalize_newlines(text)).strip()
+
+
+def sanitize_for_pdf(text):
+    """Ganti karakter kontrol dengan spasi (Unicode lain dipertahankan untuk PDF)"""
+    return _PDF_RE.sub(' ', _normalize_newlines(text)).strip()
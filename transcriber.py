@@ -1,45 +1,140 @@
-import whisper
 import subprocess
 import os
-import torch
+import json
+import tempfile
 import logging
 import time
+import threading
+import weakref
+from collections import OrderedDict
+from scratch import scratch_space, ScratchQuotaExceeded
+import metrics
+import profiling
+from inference_backends import get_backend
+from transcript_merge import TranscriptMerger
+from transcript_stats import StatsAccumulator
+from cpu_resources import cpu_resources
 
 # Setup logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# Sample rate audio yang dipakai Whisper
+SAMPLE_RATE = 16000
+# Urutan bahasa stream audio yang dipilih dari video (tag ISO 639, dipisah koma)
+AUDIO_STREAM_LANGUAGES = [lang.strip().lower() for lang in os.environ.get(
+    'AUDIO_STREAM_LANGUAGES', 'ind,id,in').split(',') if lang.strip()]
+# Jumlah ukuran model yang boleh dimuat bersamaan per slot CPU (model paling lama tidak dipakai dilepas)
+MAX_LOADED_MODELS = int(os.environ.get('WHISPER_MAX_LOADED_MODELS', 2))
+# Bahasa default job: 'auto' = deteksi sekali per file, atau kode bahasa Whisper (id, en, ...)
+WHISPER_LANGUAGE = os.environ.get('WHISPER_LANGUAGE', 'auto')
+# Dipakai jika deteksi tidak menemukan window berisi suara
+FALLBACK_LANGUAGE = 'id'
+# Deteksi bahasa: panjang window, maksimal window yang diambil sampel, ambang RMS window
+# dianggap berisi suara, dan probabilitas yang cukup untuk berhenti lebih awal
+LANGUAGE_DETECT_SECONDS = 30
+LANGUAGE_DETECT_WINDOWS = 3
+SPEECH_RMS_THRESHOLD = 0.01
+LANGUAGE_CONFIDENT = 0.9
+# Chunk berikutnya dimulai sekian detik sebelum akhir chunk sebelumnya; kata ganda di area
+# overlap dibuang berdasarkan timestamp kata (0 = tanpa overlap dan tanpa timestamp kata)
+CHUNK_OVERLAP_SECONDS = float(os.environ.get('WHISPER_CHUNK_OVERLAP', 2.0))
+# Jumlah kata terakhir chunk sebelumnya yang diberikan sebagai initial_prompt (0 = nonaktif);
+# Whisper hanya memakai ~224 token prompt, jadi teks dibatasi
+PROMPT_MAX_WORDS = int(os.environ.get('WHISPER_PROMPT_WORDS', 48))
+
 class AudioTranscriber:
     def __init__(self):
-        self.gpu_available = self.check_gpu()
-        self.model = None
-        self.model_size = self.determine_model_size()
+        # torch/whisper baru diimport saat GPU atau model pertama kali dibutuhkan,
+        # jadi membuat AudioTranscriber (dan import app) tetap cepat
+        self._gpu_available = None
+        self._model_size = None
+        # Engine inferensi (WHISPER_BACKEND); import library-nya baru terjadi saat load model
+        self.backend = get_backend()
+        # Cache model per (ukuran, slot CPU); ukuran dipilih per job oleh model_policy
+        self.models = OrderedDict()
+        self._models_lock = threading.Lock()
+        # Satu lock inferensi per instance model (lihat model_lock)
+        self._inference_locks = weakref.WeakKeyDictionary()
+        # Slot CPU menentukan instance model yang dipakai job
+        self.cpu_resources = cpu_resources
+    
+    @property
+    def gpu_available(self):
+        if self._gpu_available is None:
+            self._gpu_available = self.check_gpu()
+        return self._gpu_available
+    
+    @property
+    def device(self):
+        """Device inferensi efektif: 'cuda' hanya jika GPU ada dan engine memakainya (whisper-int8 selalu CPU)"""
+        return self.backend.device(self.gpu_available)
+    
+    @property
+    def model_size(self):
+        if self._model_size is None:
+            self._model_size = self.determine_model_size()
+        return self._model_size
     
     def check_gpu(self):
         """Cek ketersediaan GPU"""
         try:
+            import torch
             return torch.cuda.is_available()
         except:
             return False
     
     def determine_model_size(self):
         """Tentukan ukuran model berdasarkan GPU"""
-        if self.gpu_available:
+        if self.device == 'cuda':
             print("🖥️  GPU tersedia - menggunakan model 'small'")
             return "small"
         else:
-            print("🖥️  GPU tidak tersedia - menggunakan model 'base'")
+            print("🖥️  GPU tidak tersedia atau tidak dipakai engine - menggunakan model 'base'")
             return "base"
     
-    def load_model(self):
-        """Load model Whisper"""
-        if self.model is None:
-            device = "cuda" if self.gpu_available else "cpu"
-            print(f"📥 Memuat model Whisper ({self.model_size})...")
-            self.model = whisper.load_model(self.model_size, device=device)
+    def load_model(self, model_size=None, instance=None):
+        """
+        Load model Whisper (default: ukuran bawaan host) dari cache per ukuran dan slot CPU.
+        
+        Decoding openai-whisper memasang hook kv-cache pada modul decoder, jadi satu objek
+        model tidak boleh dipakai dua job sekaligus. Setiap slot CPU (instance, default: slot
+        yang dipegang thread ini) mendapat instance model sendiri; pemanggil di luar slot
+        berbagi instance None yang inferensinya diserialkan oleh model_lock.
+        """
+        model_size = model_size or self.model_size
+        if instance is None:
+            slot = self.cpu_resources.current()
+            instance = slot['slot'] if slot else None
+        key = (model_size, instance)
+        with self._models_lock:
+            if key in self.models:
+                self.models.move_to_end(key)
+                return self.models[key]
+            
+            device = self.device
+            slot_label = f", slot {instance}" if instance is not None else ''
+            print(f"📥 Memuat model Whisper ({model_size}, engine {self.backend.name}{slot_label})...")
+            with metrics.span('model_load', model=model_size, backend=self.backend.name):
+                model = self.backend.load(model_size, device)
             print("✅ Model berhasil dimuat")
-        return self.model
+            
+            self.models[key] = model
+            loaded = [cached for cached in self.models if cached[1] == instance]
+            for released in loaded[:max(0, len(loaded) - MAX_LOADED_MODELS)]:
+                del self.models[released]
+                print(f"♻️  Melepas model Whisper ({released[0]}{slot_label}) dari memori")
+            return model
     
+    def model_lock(self, model):
+        """Lock inferensi untuk satu instance model (satu decode pada satu waktu)"""
+        with self._models_lock:
+            lock = self._inference_locks.get(model)
+            if lock is None:
+                lock = self._inference_locks[model] = threading.Lock()
+            return lock
+    
+    @metrics.timed('probe')
     def get_audio_duration(self, audio_file):
         """Dapatkan durasi audio"""
         try:
@@ -53,48 +148,171 @@ class AudioTranscriber:
             pass
         return None
     
-    def extract_audio(self, input_file, output_file):
-        """Ekstrak audio dari file video"""
+    @metrics.timed('probe')
+    def probe_audio_streams(self, input_file):
+        """
+        Daftar stream audio dalam file via ffprobe.
+        
+        Returns:
+            tuple: (list dict index/language/default/channels, durasi file atau None)
+        """
+        command = ['ffprobe', '-v', 'error', '-select_streams', 'a',
+                   '-show_entries', 'stream=index,channels:stream_tags=language:stream_disposition=default:format=duration',
+                   '-of', 'json', input_file]
+        result = subprocess.run(command, capture_output=True, text=True, timeout=30)
+        if result.returncode != 0:
+            raise Exception(f"Gagal membaca stream: {result.stderr.strip()[:200]}")
+        
+        data = json.loads(result.stdout or '{}')
+        streams = [{
+            'index': stream['index'],
+            'language': (stream.get('tags') or {}).get('language', '').lower(),
+            'default': bool((stream.get('disposition') or {}).get('default')),
+            'channels': stream.get('channels')
+        } for stream in data.get('streams', [])]
+        
+        duration = (data.get('format') or {}).get('duration')
         try:
-            print(f"🎵 Mengekstrak audio dari {os.path.basename(input_file)}...")
-            command = [
-                'ffmpeg', '-i', input_file,
-                '-q:a', '0', '-map', 'a',
-                '-ar', '16000', '-ac', '1',
-                output_file, '-y'
-            ]
-            result = subprocess.run(command, capture_output=True, text=True, timeout=300)
+            duration = float(duration)
+        except (TypeError, ValueError):
+            duration = None
+        return streams, duration
+    
+    def select_audio_stream(self, streams, preferred_languages=None):
+        """Pilih stream audio: bahasa yang diinginkan, lalu stream default, lalu stream pertama"""
+        if not streams:
+            return None
+        preferred_languages = preferred_languages or AUDIO_STREAM_LANGUAGES
+        for language in preferred_languages:
+            for stream in streams:
+                if stream['language'] == language:
+                    return stream
+        for stream in streams:
+            if stream['default']:
+                return stream
+        return streams[0]
+    
+    def transcribe_video(self, input_file, progress_callback=None, on_chunk=None, model_size=None, language=None,
+                         stats=None):
+        """
+        Transcribe video dengan men-decode stream audio langsung ke PCM lewat pipe.
+        
+        Tidak ada file WAV perantara; window audio dibaca dari stdout ffmpeg dan langsung
+        diberikan ke Whisper.
+        """
+        if progress_callback:
+            progress_callback(5, "Memilih stream audio dari video...")
+        
+        streams, duration = self.probe_audio_streams(input_file)
+        stream = self.select_audio_stream(streams)
+        if stream is None:
+            raise Exception("File video tidak memiliki stream audio")
+        
+        stream_language = f", bahasa {stream['language']}" if stream['language'] else ''
+        print(f"🎵 Menggunakan stream audio #{stream['index']}{stream_language} ({len(streams)} stream tersedia)")
+        if duration:
+            print(f"📊 Durasi audio: {duration/60:.1f} menit")
+        
+        with tempfile.TemporaryFile() as stderr_file:
+            process = subprocess.Popen(self.decode_command(input_file, audio_stream=stream['index']),
+                                       stdout=subprocess.PIPE, stderr=stderr_file)
+            try:
+                result = self.transcribe_windows(self.iter_pcm_windows(process.stdout),
+                                                 progress_callback, total_duration=duration,
+                                                 on_chunk=on_chunk, model_size=model_size, language=language,
+                                                 stats=stats)
+            finally:
+                process.stdout.close()
+                returncode = process.wait()
             
-            if result.returncode == 0 and os.path.exists(output_file):
-                file_size = os.path.getsize(output_file)
-                if file_size > 0:
-                    print(f"✅ Audio berhasil diekstrak ({file_size} bytes)")
-                    return True
-                else:
-                    print("❌ File ekstrak kosong")
-                    return False
-            else:
-                print(f"❌ Gagal mengekstrak audio: {result.stderr[:200]}...")
-                return False
-        except subprocess.TimeoutExpired:
-            print("❌ Timeout saat mengekstrak audio")
-            return False
-        except Exception as e:
-            print(f"❌ Error ekstraksi: {e}")
-            return False
+            if returncode != 0:
+                stderr_file.seek(0)
+                error = stderr_file.read().decode('utf-8', 'replace').strip()
+                if not result[0].strip():
+                    raise Exception(f"Gagal men-decode audio: {error[:200]}")
+                print(f"⚠️  ffmpeg berhenti dengan error, hasil parsial dipakai: {error[:200]}")
+        
+        transcription, decoded_duration, word_count, segments, detected_language = result
+        return transcription, duration or decoded_duration, word_count, segments, detected_language
     
-    def split_audio_to_chunks(self, audio_file, chunk_duration=30):
-        """Split audio ke chunk kecil"""
+    def read_pcm(self, audio_file, start, seconds):
+        """Decode sebagian file (mulai detik start, sepanjang seconds) ke array float32 16 kHz"""
+        import numpy as np
+        
+        command = ['ffmpeg', '-nostdin', '-loglevel', 'error', '-ss', str(start), '-t', str(seconds),
+                   '-i', audio_file, '-vn', '-f', 's16le', '-acodec', 'pcm_s16le',
+                   '-ar', str(SAMPLE_RATE), '-ac', '1', 'pipe:1']
+        result = subprocess.run(command, capture_output=True, timeout=60)
+        data = result.stdout[:len(result.stdout) // 2 * 2]
+        return np.frombuffer(data, dtype=np.int16).astype(np.float32) / 32768.0
+    
+    def language_windows(self, audio_file, duration):
+        """Window sampel untuk deteksi bahasa: awal file lalu sekitar 1/3 dan 2/3 durasi (lazy)"""
+        offsets = [0]
+        if duration and duration > LANGUAGE_DETECT_SECONDS * 2:
+            offsets += [duration / 3, duration * 2 / 3]
+        for offset in offsets:
+            yield self.read_pcm(audio_file, offset, LANGUAGE_DETECT_SECONDS)
+    
+    def window_slices(self, audio):
+        """Potong array audio menjadi window deteksi bahasa"""
+        size = LANGUAGE_DETECT_SECONDS * SAMPLE_RATE
+        for start in range(0, len(audio), size):
+            yield audio[start:start + size]
+    
+    @metrics.timed('language_detect')
+    def detect_language(self, model, windows):
+        """
+        Deteksi bahasa dari beberapa window audio; window tanpa suara (RMS rendah) dilewati.
+        
+        Berhenti setelah LANGUAGE_DETECT_WINDOWS window bersuara, atau lebih awal jika
+        probabilitas rata-rata bahasa teratas sudah mencapai LANGUAGE_CONFIDENT.
+        
+        Returns:
+            tuple: (kode bahasa, probabilitas rata-rata) atau (None, 0.0) jika tidak ada suara
+        """
+        import numpy as np
+        
+        totals = {}
+        used = 0
+        for audio in windows:
+            if len(audio) == 0 or float(np.sqrt(np.mean(np.square(audio)))) < SPEECH_RMS_THRESHOLD:
+                continue
+            with self.model_lock(model):
+                probabilities = self.backend.detect_language(model, audio)
+            for language, probability in probabilities.items():
+                totals[language] = totals.get(language, 0.0) + probability
+            used += 1
+            best = max(totals, key=totals.get)
+            if used >= LANGUAGE_DETECT_WINDOWS or totals[best] / used >= LANGUAGE_CONFIDENT:
+                break
+        
+        if not used:
+            return None, 0.0
+        best = max(totals, key=totals.get)
+        return best, totals[best] / used
+    
+    @metrics.timed('chunking')
+    def split_audio_to_chunks(self, audio_file, output_dir, chunk_duration=30, overlap=0.0):
+        """
+        Split audio ke chunk kecil di folder scratch job.
+        
+        Dengan overlap, audio chunk dimulai `overlap` detik sebelum waktu mulainya (kecuali
+        chunk pertama), sehingga audio chunk berada di max(0, mulai - overlap).
+        
+        Returns:
+            list: (chunk_file, waktu mulai dalam detik); [(audio_file, 0)] jika split gagal
+                  atau ruang scratch tidak cukup
+        """
         try:
             # Gunakan ffmpeg untuk split audio
-            base_name = os.path.splitext(audio_file)[0]
             chunks = []
             
             # Dapatkan durasi total
             duration = self.get_audio_duration(audio_file)
             if not duration or duration <= 0:
                 print("⚠️  Tidak bisa mendapatkan durasi, menggunakan file penuh")
-                return [audio_file]  # Return original jika tidak bisa dapat durasi
+                return [(audio_file, 0)]  # Return original jika tidak bisa dapat durasi
             
             print(f"📊 Durasi audio: {duration/60:.1f} menit")
             
@@ -104,11 +322,15 @@ class AudioTranscriber:
             
             while start_time < duration:
                 end_time = min(start_time + chunk_duration, duration)
-                chunk_file = f"{base_name}_chunk_{chunk_index:04d}.wav"
+                audio_start = max(0.0, start_time - overlap)
+                chunk_file = os.path.join(output_dir, f"chunk_{chunk_index:04d}.wav")
+                
+                # WAV 16 kHz mono 16-bit: 32000 byte per detik
+                scratch_space.ensure_space(int((end_time - audio_start) * SAMPLE_RATE * 2) + 44)
                 
                 command = [
                     'ffmpeg', '-i', audio_file,
-                    '-ss', str(start_time), '-t', str(end_time - start_time),
+                    '-ss', str(audio_start), '-t', str(end_time - audio_start),
                     '-ar', '16000', '-ac', '1', '-y',
                     chunk_file
                 ]
@@ -117,7 +339,7 @@ class AudioTranscriber:
                 if result.returncode == 0 and os.path.exists(chunk_file):
                     file_size = os.path.getsize(chunk_file)
                     if file_size > 0:  # Cek apakah file tidak kosong
-                        chunks.append(chunk_file)
+                        chunks.append((chunk_file, start_time))
                         print(f"✅ Chunk {chunk_index+1} dibuat ({file_size} bytes)")
                     else:
                         print(f"⚠️  Chunk {chunk_index} kosong, dilewati")
@@ -133,21 +355,196 @@ class AudioTranscriber:
             
             if not chunks:
                 print("⚠️  Tidak ada chunk yang berhasil dibuat, menggunakan file asli")
-                return [audio_file]
+                return [(audio_file, 0)]
             
             print(f"✅ Berhasil membuat {len(chunks)} chunk")
             return chunks
         except subprocess.TimeoutExpired:
             print("❌ Timeout saat membuat chunk")
-            return [audio_file]
+            return [(audio_file, 0)]
+        except ScratchQuotaExceeded as e:
+            print(f"⚠️  {e}, menggunakan file asli")
+            return [(audio_file, 0)]
         except Exception as e:
             print(f"❌ Error splitting audio: {e}")
-            return [audio_file]
+            return [(audio_file, 0)]
     
-    def transcribe_with_progress(self, input_file, progress_callback=None):
-        """Transcribe dengan progress tracking"""
-        temp_files_to_cleanup = []
+    @metrics.timed('inference')
+    def transcribe_audio(self, model, audio, chunk_start=0, language=None, initial_prompt=None):
+        """
+        Transcribe satu chunk (path file atau array float32 16 kHz).
+        
+        language=None membiarkan Whisper mendeteksi bahasa chunk ini sendiri; job biasa
+        selalu mengisi bahasa hasil deteksi sekali per file. initial_prompt berisi teks akhir
+        chunk sebelumnya agar konteks tidak hilang di batas chunk.
+        
+        Returns:
+            tuple: (teks chunk, segmen dengan timestamp relatif terhadap awal file; jika
+                    CHUNK_OVERLAP_SECONDS > 0 segmen juga berisi 'words' untuk merge overlap)
+        """
+        with self.model_lock(model), profiling.torch_ops():
+            result = self.backend.transcribe(model, audio, language, self.device == 'cuda',
+                                             initial_prompt=initial_prompt,
+                                             word_timestamps=CHUNK_OVERLAP_SECONDS > 0)
+        
+        segments = []
+        for segment in result.get("segments", []):
+            segment_text = segment["text"].strip()
+            if segment_text:
+                item = {
+                    'start': chunk_start + segment["start"],
+                    'end': chunk_start + segment["end"],
+                    'text': segment_text
+                }
+                # Skor keyakinan Whisper per segmen (untuk transcript_stats)
+                for key in ('avg_logprob', 'no_speech_prob'):
+                    if segment.get(key) is not None:
+                        item[key] = segment[key]
+                if segment.get("words"):
+                    item['words'] = [{'start': chunk_start + word["start"], 'end': chunk_start + word["end"],
+                                      'word': word["word"]} for word in segment["words"]]
+                segments.append(item)
+        return result["text"], segments
+    
+    def chunk_prompt(self, merger, cut):
+        """initial_prompt untuk chunk berikutnya: kata terakhir sebelum titik potong (atau None)"""
+        if PROMPT_MAX_WORDS <= 0:
+            return None
+        return merger.prompt(PROMPT_MAX_WORDS, cut)
+    
+    def decode_command(self, source='pipe:0', audio_stream=None):
+        """Perintah ffmpeg untuk decode audio ke PCM s16le 16 kHz mono di stdout"""
+        command = ['ffmpeg', '-nostdin', '-loglevel', 'error', '-i', source]
+        if audio_stream is not None:
+            command += ['-map', f'0:{audio_stream}']
+        command += ['-vn', '-f', 's16le', '-acodec', 'pcm_s16le', '-ar', str(SAMPLE_RATE), '-ac', '1', 'pipe:1']
+        return command
+    
+    def iter_pcm_windows(self, pcm_stream, window_seconds=60):
+        """
+        Baca PCM s16le mono dari stream dan hasilkan window audio.
+        
+        Yields:
+            tuple: (waktu mulai dalam detik, array float32 untuk Whisper)
+        """
+        import numpy as np
+        
+        window_bytes = int(window_seconds * SAMPLE_RATE) * 2
+        start = 0.0
+        while True:
+            # Waktu menunggu PCM dari ffmpeg = tahap ekstraksi audio
+            read_start = time.perf_counter()
+            data = pcm_stream.read(window_bytes)
+            metrics.record_span('extract', time.perf_counter() - read_start, read_start)
+            if not data:
+                break
+            if len(data) % 2:
+                data = data[:-1]
+            audio = np.frombuffer(data, dtype=np.int16).astype(np.float32) / 32768.0
+            yield start, audio
+            start += len(audio) / SAMPLE_RATE
+    
+    def transcribe_windows(self, windows, progress_callback=None, total_duration=None, on_chunk=None,
+                           model_size=None, language=None, stats=None):
+        """
+        Transcribe window audio yang datang bertahap (misal dari pipe ffmpeg).
+        
+        Args:
+            windows: Iterator (waktu mulai, array float32) dari iter_pcm_windows
+            total_duration (float): Durasi total jika diketahui (untuk progress)
+            on_chunk: Callback (detik audio, detik proses) setelah tiap window selesai (untuk ETA)
+            model_size (str): Ukuran model Whisper untuk job ini (default: ukuran bawaan)
+            language (str): Kode bahasa, atau 'auto'/None untuk deteksi dari window pertama
+                            yang berisi suara
+            stats (StatsAccumulator): Diisi per window yang sudah final (statistik transkripsi)
+        
+        Returns:
+            tuple: (teks, durasi, jumlah kata, segmen, bahasa) seperti transcribe_with_progress
+        """
+        language = language or WHISPER_LANGUAGE
+        if progress_callback:
+            progress_callback(25, "Memuat model Whisper...")
+        model = self.load_model(model_size)
+        
+        import numpy as np
+        
+        if stats is None:
+            stats = StatsAccumulator()
+        merger = TranscriptMerger(CHUNK_OVERLAP_SECONDS, on_final=stats.add_chunk)
+        overlap_samples = int(CHUNK_OVERLAP_SECONDS * SAMPLE_RATE)
+        # Ekor window sebelumnya, dipakai sebagai awal window berikutnya (overlap)
+        tail = None
+        previous_ok = False
+        duration = 0.0
         
+        for i, (window_start, audio) in enumerate(windows):
+            duration = window_start + len(audio) / SAMPLE_RATE
+            if progress_callback:
+                if total_duration:
+                    progress = 30 + int(min(1.0, window_start / total_duration) * 60)
+                else:
+                    progress = None
+                progress_callback(progress, f"Memproses segmen {i+1} (audio {duration/60:.1f} menit)...")
+            
+            if language == 'auto':
+                detected, probability = self.detect_language(model, self.window_slices(audio))
+                if detected:
+                    language = detected
+                    print(f"🌐 Bahasa terdeteksi: {language} ({probability:.0%})")
+                    if progress_callback:
+                        progress_callback(None, f"Bahasa terdeteksi: {language} ({probability:.0%})")
+            
+            audio_start = window_start
+            chunk_audio = audio
+            if tail is not None and len(tail):
+                audio_start = window_start - len(tail) / SAMPLE_RATE
+                chunk_audio = np.concatenate((tail, audio))
+            tail = chunk_audio[-overlap_samples:] if overlap_samples else None
+            # Overlap hanya dipotong jika window sebelumnya berhasil ditranskripsi
+            cut = merger.cut_point(audio_start) if previous_ok else None
+            
+            try:
+                chunk_started = time.perf_counter()
+                # Window tanpa suara sebelum bahasa terdeteksi: biarkan Whisper menentukan sendiri
+                chunk_language = None if language == 'auto' else language
+                prompt = self.chunk_prompt(merger, cut) if previous_ok else None
+                chunk_text, chunk_segments = self.transcribe_audio(model, chunk_audio, audio_start,
+                                                                   chunk_language, prompt)
+                merger.add(chunk_segments, cut, window_start, duration)
+                previous_ok = True
+                if on_chunk:
+                    on_chunk(len(audio) / SAMPLE_RATE, time.perf_counter() - chunk_started)
+                print(f"✅ Segmen {i+1} selesai ({len(chunk_text)} karakter)")
+            except Exception as chunk_error:
+                print(f"❌ Error transcribing window {i}: {chunk_error}")
+                previous_ok = False
+                continue
+        
+        if progress_callback:
+            progress_callback(95, "Menggabungkan hasil...")
+        
+        merger.finish()
+        return (merger.text(), duration, stats.word_count, merger.public_segments(),
+                None if language == 'auto' else language)
+    
+    def transcribe_with_progress(self, input_file, progress_callback=None, on_chunk=None, model_size=None,
+                                 language=None, stats=None):
+        """
+        Transcribe dengan progress tracking.
+        
+        Progress dihitung dari detik audio yang sudah diproses (bukan indeks chunk), dan
+        on_chunk(detik audio, detik proses) dipanggil setelah tiap chunk untuk estimasi ETA.
+        Bahasa ('auto'/None = WHISPER_LANGUAGE) dideteksi sekali per file dari beberapa
+        window sampel lalu dipakai untuk semua chunk. Statistik (jumlah kata, kecepatan bicara,
+        keyakinan per chunk) dikumpulkan ke stats selama chunk selesai.
+        
+        Returns:
+            tuple: (teks, durasi, jumlah kata, segmen, bahasa) - segmen berupa list dict
+                   start/end (detik dari awal file) dan text
+        """
+        language = language or WHISPER_LANGUAGE
+        if stats is None:
+            stats = StatsAccumulator()
         try:
             # Cek ekstensi file
             _, ext = os.path.splitext(input_file.lower())
@@ -158,23 +555,12 @@ class AudioTranscriber:
                 if progress_callback:
                     progress_callback(5, "Memvalidasi file audio...")
             else:
-                # Ekstrak audio dari video
-                audio_file = os.path.splitext(input_file)[0] + '_extracted.wav'
-                temp_files_to_cleanup.append(audio_file)
-                if progress_callback:
-                    progress_callback(5, "Mengekstrak audio dari video...")
-                
-                try:
-                    if not self.extract_audio(input_file, audio_file):
-                        raise Exception("Gagal mengekstrak audio")
-                except Exception as extract_error:
-                    if progress_callback:
-                        progress_callback(None, f"Gagal ekstraksi: {str(extract_error)}")
-                    raise extract_error
+                # Video: decode audio langsung ke PCM tanpa file perantara
+                return self.transcribe_video(input_file, progress_callback, on_chunk, model_size, language, stats)
             
-            # Validasi file audio hasil ekstraksi
+            # Validasi file audio
             if not os.path.exists(audio_file) or os.path.getsize(audio_file) == 0:
-                raise Exception("File audio hasil ekstraksi tidak valid")
+                raise Exception("File audio tidak valid")
             
             # Dapatkan durasi untuk estimasi
             if progress_callback:
@@ -186,91 +572,88 @@ class AudioTranscriber:
             if progress_callback:
                 progress_callback(15, "Mempersiapkan chunk audio...")
             
-            chunks = self.split_audio_to_chunks(audio_file, chunk_duration=60)  # 60 detik per chunk untuk lebih cepat
-            temp_files_to_cleanup.extend(chunks)
-            total_chunks = len(chunks)
-            
-            if progress_callback:
-                progress_callback(20, f"Mempersiapkan {total_chunks} segmen...")
-            
-            # Load model
-            if progress_callback:
-                progress_callback(25, "Memuat model Whisper...")
-            
-            model = self.load_model()
-            
-            # Transcribe setiap chunk
-            transcriptions = []
-            total_word_count = 0
-            
-            print(f"🔄 Memulai transkripsi {total_chunks} segmen...")
-            
-            for i, chunk_file in enumerate(chunks):
+            # Chunk ditulis ke folder scratch per job; folder selalu dihapus saat blok selesai
+            with scratch_space.job('transcribe') as scratch_dir:
+                chunks = self.split_audio_to_chunks(audio_file, scratch_dir, chunk_duration=60,  # 60 detik per chunk untuk lebih cepat
+                                                    overlap=CHUNK_OVERLAP_SECONDS)
+                total_chunks = len(chunks)
+                
                 if progress_callback:
-                    progress = 30 + int((i / total_chunks) * 60)  # 30% - 90%
-                    progress_callback(progress, f"Memproses segmen {i+1}/{total_chunks}...")
+                    progress_callback(20, f"Mempersiapkan {total_chunks} segmen...")
                 
-                try:
-                    # Cek apakah chunk valid
-                    if not os.path.exists(chunk_file) or os.path.getsize(chunk_file) == 0:
-                        print(f"⚠️  Chunk {i} tidak valid, dilewati")
-                        continue
-                    
-                    # Transcribe chunk dengan timeout
-                    print(f"🔊 Memproses chunk {i+1}/{total_chunks}...")
-                    
-                    # Set timeout berdasarkan durasi chunk
-                    chunk_duration = self.get_audio_duration(chunk_file) or 60
-                    timeout_seconds = max(60, int(chunk_duration * 3))  # Minimal 60 detik
-                    
-                    result = model.transcribe(
-                        chunk_file,
-                        language="id",
-                        task="transcribe",
-                        fp16=self.gpu_available,
-                        verbose=False
-                    )
+                # Load model
+                if progress_callback:
+                    progress_callback(25, "Memuat model Whisper...")
+                
+                model = self.load_model(model_size)
+                
+                # Deteksi bahasa sekali untuk seluruh file
+                if language == 'auto':
+                    if progress_callback:
+                        progress_callback(27, "Mendeteksi bahasa...")
+                    detected, probability = self.detect_language(model, self.language_windows(audio_file, duration))
+                    language = detected or FALLBACK_LANGUAGE
+                    print(f"🌐 Bahasa: {language}" + (f" ({probability:.0%})" if detected else " (default, tidak ada suara)"))
+                
+                # Transcribe setiap chunk; hasil digabung dengan membuang kata ganda di area overlap
+                merger = TranscriptMerger(CHUNK_OVERLAP_SECONDS, on_final=stats.add_chunk)
+                previous_ok = False
+                
+                print(f"🔄 Memulai transkripsi {total_chunks} segmen...")
+                
+                for i, (chunk_file, chunk_start) in enumerate(chunks):
+                    # Panjang chunk dari batas chunk berikutnya (chunk terakhir bisa lebih pendek)
+                    chunk_end = chunks[i + 1][1] if i + 1 < total_chunks else duration
+                    chunk_duration = max(0.0, chunk_end - chunk_start) if chunk_end else None
                     
-                    chunk_text = result["text"]
-                    transcriptions.append(chunk_text)
-                    total_word_count += len(chunk_text.split())
+                    if progress_callback:
+                        # 30% - 90%, sebanding dengan detik audio yang sudah diproses
+                        done = chunk_start / duration if duration else i / total_chunks
+                        progress = 30 + int(min(1.0, done) * 60)
+                        progress_callback(progress, f"Memproses segmen {i+1}/{total_chunks}...")
                     
-                    print(f"✅ Chunk {i+1} selesai ({len(chunk_text)} karakter)")
+                    # Audio chunk dimulai sebelum chunk_start (lihat split_audio_to_chunks)
+                    audio_start = max(0.0, chunk_start - CHUNK_OVERLAP_SECONDS)
+                    carried = previous_ok
+                    cut = merger.cut_point(audio_start) if carried else None
+                    previous_ok = False
                     
-                except Exception as chunk_error:
-                    print(f"❌ Error transcribing chunk {i}: {chunk_error}")
-                    # Jangan stop proses, lanjut ke chunk berikutnya
-                    continue
-            
-            # Gabungkan semua transkripsi
-            if progress_callback:
-                progress_callback(95, "Menggabungkan hasil...")
-            
-            final_transcription = " ".join(transcriptions)
-            
-            print("✅ Transkripsi selesai")
-            return final_transcription, duration, total_word_count
+                    try:
+                        # Cek apakah chunk valid
+                        if not os.path.exists(chunk_file) or os.path.getsize(chunk_file) == 0:
+                            print(f"⚠️  Chunk {i} tidak valid, dilewati")
+                            continue
+                        
+                        # Transcribe chunk
+                        print(f"🔊 Memproses chunk {i+1}/{total_chunks}...")
+                        
+                        chunk_started = time.perf_counter()
+                        prompt = self.chunk_prompt(merger, cut) if carried else None
+                        chunk_text, chunk_segments = self.transcribe_audio(model, chunk_file, audio_start,
+                                                                           language, prompt)
+                        merger.add(chunk_segments, cut, chunk_start, chunk_end)
+                        previous_ok = True
+                        if on_chunk and chunk_duration:
+                            on_chunk(chunk_duration, time.perf_counter() - chunk_started)
+                        
+                        print(f"✅ Chunk {i+1} selesai ({len(chunk_text)} karakter)")
+                        
+                    except Exception as chunk_error:
+                        print(f"❌ Error transcribing chunk {i}: {chunk_error}")
+                        # Jangan stop proses, lanjut ke chunk berikutnya
+                        continue
+                
+                # Gabungkan semua transkripsi
+                if progress_callback:
+                    progress_callback(95, "Menggabungkan hasil...")
+                
+                merger.finish()
+                final_transcription = merger.text()
+                
+                print("✅ Transkripsi selesai")
+                return final_transcription, duration, stats.word_count, merger.public_segments(), language
             
         except Exception as e:
             logger.error(f"Error dalam transkripsi: {e}")
             print(f"❌ Error transkripsi: {e}")
             raise e
-        finally:
-            # Cleanup file temporary dengan error handling yang lebih baik
-            self.cleanup_temp_files(temp_files_to_cleanup, input_file)
-    
-    def cleanup_temp_files(self, temp_files, original_file):
-        """Cleanup file temporary dengan aman"""
-        try:
-            print(f"🧹 Membersihkan {len(temp_files)} file temporary...")
-            for temp_file in temp_files:
-                # Jangan hapus file asli
-                if temp_file and temp_file != original_file and os.path.exists(temp_file):
-                    try:
-                        os.remove(temp_file)
-                        print(f"🗑️  File temporary dihapus: {os.path.basename(temp_file)}")
-                    except Exception as e:
-                        print(f"⚠️  Gagal menghapus {temp_file}: {e}")
-            print("✅ Cleanup selesai")
-        except Exception as e:
-            print(f"⚠️  Error dalam cleanup: {e}")
\ No newline at end of file
@@ -0,0 +1,236 @@
+# transcript_export.py
+import os
+import re
+import threading
+import time
+import logging
+import uuid
+from datetime import datetime
+from database import db
+from artifact_store import content_hash
+from report_formatter import Run
+from text_sanitizer import sanitize_for_docx, sanitize_for_pdf
+
+logger = logging.getLogger(__name__)
+
+EXPORT_FORMATS = ('docx', 'pdf', 'srt', 'vtt')
+
+# Naikkan jika tampilan ekspor berubah agar artefak lama dirender ulang
+TRANSCRIPT_EXPORT_VERSION = 1
+
+# Pengelompokan segmen menjadi paragraf
+PARAGRAPH_MAX_GAP = 2.0
+PARAGRAPH_MAX_SECONDS = 90.0
+
+# Perkiraan kecepatan bicara jika durasi tidak diketahui (kata per detik)
+WORDS_PER_SECOND = 2.5
+
+SENTENCE_RE = re.compile(r'[^.!?]+(?:[.!?]+|$)')
+
+# Status job ekspor yang dijalankan di background
+export_jobs = {}
+# Job ekspor yang sudah selesai/gagal dihapus dari export_jobs setelah sekian detik
+EXPORT_JOB_EXPIRE_SECONDS = int(os.environ.get('EXPORT_JOB_EXPIRE_HOURS', 24)) * 3600
+
+
+def format_timestamp(seconds, style='clock'):
+    """
+    Format detik menjadi timestamp.
+
+    style: 'srt' (00:01:02,500), 'vtt' (00:01:02.500) atau 'clock' (01:02 / 1:01:02)
+    """
+    milliseconds = int(round(max(0, seconds) * 1000))
+    hours, milliseconds = divmod(milliseconds, 3600000)
+    minutes, milliseconds = divmod(milliseconds, 60000)
+    secs, milliseconds = divmod(milliseconds, 1000)
+    if style == 'srt':
+        return f"{hours:02d}:{minutes:02d}:{secs:02d},{milliseconds:03d}"
+    if style == 'vtt':
+        return f"{hours:02d}:{minutes:02d}:{secs:02d}.{milliseconds:03d}"
+    if hours:
+        return f"{hours}:{minutes:02d}:{secs:02d}"
+    return f"{minutes:02d}:{secs:02d}"
+
+
+def estimate_segments(text, duration=None):
+    """
+    Buat segmen per kalimat dengan waktu perkiraan (untuk transkripsi lama tanpa segmen).
+
+    Waktu dibagi proporsional terhadap jumlah karakter tiap kalimat.
+    """
+    sentences = [match.group().strip() for match in SENTENCE_RE.finditer(text or '')]
+    sentences = [sentence for sentence in sentences if sentence]
+    if not sentences:
+        return []
+
+    total_chars = sum(len(sentence) for sentence in sentences)
+    if not duration:
+        duration = len((text or '').split()) / WORDS_PER_SECOND
+
+    segments = []
+    position = 0.0
+    for sentence in sentences:
+        length = duration * len(sentence) / total_chars
+        segments.append((position, position + length, sentence))
+        position += length
+    return segments
+
+
+def load_segments(transcription):
+    """Segmen tersimpan (start, end, text) atau perkiraan jika belum ada"""
+    segments = db.get_transcript_segments(transcription[0])
+    if segments:
+        return segments
+    return estimate_segments(transcription[3], transcription[4])
+
+
+def group_paragraphs(segments, max_gap=PARAGRAPH_MAX_GAP, max_seconds=PARAGRAPH_MAX_SECONDS):
+    """Gabungkan segmen berurutan menjadi paragraf; paragraf baru saat jeda panjang atau terlalu lama"""
+    paragraphs = []
+    current = None
+    for start, end, text in segments:
+        if current and start - current[1] <= max_gap and end - current[0] <= max_seconds:
+            current[1] = end
+            current[2].append(text)
+        else:
+            current = [start, end, [text]]
+            paragraphs.append(current)
+    return [(start, end, ' '.join(texts)) for start, end, texts in paragraphs]
+
+
+def render_srt(segments, output_path):
+    with open(output_path, 'w', encoding='utf-8') as f:
+        for index, (start, end, text) in enumerate(segments, 1):
+            f.write(f"{index}\n{format_timestamp(start, 'srt')} --> {format_timestamp(end, 'srt')}\n{text}\n\n")
+
+
+def render_vtt(segments, output_path):
+    with open(output_path, 'w', encoding='utf-8') as f:
+        f.write("WEBVTT\n\n")
+        for start, end, text in segments:
+            f.write(f"{format_timestamp(start, 'vtt')} --> {format_timestamp(end, 'vtt')}\n{text}\n\n")
+
+
+def render_docx(title, entries, timestamps, output_path):
+    from docx import Document
+    from docx.shared import Pt, RGBColor
+    
+    doc = Document()
+    doc.add_heading(title, 0)
+    doc.add_paragraph(f'Dibuat pada: {datetime.now().strftime("%d %B %Y, %H:%M:%S")}')
+
+    for start, _, text in entries:
+        paragraph = doc.add_paragraph()
+        if timestamps:
+            stamp = paragraph.add_run(f"[{format_timestamp(start)}] ")
+            stamp.bold = True
+            stamp.font.size = Pt(9)
+            stamp.font.color.rgb = RGBColor(0x70, 0x70, 0x70)
+        paragraph.add_run(sanitize_for_docx(text))
+
+    doc.save(output_path)
+
+
+def render_pdf(title, entries, timestamps, output_path):
+    from pdf_layout import PDFLayout
+    
+    layout = PDFLayout()
+    layout.title(title)
+    for start, _, text in entries:
+        runs = [Run(f"[{format_timestamp(start)}] ", bold=True)] if timestamps else []
+        runs.append(Run(sanitize_for_pdf(text)))
+        layout.paragraph(runs)
+    layout.output(output_path)
+
+
+def render_export(transcription, segments, fmt, timestamps, paragraphs, output_path):
+    """Tulis ekspor transkripsi ke output_path"""
+    if fmt == 'srt':
+        render_srt(segments, output_path)
+    elif fmt == 'vtt':
+        render_vtt(segments, output_path)
+    else:
+        title = f"Transkripsi - {transcription[2]}"
+        entries = group_paragraphs(segments) if paragraphs else segments
+        if fmt == 'docx':
+            render_docx(title, entries, timestamps, output_path)
+        else:
+            render_pdf(title, entries, timestamps, output_path)
+
+
+def export_variant(fmt, timestamps, paragraphs):
+    """Nama varian opsi; subtitle selalu memakai segmen bertimestamp"""
+    if fmt in ('srt', 'vtt'):
+        return 'subtitle'
+    return f"{'ts' if timestamps else 'plain'}-{'para' if paragraphs else 'seg'}"
+
+
+def _finish_job(job_id, **fields):
+    export_jobs[job_id].update(fields, finished_at=time.time())
+
+
+def expire_export_jobs():
+    """Hapus status job ekspor yang sudah lama selesai (file artefaknya tetap di store)"""
+    now = time.time()
+    for job_id, job in list(export_jobs.items()):
+        if now - job.get('finished_at', now) > EXPORT_JOB_EXPIRE_SECONDS:
+            export_jobs.pop(job_id, None)
+
+
+def start_export_job(store, transcription_id, fmt, timestamps=True, paragraphs=True):
+    """
+    Ekspor transkripsi di background thread dan simpan hasilnya di store.
+
+    Jika ekspor dengan isi dan opsi yang sama sudah pernah dirender, job langsung selesai.
+
+    Returns:
+        str: job_id untuk cek status dan download
+    """
+    if fmt not in EXPORT_FORMATS:
+        raise Exception('Format ekspor tidak didukung')
+
+    transcription = db.get_transcription(transcription_id)
+    if not transcription:
+        raise Exception('Transkripsi tidak ditemukan')
+
+    segments = load_segments(transcription)
+    if not segments:
+        raise Exception('Transkripsi kosong')
+
+    variant = export_variant(fmt, timestamps, paragraphs)
+    item_id = f"{transcription_id}/{variant}"
+    digest = content_hash(transcription[2], transcription[3], segments, fmt, variant, TRANSCRIPT_EXPORT_VERSION)
+    download_name = f"{os.path.splitext(transcription[1])[0]}.{fmt}"
+
+    expire_export_jobs()
+    job_id = uuid.uuid4().hex
+    export_jobs[job_id] = {
+        'status': 'processing',
+        'message': f'Merender {fmt.upper()}...',
+        'transcription_id': transcription_id,
+        'format': fmt,
+        'download_name': download_name,
+        'etag': f"{digest}-{fmt}"
+    }
+
+    existing = store.artifact_path('transcripts', item_id, fmt, digest)
+    if os.path.exists(existing):
+        _finish_job(job_id, status='completed', message='Siap diunduh', path=existing)
+        return job_id
+
+    def worker():
+        start_time = time.time()
+        try:
+            path = store.get_or_render(
+                'transcripts', item_id, fmt, digest,
+                lambda output_path: render_export(transcription, segments, fmt, timestamps, paragraphs, output_path)
+            )
+            _finish_job(job_id, status='completed',
+                        message=f'Selesai dalam {time.time() - start_time:.1f} detik', path=path)
+        except Exception as e:
+            logger.error(f"Ekspor transkripsi {transcription_id} ({fmt}) gagal: {e}")
+            _finish_job(job_id, status='failed', message=f'Gagal ekspor: {str(e)}')
+
+    thread = threading.Thread(target=worker, daemon=True)
+    thread.start()
+    return job_id
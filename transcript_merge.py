@@ -0,0 +1,101 @@
+# transcript_merge.py
+
+
+def _midpoint(item):
+    return (item['start'] + item['end']) / 2
+
+
+def _rebuild(segment, words):
+    """Segmen baru dari sebagian kata segmen (teks dan waktu mengikuti kata yang tersisa)"""
+    segment = dict(segment, words=words)
+    segment['text'] = ''.join(word['word'] for word in words).strip()
+    segment['start'] = words[0]['start']
+    segment['end'] = words[-1]['end']
+    return segment
+
+
+def _keep(segments, predicate):
+    """Saring kata per segmen; segmen tanpa timestamp kata disaring berdasarkan titik tengahnya"""
+    kept = []
+    for segment in segments:
+        words = segment.get('words')
+        if words:
+            words = [word for word in words if predicate(_midpoint(word))]
+            if len(words) == len(segment['words']):
+                kept.append(segment)
+            elif words:
+                kept.append(_rebuild(segment, words))
+        elif predicate(_midpoint(segment)):
+            kept.append(segment)
+    return kept
+
+
+class TranscriptMerger:
+    """
+    Gabungkan segmen dari chunk yang saling overlap.
+
+    Chunk berikutnya dimulai `overlap` detik sebelum akhir chunk sebelumnya. Kata di area
+    overlap muncul di kedua chunk; titik potongnya di tengah overlap: kata chunk lama
+    dipertahankan jika titik tengahnya sebelum titik potong, kata chunk baru jika sesudahnya.
+    Kata di dekat batas chunk cenderung terpotong, jadi kata dari tengah overlap lebih akurat.
+
+    Segmen sebuah chunk baru final setelah chunk berikutnya ditambahkan (ekornya bisa masih
+    dipotong); on_final(start, end, segmen) dipanggil sekali per chunk saat itu, atau saat
+    finish() untuk chunk terakhir.
+    """
+
+    def __init__(self, overlap=0.0, on_final=None):
+        self.overlap = overlap
+        self.on_final = on_final
+        self.segments = []
+        # Chunk terakhir yang belum final: (indeks segmen pertama, start, end)
+        self._open = None
+
+    def cut_point(self, audio_start):
+        """Titik potong untuk chunk yang audionya mulai di audio_start (None untuk awal file)"""
+        if not self.overlap or audio_start <= 0:
+            return None
+        return audio_start + self.overlap / 2
+
+    def add(self, segments, cut=None, start=None, end=None):
+        """Tambahkan segmen chunk (waktu absolut); start/end = batas chunk untuk on_final"""
+        if cut is not None:
+            self._trim_tail(cut)
+            segments = _keep(segments, lambda time: time >= cut)
+        self._finalize()
+        self._open = (len(self.segments), start, end)
+        self.segments.extend(segments)
+        return segments
+
+    def finish(self):
+        """Tandai chunk terakhir final (panggil setelah semua chunk ditambahkan)"""
+        self._finalize()
+
+    def _finalize(self):
+        if self._open is None:
+            return
+        index, start, end = self._open
+        self._open = None
+        if self.on_final:
+            self.on_final(start, end, [segment for segment in self.segments[index:] if segment['text']])
+
+    def _trim_tail(self, cut):
+        # Hanya segmen terakhir yang bisa melewati titik potong
+        index = len(self.segments)
+        while index > 0 and self.segments[index - 1]['end'] > cut:
+            index -= 1
+        self.segments[index:] = _keep(self.segments[index:], lambda time: time < cut)
+
+    def prompt(self, max_words, cut=None):
+        """Kata-kata terakhir sebelum titik potong, untuk initial_prompt chunk berikutnya"""
+        segments = self.segments if cut is None else _keep(self.segments[-4:], lambda time: time < cut)
+        words = ' '.join(segment['text'] for segment in segments[-4:]).split()
+        return ' '.join(words[-max_words:]) or None
+
+    def text(self):
+        return ' '.join(segment['text'] for segment in self.segments if segment['text'])
+
+    def public_segments(self):
+        """Segmen tanpa detail kata (format yang disimpan di database)"""
+        return [{'start': segment['start'], 'end': segment['end'], 'text': segment['text']}
+                for segment in self.segments if segment['text']]
@@ -0,0 +1,81 @@
+# transcript_stats.py
+import math
+
+# Segmen dengan no_speech_prob di atas ambang ini dihitung sebagai diam (sama dengan
+# no_speech_threshold bawaan Whisper)
+NO_SPEECH_THRESHOLD = 0.6
+
+
+def confidence(avg_logprob):
+    """Rata-rata probabilitas token (0-1) dari avg_logprob Whisper"""
+    return round(math.exp(avg_logprob), 3) if avg_logprob is not None else None
+
+
+class StatsAccumulator:
+    """
+    Statistik transkripsi yang dihitung bertahap per chunk.
+
+    Setiap chunk yang sudah final (setelah overlap digabung) ditambahkan sekali lewat
+    add_chunk(); total disimpan sebagai jumlah berjalan, jadi teks transkripsi tidak perlu
+    dibaca ulang. avg_logprob dan no_speech_prob dirata-rata berbobot jumlah kata (segmen
+    tanpa kata berbobot 1).
+    """
+
+    def __init__(self):
+        self.word_count = 0
+        self.segment_count = 0
+        self.speech_seconds = 0.0
+        self.chunks = []
+        self._logprob_sum = 0.0
+        self._no_speech_sum = 0.0
+        self._weight = 0
+
+    def add_chunk(self, start, end, segments):
+        """Tambahkan segmen final satu chunk (start/end: batas chunk dalam detik)"""
+        words = 0
+        speech = 0.0
+        logprob_sum = 0.0
+        no_speech_sum = 0.0
+        weight = 0
+        for segment in segments:
+            segment_words = len(segment['text'].split())
+            words += segment_words
+            no_speech = segment.get('no_speech_prob')
+            if no_speech is None or no_speech < NO_SPEECH_THRESHOLD:
+                speech += max(0.0, segment['end'] - segment['start'])
+            if segment.get('avg_logprob') is not None:
+                segment_weight = max(1, segment_words)
+                logprob_sum += segment['avg_logprob'] * segment_weight
+                no_speech_sum += (no_speech or 0.0) * segment_weight
+                weight += segment_weight
+
+        self.word_count += words
+        self.segment_count += len(segments)
+        self.speech_seconds += speech
+        self._logprob_sum += logprob_sum
+        self._no_speech_sum += no_speech_sum
+        self._weight += weight
+        # Ringkas: [mulai, selesai, kata, detik bicara, avg_logprob, no_speech_prob]
+        self.chunks.append([
+            round(start or 0.0, 2), round(end, 2) if end is not None else None, words, round(speech, 2),
+            round(logprob_sum / weight, 4) if weight else None,
+            round(no_speech_sum / weight, 4) if weight else None
+        ])
+
+    def summary(self, duration=None):
+        """Ringkasan untuk tabel transcription_stats"""
+        duration = duration or (self.chunks[-1][1] if self.chunks else None)
+        avg_logprob = self._logprob_sum / self._weight if self._weight else None
+        return {
+            'duration': duration,
+            'word_count': self.word_count,
+            'segment_count': self.segment_count,
+            'speech_seconds': round(self.speech_seconds, 2),
+            # Kata per menit bicara (bagian diam tidak dihitung)
+            'speaking_rate': round(self.word_count / (self.speech_seconds / 60), 1) if self.speech_seconds else None,
+            'silence_ratio': round(max(0.0, 1 - self.speech_seconds / duration), 4) if duration else None,
+            'avg_logprob': round(avg_logprob, 4) if avg_logprob is not None else None,
+            'no_speech_prob': round(self._no_speech_sum / self._weight, 4) if self._weight else None,
+            'confidence': confidence(avg_logprob),
+            'chunks': self.chunks
+        }